@@ -7,7 +7,8 @@ from .models import (
     FamilyMember,
     Chiefdom,
     Village,
-    Location
+    Location,
+    DuplicateCandidate
 )
 
 
@@ -70,3 +71,12 @@ class VillageAdmin(admin.ModelAdmin):
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('first', 'second', 'score', 'status', 'created_at')
+    list_filter = ('status',)
+    list_editable = ('status',)
+    raw_id_fields = ('first', 'second')
+    ordering = ('-score',)
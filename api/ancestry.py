@@ -0,0 +1,149 @@
+"""Maintenance and lookups for the FamilyMemberAncestry closure table."""
+from collections import defaultdict, deque
+
+from django.db import connection, transaction
+
+from .models import FamilyMember, FamilyMemberAncestry
+
+
+def update_ancestry(member_ids):
+    """
+    Recompute closure rows for members whose parents changed, and their descendants.
+
+    Only rows whose descendant is in the affected subtree are rewritten; ancestry of
+    parents outside the subtree is read back from the closure table itself.
+    """
+    member_ids = set(member_ids)
+    if not member_ids:
+        return
+    affected = member_ids | set(
+        FamilyMemberAncestry.objects.filter(ancestor_id__in=member_ids).values_list('descendant_id', flat=True)
+    )
+    parents = {
+        member_id: (mother_id, father_id)
+        for member_id, mother_id, father_id in FamilyMember.objects.filter(
+            id__in=affected
+        ).values_list('id', 'mother_id', 'father_id')
+    }
+
+    outside_parents = {
+        parent_id
+        for pair in parents.values()
+        for parent_id in pair
+        if parent_id is not None and parent_id not in parents
+    }
+    ancestors = defaultdict(dict)
+    for ancestor_id, descendant_id, depth in FamilyMemberAncestry.objects.filter(
+            descendant_id__in=outside_parents
+    ).values_list('ancestor_id', 'descendant_id', 'depth'):
+        ancestors[descendant_id][ancestor_id] = depth
+
+    rows = []
+    for member_id in _parents_first(parents):
+        member_ancestors = {}
+        for parent_id in set(parents[member_id]) - {None}:
+            for ancestor_id, depth in [(parent_id, 0), *ancestors[parent_id].items()]:
+                if depth + 1 < member_ancestors.get(ancestor_id, depth + 2):
+                    member_ancestors[ancestor_id] = depth + 1
+        member_ancestors.pop(member_id, None)  # Guard against cycles in bad data
+        ancestors[member_id] = member_ancestors
+        rows.extend(
+            FamilyMemberAncestry(ancestor_id=ancestor_id, descendant_id=member_id, depth=depth)
+            for ancestor_id, depth in member_ancestors.items()
+        )
+
+    with transaction.atomic():
+        FamilyMemberAncestry.objects.filter(descendant_id__in=parents).delete()
+        FamilyMemberAncestry.objects.bulk_create(rows, batch_size=1000)
+
+
+def _parents_first(parents):
+    """Order member ids so that parents within ``parents`` come before their children."""
+    pending = {member_id: 0 for member_id in parents}
+    children = defaultdict(list)
+    for member_id, pair in parents.items():
+        for parent_id in set(pair) - {None}:
+            if parent_id in pending:
+                pending[member_id] += 1
+                children[parent_id].append(member_id)
+
+    queue = deque(member_id for member_id, count in pending.items() if count == 0)
+    ordered = []
+    while queue:
+        member_id = queue.popleft()
+        ordered.append(member_id)
+        for child_id in children[member_id]:
+            pending[child_id] -= 1
+            if pending[child_id] == 0:
+                queue.append(child_id)
+
+    # Members caught in a parent cycle are appended as-is rather than looping forever
+    seen = set(ordered)
+    ordered.extend(member_id for member_id in parents if member_id not in seen)
+    return ordered
+
+
+def rebuild_ancestry(user_id=None):
+    """
+    Rebuild the closure table with set-based SQL, one statement per generation.
+
+    With ``user_id`` only that user's members are rebuilt, which relies on parents
+    always belonging to the same user as their children. Returns the number of
+    rows written.
+    """
+    ancestry_table = connection.ops.quote_name(FamilyMemberAncestry._meta.db_table)
+    member_table = connection.ops.quote_name(FamilyMember._meta.db_table)
+    user_clause, user_params = ("AND user_id = %s", [user_id]) if user_id is not None else ("", [])
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        if user_id is None:
+            cursor.execute(f"DELETE FROM {ancestry_table}")
+        else:
+            cursor.execute(f"""
+                DELETE FROM {ancestry_table}
+                WHERE descendant_id IN (SELECT id FROM {member_table} WHERE user_id = %s)
+            """, [user_id])
+        cursor.execute(f"""
+            INSERT INTO {ancestry_table} (ancestor_id, descendant_id, depth)
+            SELECT mother_id, id, 1 FROM {member_table}
+            WHERE mother_id IS NOT NULL AND mother_id <> id {user_clause}
+            UNION
+            SELECT father_id, id, 1 FROM {member_table}
+            WHERE father_id IS NOT NULL AND father_id <> id {user_clause}
+        """, user_params * 2)
+        inserted, depth = cursor.rowcount, 1
+        while inserted > 0:
+            total += inserted
+            cursor.execute(f"""
+                INSERT INTO {ancestry_table} (ancestor_id, descendant_id, depth)
+                SELECT DISTINCT link.ancestor_id, child.id, %s
+                FROM {ancestry_table} link
+                JOIN {member_table} child
+                    ON (child.mother_id = link.descendant_id OR child.father_id = link.descendant_id)
+                WHERE link.depth = %s
+                    AND child.id <> link.ancestor_id
+                    {user_clause.replace('user_id', 'child.user_id')}
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {ancestry_table} known
+                        WHERE known.ancestor_id = link.ancestor_id AND known.descendant_id = child.id
+                    )
+            """, [depth + 1, depth, *user_params])
+            inserted, depth = cursor.rowcount, depth + 1
+    return total
+
+
+def is_ancestor(ancestor_id, descendant_id):
+    return FamilyMemberAncestry.objects.filter(ancestor_id=ancestor_id, descendant_id=descendant_id).exists()
+
+
+def common_ancestors(first_id, second_id):
+    """Return a mapping of shared ancestor id -> (depth from first, depth from second)."""
+    first = dict(
+        FamilyMemberAncestry.objects.filter(descendant_id=first_id).values_list('ancestor_id', 'depth')
+    )
+    return {
+        ancestor_id: (first[ancestor_id], depth)
+        for ancestor_id, depth in FamilyMemberAncestry.objects.filter(
+            descendant_id=second_id, ancestor_id__in=first
+        ).values_list('ancestor_id', 'depth')
+    }
@@ -0,0 +1,266 @@
+"""Bulk creation and update of family members and events in one transaction."""
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .ancestry import update_ancestry
+from .caching import bump_revision, invalidate_member_data
+from .duplicates import check_new_members
+from .models import Event, FamilyMember
+from .names import set_name_keys
+from .places import normalize_name, resolve_chiefdoms, resolve_locations, resolve_villages
+from .serializers import BulkEventSerializer, BulkFamilyMemberSerializer
+
+MAX_BULK_MEMBERS = 1000
+MAX_BULK_EVENTS = 5000
+BULK_BATCH_SIZE = 500
+
+MEMBER_FIELDS = ['first_name', 'last_name', 'gender', 'date_of_birth', 'date_of_death', 'history']
+
+
+def _village_chiefdom(row):
+    """Normalized chiefdom name for a row's village, defaulting to its chiefdom of origin."""
+    return normalize_name(row['village_of_origin'].get('chiefdom')) or normalize_name(row.get('chiefdom_of_origin'))
+
+
+class BulkMemberWriter:
+    """
+    Create and update many of a user's family members at once.
+
+    Every row is validated before anything is written, and errors are reported as
+    a list aligned with the rows, as for ``many=True`` serializers; if any row
+    fails, nothing is saved. Parents and spouses may be
+    given as existing member ids or as the ``temp_id`` of a row being created in the
+    same batch, including rows that come later in the payload.
+    """
+
+    def __init__(self, user, batch_size=BULK_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+
+    def run(self, rows):
+        """Validate and write ``rows``; returns one result per row in payload order."""
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError({"members": ["Expected a non-empty list of family members."]})
+        if len(rows) > MAX_BULK_MEMBERS:
+            raise ValidationError({"members": [f"At most {MAX_BULK_MEMBERS} family members per request."]})
+
+        data, errors = [], {}
+        for index, row in enumerate(rows):
+            serializer = BulkFamilyMemberSerializer(data=row)
+            if serializer.is_valid():
+                data.append(serializer.validated_data)
+            else:
+                data.append({})
+                errors[index] = serializer.errors
+        existing = self._check_references(data, errors)
+        if errors:
+            raise ValidationError({"members": [errors.get(index, {}) for index in range(len(rows))]})
+
+        with transaction.atomic():
+            places = self._resolve_places(data)
+            results = self._write(data, existing, places)
+            check_new_members(result["id"] for result in results if result["created"])
+        invalidate_member_data(self.user.id)
+        return results
+
+    def _check_references(self, data, errors):
+        """Record reference errors per row; returns the user's referenced members by id."""
+        temp_ids = {}
+        for index, row in enumerate(data):
+            if 'temp_id' in row:
+                if row['temp_id'] in temp_ids:
+                    errors.setdefault(index, {})['temp_id'] = ["Duplicate temp id in this batch."]
+                temp_ids.setdefault(row['temp_id'], index)
+
+        referenced_ids = {
+            reference
+            for row in data
+            for reference in [row.get('id'), row.get('mother'), row.get('father'), *row.get('spouses', [])]
+            if isinstance(reference, int)
+        }
+        existing = FamilyMember.objects.filter(user=self.user, id__in=referenced_ids).in_bulk()
+
+        for index, row in enumerate(data):
+            row_errors = {}
+            if 'id' in row and row['id'] not in existing:
+                row_errors['id'] = [f"Unknown family member id {row['id']}."]
+            own = row.get('id', row.get('temp_id'))
+            for field in ('mother', 'father', 'spouses'):
+                references = row.get(field) if field == 'spouses' else [row.get(field)]
+                for reference in references or []:
+                    if reference is None:
+                        continue
+                    if own is not None and reference == own:
+                        row_errors.setdefault(field, []).append("A family member cannot reference themselves.")
+                    elif isinstance(reference, int) and reference not in existing:
+                        row_errors.setdefault(field, []).append(f"Unknown family member id {reference}.")
+                    elif isinstance(reference, str) and reference not in temp_ids:
+                        row_errors.setdefault(field, []).append(f"Unknown temp id {reference!r}.")
+            village = row.get('village_of_origin')
+            if village and not _village_chiefdom(row):
+                row_errors['village_of_origin'] = ["Chiefdom is required to set village_of_origin."]
+            if row_errors:
+                errors.setdefault(index, {}).update(row_errors)
+        return existing
+
+    def _resolve_places(self, data):
+        """Resolve every place name in the batch with one lookup per table."""
+        chiefdom_names = []
+        for row in data:
+            chiefdom_names.append(row.get('chiefdom_of_origin'))
+            chiefdom_names.append((row.get('village_of_origin') or {}).get('chiefdom'))
+        chiefdoms = resolve_chiefdoms(chiefdom_names)
+        villages = resolve_villages(
+            (row['village_of_origin']['name'], chiefdoms[_village_chiefdom(row)])
+            for row in data
+            if row.get('village_of_origin')
+        )
+        locations = resolve_locations(row.get('current_location') for row in data)
+        return chiefdoms, villages, locations
+
+    def _apply_fields(self, member, row, places):
+        """Copy the fields present in ``row`` onto ``member``; returns the field names set."""
+        chiefdoms, villages, locations = places
+        fields = [field for field in MEMBER_FIELDS if field in row]
+        for field in fields:
+            setattr(member, field, row[field])
+        if 'first_name' in row or 'last_name' in row:
+            set_name_keys(member)
+            fields.extend(['first_name_key', 'last_name_key'])
+        if 'chiefdom_of_origin' in row:
+            member.chiefdom_of_origin_id = chiefdoms.get(normalize_name(row['chiefdom_of_origin']))
+            fields.append('chiefdom_of_origin')
+        if 'village_of_origin' in row:
+            village = row['village_of_origin']
+            member.village_of_origin_id = village and villages.get((
+                normalize_name(village['name']), chiefdoms[_village_chiefdom(row)],
+            ))
+            fields.append('village_of_origin')
+        if 'current_location' in row:
+            member.current_location_id = locations.get(normalize_name(row['current_location']))
+            fields.append('current_location')
+        for field in ('mother', 'father'):
+            if isinstance(row.get(field), int) or (field in row and row[field] is None):
+                setattr(member, f'{field}_id', row[field])
+                fields.append(field)
+        return fields
+
+    def _write(self, data, existing, places):
+        created, updated, update_fields = {}, {}, set()
+        for index, row in enumerate(data):
+            if 'id' in row:
+                member = existing[row['id']]
+                update_fields.update(self._apply_fields(member, row, places))
+                updated[index] = member
+            else:
+                member = FamilyMember(user=self.user)
+                self._apply_fields(member, row, places)
+                created[index] = member
+        FamilyMember.objects.bulk_create(created.values(), batch_size=self.batch_size)
+
+        # Parents given as temp ids can only be linked once their rows have ids
+        member_ids = {row['temp_id']: created[index].id for index, row in enumerate(data) if 'temp_id' in row}
+        forward_linked = {}
+        for index, row in enumerate(data):
+            member = created.get(index) or updated[index]
+            for field in ('mother', 'father'):
+                if isinstance(row.get(field), str):
+                    setattr(member, f'{field}_id', member_ids[row[field]])
+                    forward_linked[index] = member
+                    update_fields.add(field)
+        if update_fields:
+            FamilyMember.objects.bulk_update(
+                {member.id: member for member in [*updated.values(), *forward_linked.values()]}.values(),
+                sorted(update_fields),
+                batch_size=self.batch_size,
+            )
+
+        self._write_spouses(data, created, updated, member_ids)
+        update_ancestry(
+            [member.id for member in created.values()]
+            + [updated[index].id for index, row in enumerate(data)
+               if index in updated and ('mother' in row or 'father' in row)]
+        )
+        return [
+            {
+                "index": index,
+                "id": (created.get(index) or updated[index]).id,
+                "temp_id": row.get('temp_id'),
+                "created": index in created,
+            }
+            for index, row in enumerate(data)
+        ]
+
+    def _write_spouses(self, data, created, updated, member_ids):
+        """Replace spouses of rows that list them, writing both directions of each link."""
+        through = FamilyMember.spouses.through
+        replaced, links = [], set()
+        for index, row in enumerate(data):
+            if 'spouses' not in row:
+                continue
+            member_id = (created.get(index) or updated[index]).id
+            if index in updated:
+                replaced.append(member_id)
+            for spouse in row['spouses']:
+                spouse_id = member_ids[spouse] if isinstance(spouse, str) else spouse
+                links.update([(member_id, spouse_id), (spouse_id, member_id)])
+        if replaced:
+            through.objects.filter(from_familymember_id__in=replaced).delete()
+            through.objects.filter(to_familymember_id__in=replaced).delete()
+        through.objects.bulk_create(
+            [through(from_familymember_id=first, to_familymember_id=second) for first, second in links],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+
+class BulkEventWriter:
+    """
+    Create many events for a user's family members at once.
+
+    Rows are validated like those of :class:`BulkMemberWriter`, with errors
+    aligned with the rows and nothing saved if any row fails. Ownership of every
+    ``family_member`` is checked with a single query for the whole batch.
+    """
+
+    def __init__(self, user, batch_size=BULK_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+
+    def run(self, rows):
+        """Validate and write ``rows``; returns ``{"index", "id"}`` per row in payload order."""
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError({"events": ["Expected a non-empty list of events."]})
+        if len(rows) > MAX_BULK_EVENTS:
+            raise ValidationError({"events": [f"At most {MAX_BULK_EVENTS} events per request."]})
+
+        data, errors = [], {}
+        for index, row in enumerate(rows):
+            serializer = BulkEventSerializer(data=row)
+            if serializer.is_valid():
+                data.append(serializer.validated_data)
+            else:
+                data.append({})
+                errors[index] = serializer.errors
+        member_ids = {row['family_member'] for row in data if row}
+        owned = set(FamilyMember.objects.filter(user=self.user, id__in=member_ids).values_list('id', flat=True))
+        for index, row in enumerate(data):
+            if row and row['family_member'] not in owned:
+                errors[index] = {"family_member": [f"Unknown family member id {row['family_member']}."]}
+        if errors:
+            raise ValidationError({"events": [errors.get(index, {}) for index in range(len(rows))]})
+
+        with transaction.atomic():
+            events = Event.objects.bulk_create(
+                [
+                    Event(
+                        family_member_id=row['family_member'], event_type=row['event_type'], date=row['date'],
+                        description=row['description'],
+                    )
+                    for row in data
+                ],
+                batch_size=self.batch_size,
+            )
+        # bulk_create sends no post_save, which is what bumps the revision for single events
+        bump_revision(self.user.id)
+        return [{"index": index, "id": event.id} for index, event in enumerate(events)]
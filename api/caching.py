@@ -0,0 +1,341 @@
+"""Per-user response caching keyed by a revision counter that writes bump."""
+import functools
+import hashlib
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .graph import graph_cache
+from .search import name_index_cache
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 15)
+RESPONSE_CACHE_STALE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_STALE_TIMEOUT', 60 * 5)
+RESPONSE_CACHE_LOCAL_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_LOCAL_TIMEOUT', 30)
+# Response headers that are stored and replayed along with the body
+CACHED_HEADERS = ('X-Total-Count',)
+
+# The process-local cache is L1 and 'shared' is L2; 'coordination' holds revisions and locks,
+# which need an atomic add() and must not be culled
+local_cache = caches['default']
+shared_cache = caches['shared' if 'shared' in settings.CACHES else 'default']
+coordination_cache = caches['coordination'] if 'coordination' in settings.CACHES else shared_cache
+
+
+class TieredCache:
+    """
+    A process-local L1 cache in front of a shared L2, with request coalescing.
+
+    Entries are stored with the time they stop being fresh and are kept in L2 for
+    ``stale_timeout`` seconds longer. A stale entry is served while one caller
+    rebuilds it (stale-while-revalidate); a missing entry is built by one caller
+    while the others wait for it to appear (single flight). Threads coalesce per
+    key, processes on an ``add()``-based lock in ``locks``, which defaults to L2
+    and should be a backend whose ``add()`` is atomic.
+    """
+    def __init__(self, local, shared, locks=None, local_timeout=RESPONSE_CACHE_LOCAL_TIMEOUT, lock_timeout=30,
+                 wait_timeout=10, poll_interval=0.05):
+        self.local = local
+        self.shared = shared
+        self.locks = locks or shared
+        self.local_timeout = local_timeout
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        # Key -> event set when this process's build of it finishes
+        self._building = {}
+        self._building_lock = threading.Lock()
+
+    def get_or_build(self, key, build, timeout, stale_timeout=RESPONSE_CACHE_STALE_TIMEOUT):
+        """
+        Return ``(value, state)`` for ``key``, calling ``build()`` when needed.
+
+        ``state`` is 'HIT', 'STALE' or 'MISS'. A ``build()`` result of None is
+        returned but not stored.
+        """
+        entry = self._get(key)
+        if entry is not None and entry[1] > time.time():
+            return entry[0], 'HIT'
+        if entry is not None:
+            token = self._acquire(key)
+            if token is None:
+                return entry[0], 'STALE'
+            return self._build(key, build, timeout, stale_timeout, token), 'MISS'
+
+        with self._building_lock:
+            done = self._building.get(key)
+            if done is None:
+                done = self._building[key] = threading.Event()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            # Another thread is on it; no lock is held while waiting
+            done.wait(self.wait_timeout)
+            entry = self._get(key)
+            if entry is not None:
+                return entry[0], 'HIT'
+            return self._build(key, build, timeout, stale_timeout, self._acquire(key)), 'MISS'
+
+        try:
+            entry = self._get(key)
+            if entry is not None:
+                return entry[0], 'HIT'
+            token = self._acquire(key)
+            if token is None:
+                deadline = time.monotonic() + self.wait_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(self.poll_interval)
+                    entry = self._get(key)
+                    if entry is not None:
+                        return entry[0], 'HIT'
+            return self._build(key, build, timeout, stale_timeout, token), 'MISS'
+        finally:
+            with self._building_lock:
+                del self._building[key]
+            done.set()
+
+    def _get(self, key):
+        entry = self.local.get(key)
+        if entry is None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.local.set(key, entry, self.local_timeout)
+        return entry
+
+    def _acquire(self, key):
+        token = uuid.uuid4().hex
+        return token if self.locks.add(f'{key}:lock', token, self.lock_timeout) else None
+
+    def _build(self, key, build, timeout, stale_timeout, token):
+        try:
+            value = build()
+            if value is not None:
+                entry = (value, time.time() + timeout)
+                self.shared.set(key, entry, timeout + stale_timeout)
+                self.local.set(key, entry, min(self.local_timeout, timeout))
+            return value
+        finally:
+            if token is not None and self.locks.get(f'{key}:lock') == token:
+                self.locks.delete(f'{key}:lock')
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not self.local:
+            self.shared.clear()
+
+
+response_cache = TieredCache(local_cache, shared_cache, coordination_cache)
+cached_views = set()
+
+
+# Places are shared by every user, so their revision is global
+PLACES = 'places'
+
+
+def _revision_key(scope):
+    return f'graph-revision:{scope}'
+
+
+def _modified_key(scope):
+    return f'graph-modified:{scope}'
+
+
+def get_revision(scope):
+    """
+    The current revision of ``scope``: a user id for that user's family data,
+    or :data:`PLACES` for chiefdoms, villages and locations.
+
+    A missing counter starts from the current time in milliseconds rather than 1,
+    so an evicted counter can never come back at a revision older entries were
+    stored under.
+    """
+    key = _revision_key(scope)
+    revision = coordination_cache.get(key)
+    if revision is None:
+        coordination_cache.add(key, int(time.time() * 1000), timeout=None)
+        revision = coordination_cache.get(key)
+    return revision
+
+
+def _bump_revision(scope):
+    # incr() is a read and a write outside Redis, but a lost increment is harmless:
+    # both writers have committed before either bump, so the revision still moves past both
+    try:
+        coordination_cache.incr(_revision_key(scope))
+    except ValueError:
+        get_revision(scope)
+    coordination_cache.set(_modified_key(scope), time.time(), timeout=None)
+
+
+def bump_revision(scope):
+    """
+    Move ``scope`` to a new revision, orphaning every response cached for the old one.
+
+    Takes effect when the current transaction commits; bumping earlier would let a
+    concurrent request cache data from before the write under the new revision.
+    """
+    transaction.on_commit(functools.partial(_bump_revision, scope))
+
+
+def get_last_modified(scope):
+    """When ``scope``'s revision last moved, as a timestamp; now if that is no longer known."""
+    key = _modified_key(scope)
+    modified = coordination_cache.get(key)
+    if modified is None:
+        coordination_cache.add(key, time.time(), timeout=None)
+        modified = coordination_cache.get(key)
+    return modified
+
+
+def get_revisions(*scopes):
+    """``{scope: (revision, last modified)}`` for each of ``scopes``, read in one round trip."""
+    keys = {scope: (_revision_key(scope), _modified_key(scope)) for scope in scopes}
+    values = coordination_cache.get_many([key for pair in keys.values() for key in pair])
+    return {
+        scope: (
+            values[revision_key] if revision_key in values else get_revision(scope),
+            values[modified_key] if modified_key in values else get_last_modified(scope),
+        )
+        for scope, (revision_key, modified_key) in keys.items()
+    }
+
+
+def _invalidate_member_data(user_id):
+    _bump_revision(user_id)
+    graph_cache.invalidate(user_id)
+    name_index_cache.invalidate(user_id)
+
+
+def invalidate_member_data(user_id):
+    """Drop everything cached from ``user_id``'s family data once the current transaction commits."""
+    transaction.on_commit(functools.partial(_invalidate_member_data, user_id))
+
+
+def _count(name, outcome):
+    # Counted per process in L1; the file backend cannot increment atomically
+    key = f'response-cache:{outcome}:{name}'
+    if not local_cache.add(key, 1, timeout=None):
+        try:
+            local_cache.incr(key)
+        except ValueError:
+            local_cache.add(key, 1, timeout=None)
+
+
+def cache_stats():
+    """
+    Per cached view in this process since its cache was last cleared: hits, stale
+    hits, misses and 304s, which count as hits in the ratio.
+    """
+    stats = {}
+    for name in sorted(cached_views):
+        counts = {
+            outcome: local_cache.get(f'response-cache:{outcome}:{name}', 0)
+            for outcome in ('hits', 'stale', 'misses', 'not_modified')
+        }
+        served = counts['hits'] + counts['stale'] + counts['not_modified']
+        total = served + counts['misses']
+        stats[name] = {**counts, "hit_ratio": served / total if total else None}
+    return stats
+
+
+def response_cache_key(name, request, revisions):
+    """The key of ``request``'s response to view ``name`` at ``revisions``, from :func:`get_revisions`."""
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    renderer = getattr(request, 'accepted_renderer', None)
+    revision = '.'.join(str(revision) for revision, _ in revisions.values())
+    return f'response:{name}:{request.user.id}:{revision}:{renderer and renderer.format}:{path}'
+
+
+def response_etag(key):
+    """A weak ETag for the response stored under ``key``; it changes whenever either revision does."""
+    return f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def response_last_modified(revisions):
+    """
+    When the data behind a response at ``revisions`` last changed, in whole seconds.
+
+    Rounded up, since HTTP dates have no fractions: rounding down would date the
+    response before the write it includes.
+    """
+    return math.ceil(max(modified for _, modified in revisions.values()))
+
+
+def _validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Clients must revalidate; the ETag makes that a cheap 304 when nothing changed
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cache_per_user(timeout=RESPONSE_CACHE_TIMEOUT, stale_timeout=RESPONSE_CACHE_STALE_TIMEOUT):
+    """
+    Cache successful GET responses of a view method per user and data revision.
+
+    Unlike ``cache_page``, which keys on the URL alone, the key includes the user,
+    their revision and the places revision, so a write made visible by
+    :func:`bump_revision` is never answered from an older entry. Entries go through :data:`response_cache`, so an
+    expired entry is served for ``stale_timeout`` more seconds while one request
+    rebuilds it. Responses carry ``X-Cache: HIT``, ``STALE`` or ``MISS``.
+
+    Responses also carry a weak ``ETag`` and a ``Last-Modified`` taken from the
+    user's and the places revisions, and a matching ``If-None-Match`` or
+    ``If-Modified-Since`` is answered with a 304 before the cache, the queryset or
+    the serializer is touched.
+    """
+    def decorator(view_method):
+        name = view_method.__qualname__
+        cached_views.add(name)
+
+        @functools.wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+                return view_method(view, request, *args, **kwargs)
+
+            revisions = get_revisions(request.user.id, PLACES)
+            key = response_cache_key(name, request, revisions)
+            etag = response_etag(key)
+            last_modified = response_last_modified(revisions)
+            conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if conditional is not None:
+                if conditional.status_code == 304:
+                    _count(name, 'not_modified')
+                return _validators(conditional, etag, last_modified)
+
+            built = []
+
+            def build():
+                response = view_method(view, request, *args, **kwargs)
+                built.append(response)
+                if response.status_code != 200:
+                    return None
+                response = view.finalize_response(request, response, *args, **kwargs)
+                response.render()
+                headers = [(header, response[header]) for header in CACHED_HEADERS if header in response]
+                return response.content, response['Content-Type'], headers
+
+            entry, state = response_cache.get_or_build(key, build, timeout, stale_timeout)
+            _count(name, {'HIT': 'hits', 'STALE': 'stale', 'MISS': 'misses'}[state])
+            if built:
+                # Built by this request: hand back the original response
+                response = built[0]
+            else:
+                content, content_type, headers = entry
+                response = HttpResponse(content, content_type=content_type)
+                for header, value in headers:
+                    response[header] = value
+            if response.status_code == 200:
+                response['X-Cache'] = state
+                _validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,211 @@
+"""Detection of family members that were probably entered more than once."""
+from collections import defaultdict, namedtuple
+from itertools import combinations, groupby
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import DuplicateCandidate, FamilyMember
+from .names import similarity
+
+DUPLICATE_THRESHOLD = 0.8
+# Blocks larger than this are skipped rather than compared pairwise
+MAX_BLOCK_SIZE = 500
+
+RECORD_FIELDS = [
+    'id', 'user_id', 'first_name', 'last_name', 'first_name_key', 'last_name_key', 'gender', 'date_of_birth',
+    'chiefdom_of_origin_id', 'village_of_origin_id', 'mother_id', 'father_id',
+]
+Record = namedtuple('Record', RECORD_FIELDS)
+
+# Relative weight of each signal in the score; signals unknown on either side are left out
+WEIGHTS = {
+    'first_name': 3.0,
+    'last_name': 1.0,
+    'date_of_birth': 2.0,
+    'mother': 2.0,
+    'father': 2.0,
+    'village': 1.0,
+}
+
+
+def blocking_keys(record):
+    """
+    Keys of the blocks ``record`` is compared within.
+
+    Every key starts with the phonetic surname; a pair is only scored if it shares
+    at least one full key, which keeps comparisons close to linear in practice.
+    """
+    if not record.last_name_key:
+        return []
+    keys = []
+    if record.date_of_birth:
+        keys.append((record.last_name_key, 'decade', record.date_of_birth.year // 10))
+    if record.chiefdom_of_origin_id:
+        keys.append((record.last_name_key, 'chiefdom', record.chiefdom_of_origin_id))
+    if record.first_name_key:
+        keys.append((record.last_name_key, 'first', record.first_name_key[:3]))
+    return keys
+
+
+def _name_similarity(first_key, second_key, first, second):
+    if first_key and first_key == second_key:
+        return 1.0
+    return similarity(first, second)
+
+
+def _date_similarity(first, second):
+    if first == second:
+        return 1.0
+    years = abs(first.year - second.year)
+    return 0.7 if years == 0 else 0.4 if years <= 2 else 0.0
+
+
+def score_pair(a, b):
+    """
+    Score how likely ``a`` and ``b`` are the same person, from 0 to 1.
+
+    Returns ``(score, evidence)``, or None when the pair cannot be one person
+    (different genders, or one is the other's parent).
+    """
+    if a.gender and b.gender and a.gender != b.gender:
+        return None
+    if a.id in (b.mother_id, b.father_id) or b.id in (a.mother_id, a.father_id):
+        return None
+
+    evidence = {
+        'first_name': _name_similarity(a.first_name_key, b.first_name_key, a.first_name, b.first_name),
+        'last_name': _name_similarity(a.last_name_key, b.last_name_key, a.last_name, b.last_name),
+    }
+    if a.date_of_birth and b.date_of_birth:
+        evidence['date_of_birth'] = _date_similarity(a.date_of_birth, b.date_of_birth)
+    for signal, first, second in (
+            ('mother', a.mother_id, b.mother_id),
+            ('father', a.father_id, b.father_id),
+            ('village', a.village_of_origin_id, b.village_of_origin_id),
+    ):
+        if first and second:
+            evidence[signal] = float(first == second)
+    score = sum(WEIGHTS[signal] * value for signal, value in evidence.items()) / sum(
+        WEIGHTS[signal] for signal in evidence
+    )
+    return score, {signal: round(value, 3) for signal, value in evidence.items()}
+
+
+def _pair(a, b):
+    return (a, b) if a.id < b.id else (b, a)
+
+
+def find_candidates(records, threshold=DUPLICATE_THRESHOLD, max_block_size=MAX_BLOCK_SIZE, stats=None,
+                    involving=None):
+    """
+    Yield ``(first, second, score, evidence)`` for likely duplicates among ``records``.
+
+    ``records`` must come grouped by user and phonetic surname, as from
+    :func:`iter_records`; only one surname group is held in memory at a time.
+    ``stats`` collects counts of compared pairs and skipped blocks when given.
+    With ``involving``, a set of member ids, only pairs including one of them are scored.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('pairs', 0)
+    stats.setdefault('skipped_blocks', 0)
+    for _, group in groupby(records, key=lambda record: (record.user_id, record.last_name_key)):
+        blocks = defaultdict(list)
+        for record in group:
+            for key in blocking_keys(record):
+                blocks[key].append(record)
+        seen = set()
+        for block in blocks.values():
+            if len(block) > max_block_size:
+                stats['skipped_blocks'] += 1
+                continue
+            for a, b in combinations(block, 2):
+                first, second = _pair(a, b)
+                if (first.id, second.id) in seen:
+                    continue
+                seen.add((first.id, second.id))
+                if involving is not None and first.id not in involving and second.id not in involving:
+                    continue
+                stats['pairs'] += 1
+                result = score_pair(first, second)
+                if result is not None and result[0] >= threshold:
+                    yield first, second, *result
+
+
+def iter_records(queryset):
+    """Stream members as Records, grouped by user and phonetic surname."""
+    rows = queryset.exclude(last_name_key='').order_by('user_id', 'last_name_key', 'id')
+    for row in rows.values_list(*RECORD_FIELDS).iterator(chunk_size=5000):
+        yield Record(*row)
+
+
+def save_candidates(candidates, batch_size=1000):
+    """
+    Store candidates for review; returns how many were offered.
+
+    Pairs already on file, including reviewed ones, are left untouched.
+    """
+    batch, total = [], 0
+    for first, second, score, evidence in candidates:
+        batch.append(DuplicateCandidate(first_id=first.id, second_id=second.id, score=score, evidence=evidence))
+        if len(batch) >= batch_size:
+            DuplicateCandidate.objects.bulk_create(batch, ignore_conflicts=True)
+            total, batch = total + len(batch), []
+    DuplicateCandidate.objects.bulk_create(batch, ignore_conflicts=True)
+    return total + len(batch)
+
+
+def find_duplicates_of(member, threshold=DUPLICATE_THRESHOLD):
+    """
+    Score one member against the members sharing any of its blocking keys.
+
+    Used for the incremental check after a member is created. Returns the
+    candidate tuples, best first.
+    """
+    record = next(iter_records(FamilyMember.objects.filter(id=member.id)), None)
+    keys = blocking_keys(record) if record else []
+    if not keys:
+        return []
+    matches = Q()
+    for _, kind, value in keys:
+        if kind == 'decade':
+            matches |= Q(date_of_birth__year__gte=value * 10, date_of_birth__year__lt=value * 10 + 10)
+        elif kind == 'chiefdom':
+            matches |= Q(chiefdom_of_origin_id=value)
+        else:
+            matches |= Q(first_name_key__startswith=value)
+    others = FamilyMember.objects.filter(matches, user_id=record.user_id, last_name_key=record.last_name_key)
+    candidates = []
+    for other in iter_records(others.exclude(id=record.id)):
+        first, second = _pair(record, other)
+        result = score_pair(first, second)
+        if result is not None and result[0] >= threshold:
+            candidates.append((first, second, *result))
+    return sorted(candidates, key=lambda candidate: -candidate[2])
+
+
+def find_duplicates_among(member_ids, threshold=DUPLICATE_THRESHOLD):
+    """
+    Yield candidates pairing any of ``member_ids`` with a member of the same surname group.
+
+    The batch form of :func:`find_duplicates_of`: each surname group the members
+    fall into is streamed once, however many of them it holds.
+    """
+    member_ids = set(member_ids)
+    new = FamilyMember.objects.filter(id__in=member_ids)
+    groups = FamilyMember.objects.filter(
+        user_id__in=new.values('user_id'), last_name_key__in=new.values('last_name_key')
+    )
+    return find_candidates(iter_records(groups), threshold, involving=member_ids)
+
+
+def check_new_members(member_ids):
+    """
+    Offer duplicate candidates for ``member_ids`` once the current transaction commits.
+
+    For writers using ``bulk_create``, which sends no ``post_save`` and so skips
+    the per-member check in :mod:`api.signals`.
+    """
+    member_ids = list(member_ids)
+    if member_ids:
+        transaction.on_commit(lambda: save_candidates(find_duplicates_among(member_ids)))
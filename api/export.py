@@ -0,0 +1,83 @@
+"""Streaming exports of a user's family members."""
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import FamilyMember
+
+EXPORT_CHUNK_SIZE = 2000
+
+NDJSON_FIELDS = (
+    'id', 'first_name', 'last_name', 'gender', 'date_of_birth', 'date_of_death', 'history',
+    'mother', 'father', 'chiefdom_of_origin', 'village_of_origin', 'current_location',
+)
+
+
+def iter_generations(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield lists of member ids, one per generation, parents always before children.
+
+    Only ``(id, mother_id, father_id)`` tuples are read, through a server-side cursor.
+    Parents outside ``queryset`` are ignored; members caught in a parent cycle are
+    yielded last.
+    """
+    pending = {}
+    children = defaultdict(list)
+    links = []
+    for member_id, mother_id, father_id in queryset.values_list(
+            'id', 'mother_id', 'father_id'
+    ).order_by('id').iterator(chunk_size=chunk_size):
+        pending[member_id] = 0
+        for parent_id in {mother_id, father_id} - {None}:
+            links.append((parent_id, member_id))
+
+    for parent_id, member_id in links:
+        if parent_id in pending and parent_id != member_id:
+            pending[member_id] += 1
+            children[parent_id].append(member_id)
+    del links
+
+    generation = [member_id for member_id, count in pending.items() if count == 0]
+    while generation:
+        yield generation
+        for member_id in generation:
+            del pending[member_id]
+        next_generation = []
+        for parent_id in generation:
+            for child_id in children.pop(parent_id, ()):
+                pending[child_id] -= 1
+                if pending[child_id] == 0:
+                    next_generation.append(child_id)
+        generation = sorted(next_generation)
+
+    if pending:
+        yield sorted(pending)
+
+
+def iter_member_batches(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield ``(generation, rows)`` batches of member values in topological order."""
+    for generation, member_ids in enumerate(iter_generations(queryset, chunk_size)):
+        for start in range(0, len(member_ids), chunk_size):
+            batch = member_ids[start:start + chunk_size]
+            rows = {
+                row['id']: row
+                for row in queryset.filter(id__in=batch).values(*fields).iterator(chunk_size=chunk_size)
+            }
+            spouses = defaultdict(list)
+            for member_id, spouse_id in FamilyMember.spouses.through.objects.filter(
+                    from_familymember_id__in=batch
+            ).values_list('from_familymember_id', 'to_familymember_id').order_by('to_familymember_id'):
+                spouses[member_id].append(spouse_id)
+            for member_id in batch:
+                rows[member_id]['spouses'] = spouses[member_id]
+            yield generation, [rows[member_id] for member_id in batch]
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one JSON document per member, one batch of lines at a time."""
+    for generation, rows in iter_member_batches(queryset, NDJSON_FIELDS, chunk_size):
+        yield ''.join(
+            json.dumps({**row, 'generation': generation}, cls=DjangoJSONEncoder) + '\n'
+            for row in rows
+        )
@@ -0,0 +1,378 @@
+"""Streaming GEDCOM import and export of family members."""
+import datetime
+import re
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+
+from .ancestry import rebuild_ancestry
+from .caching import invalidate_member_data
+from .duplicates import check_new_members
+from .models import FamilyMember, GenderChoices
+from .names import set_name_keys
+
+GEDCOM_BATCH_SIZE = 1000
+
+LINE_RE = re.compile(r'^\s*(\d+)\s+(?:(@[^@]+@)\s+)?(\w+)(?:\s(.*))?$')
+NAME_RE = re.compile(r'^(?P<given>[^/]*)(?:/(?P<surname>[^/]*)/?)?')
+
+MONTH_NAMES = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+MONTHS = {month: number for number, month in enumerate(MONTH_NAMES, start=1)}
+SEXES = {'M': GenderChoices.MALE, 'F': GenderChoices.FEMALE}
+
+
+class GedcomRecord:
+    """A GEDCOM line with its nested sub-lines."""
+    __slots__ = ('xref', 'tag', 'value', 'children')
+
+    def __init__(self, xref, tag, value):
+        self.xref = xref
+        self.tag = tag
+        self.value = value
+        self.children = []
+
+    def first(self, tag):
+        return next((child for child in self.children if child.tag == tag), None)
+
+    def first_value(self, *tags):
+        """Value of the first nested line found by following ``tags``."""
+        record = self
+        for tag in tags:
+            record = record.first(tag)
+            if record is None:
+                return None
+        return record.value
+
+    def text(self):
+        """The value joined with its CONT/CONC continuation lines."""
+        text = self.value or ''
+        for child in self.children:
+            if child.tag == 'CONT':
+                text += '\n' + (child.value or '')
+            elif child.tag == 'CONC':
+                text += child.value or ''
+        return text
+
+
+def iter_records(lines):
+    """Yield level 0 records one at a time from an iterable of GEDCOM lines."""
+    stack = []
+    for line in lines:
+        match = LINE_RE.match(line.rstrip('\r\n'))
+        if not match:
+            continue
+        level, xref, tag, value = match.groups()
+        record = GedcomRecord(xref, tag.upper(), value)
+        level = int(level)
+        if level == 0:
+            if stack:
+                yield stack[0]
+            stack = [record]
+            continue
+        if not stack:
+            continue
+        del stack[level:]
+        stack[-1].children.append(record)
+        stack.append(record)
+    if stack:
+        yield stack[0]
+
+
+def parse_date(value):
+    """Parse an exact GEDCOM date such as ``12 JAN 1950``; anything vaguer is None."""
+    parts = (value or '').upper().split()
+    if len(parts) != 3 or parts[1] not in MONTHS:
+        return None
+    try:
+        return datetime.date(int(parts[2]), MONTHS[parts[1]], int(parts[0]))
+    except ValueError:
+        return None
+
+
+def member_from_record(record, user):
+    name = record.first('NAME')
+    given, surname = None, None
+    if name is not None:
+        match = NAME_RE.match(name.value or '')
+        given = name.first_value('GIVN') or match.group('given').strip() or None
+        surname = name.first_value('SURN') or (match.group('surname') or '').strip() or None
+    # Inline notes only; pointers to shared NOTE records are skipped
+    notes = [
+        note.text() for note in record.children
+        if note.tag == 'NOTE' and not (note.value or '').startswith('@')
+    ]
+    return set_name_keys(FamilyMember(
+        first_name=given[:50] if given else None,
+        last_name=surname[:50] if surname else None,
+        gender=SEXES.get((record.first_value('SEX') or '').strip().upper()),
+        date_of_birth=parse_date(record.first_value('BIRT', 'DATE')),
+        date_of_death=parse_date(record.first_value('DEAT', 'DATE')),
+        history='\n\n'.join(notes),
+        user=user,
+    ))
+
+
+class GedcomImporter:
+    """
+    Import a GEDCOM file for one user in two streaming passes.
+
+    Pass one creates FamilyMember rows with ``bulk_create`` in batches while keeping
+    only an xref -> id map in memory. Pass two re-reads the file for FAM records and
+    links parents with ``bulk_update`` and spouses with bulk inserts into the
+    through table. ``progress`` is called as ``progress(stage, count)`` after every
+    batch.
+    """
+
+    def __init__(self, user, batch_size=GEDCOM_BATCH_SIZE, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress or (lambda stage, count: None)
+        self.member_ids = {}
+        self.families = 0
+
+    def run(self, stream):
+        """Import from a seekable binary or text stream; returns a summary dict."""
+        with transaction.atomic():
+            self._create_members(self._lines(stream))
+            self._link_families(self._lines(stream))
+            rebuild_ancestry(user_id=self.user.id)
+            check_new_members(self.member_ids.values())
+        invalidate_member_data(self.user.id)
+        return {"members": len(self.member_ids), "families": self.families}
+
+    def _lines(self, stream):
+        stream.seek(0)
+        for line in stream:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            yield line.lstrip('\ufeff')
+
+    def _create_members(self, lines):
+        batch, xrefs = [], []
+        for record in iter_records(lines):
+            if record.tag != 'INDI' or not record.xref:
+                continue
+            batch.append(member_from_record(record, self.user))
+            xrefs.append(record.xref)
+            if len(batch) >= self.batch_size:
+                self._flush_members(batch, xrefs)
+                batch, xrefs = [], []
+        self._flush_members(batch, xrefs)
+
+    def _flush_members(self, batch, xrefs):
+        if not batch:
+            return
+        FamilyMember.objects.bulk_create(batch)
+        self.member_ids.update(zip(xrefs, (member.id for member in batch)))
+        self.progress('members', len(self.member_ids))
+
+    def _link_families(self, lines):
+        children, spouse_links = {}, []
+        for record in iter_records(lines):
+            if record.tag != 'FAM':
+                continue
+            self.families += 1
+            father_id = self.member_ids.get(record.first_value('HUSB'))
+            mother_id = self.member_ids.get(record.first_value('WIFE'))
+            if father_id and mother_id:
+                spouse_links.append((father_id, mother_id))
+            for child in record.children:
+                child_id = self.member_ids.get(child.value) if child.tag == 'CHIL' else None
+                if child_id:
+                    children[child_id] = FamilyMember(id=child_id, mother_id=mother_id, father_id=father_id)
+            if len(children) + len(spouse_links) >= self.batch_size:
+                self._flush_families(children, spouse_links)
+                children, spouse_links = {}, []
+        self._flush_families(children, spouse_links)
+
+    def _flush_families(self, children, spouse_links):
+        FamilyMember.objects.bulk_update(children.values(), ['mother', 'father'], batch_size=self.batch_size)
+        through = FamilyMember.spouses.through
+        through.objects.bulk_create(
+            [
+                through(from_familymember_id=first, to_familymember_id=second)
+                for pair in spouse_links
+                for first, second in (pair, pair[::-1])
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        self.progress('families', self.families)
+
+
+# Export
+
+GEDCOM_HEADER = (
+    "0 HEAD\n"
+    "1 SOUR TIMELESS_TIES\n"
+    "2 NAME Timeless Ties\n"
+    "1 GEDC\n"
+    "2 VERS 5.5.1\n"
+    "2 FORM LINEAGE-LINKED\n"
+    "1 CHAR UTF-8\n"
+)
+# Keeps every line well under the 255 character limit of GEDCOM 5.5.1
+GEDCOM_TEXT_WIDTH = 200
+
+INDI_FIELDS = ('id', 'first_name', 'last_name', 'gender', 'date_of_birth', 'date_of_death', 'history',
+               'mother_id', 'father_id')
+
+
+def family_xref(father_id, mother_id):
+    """Family xrefs are derived from the parents, so INDI records can point at them."""
+    return f"@F{father_id or 0}_{mother_id or 0}@"
+
+
+def format_date(date):
+    return f"{date.day} {MONTH_NAMES[date.month - 1]} {date.year}"
+
+
+def _split_long_line(text):
+    """
+    Cut ``text`` into pieces of at most GEDCOM_TEXT_WIDTH characters for CONC lines.
+
+    Cuts are moved off spaces where possible, since some readers trim the ends of
+    continuation values.
+    """
+    chunks = []
+    while len(text) > GEDCOM_TEXT_WIDTH:
+        cut = GEDCOM_TEXT_WIDTH
+        while cut > 1 and ' ' in (text[cut - 1], text[cut]):
+            cut -= 1
+        if cut == 1:
+            cut = GEDCOM_TEXT_WIDTH
+        chunks.append(text[:cut])
+        text = text[cut:]
+    return chunks + [text]
+
+
+def text_lines(level, tag, text):
+    """Split text over CONT (new line) and CONC (long line) continuation lines."""
+    lines = []
+    for i, paragraph in enumerate((text or '').split('\n')):
+        for j, chunk in enumerate(_split_long_line(paragraph)):
+            line = f"{level} {tag}" if i == 0 and j == 0 else f"{level + 1} {'CONC' if j else 'CONT'}"
+            # Values are written as-is: trimming them would drop spaces from the text
+            lines.append(f"{line} {chunk}" if chunk else line)
+    return lines
+
+
+def _childless_couples(members):
+    """Spouse links of ``members`` that have no children together, grouped in SQL."""
+    through = FamilyMember.spouses.through
+    shared_children = FamilyMember.objects.filter(
+        Q(father_id=OuterRef('from_familymember_id'), mother_id=OuterRef('to_familymember_id'))
+        | Q(father_id=OuterRef('to_familymember_id'), mother_id=OuterRef('from_familymember_id'))
+    )
+    return through.objects.filter(from_familymember__in=members).exclude(Exists(shared_children))
+
+
+def _husband_and_wife(first_id, second_id, first_gender, second_gender):
+    if first_gender == GenderChoices.FEMALE and second_gender != GenderChoices.FEMALE:
+        return second_id, first_id
+    if second_gender == GenderChoices.FEMALE and first_gender != GenderChoices.FEMALE:
+        return first_id, second_id
+    return min(first_id, second_id), max(first_id, second_id)
+
+
+def _family_links(member_ids):
+    """Map each member id to the xrefs of the families it heads, for one INDI chunk."""
+    links = {member_id: set() for member_id in member_ids}
+    for father_id, mother_id in FamilyMember.objects.filter(
+            Q(father_id__in=member_ids) | Q(mother_id__in=member_ids)
+    ).values_list('father_id', 'mother_id').distinct():
+        for parent_id in (father_id, mother_id):
+            if parent_id in links:
+                links[parent_id].add(family_xref(father_id, mother_id))
+    for couple in _childless_couples(FamilyMember.objects.filter(id__in=member_ids)).values_list(
+            'from_familymember_id', 'to_familymember_id', 'from_familymember__gender', 'to_familymember__gender'
+    ):
+        links[couple[0]].add(family_xref(*_husband_and_wife(*couple)))
+    return links
+
+
+def _indi_lines(member, families):
+    lines = [f"0 @I{member['id']}@ INDI"]
+    first_name, last_name = member['first_name'] or '', member['last_name'] or ''
+    lines.append(f"1 NAME {f'{first_name} /{last_name}/'.strip()}")
+    if first_name:
+        lines.append(f"2 GIVN {first_name}")
+    if last_name:
+        lines.append(f"2 SURN {last_name}")
+    if member['gender']:
+        lines.append(f"1 SEX {member['gender'] if member['gender'] in SEXES else 'U'}")
+    for tag, date in (('BIRT', member['date_of_birth']), ('DEAT', member['date_of_death'])):
+        if date:
+            lines.extend([f"1 {tag}", f"2 DATE {format_date(date)}"])
+    if member['history']:
+        lines.extend(text_lines(1, 'NOTE', member['history']))
+    if member['mother_id'] or member['father_id']:
+        lines.append(f"1 FAMC {family_xref(member['father_id'], member['mother_id'])}")
+    lines.extend(f"1 FAMS {xref}" for xref in sorted(families))
+    return lines
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_gedcom(members, chunk_size=GEDCOM_BATCH_SIZE):
+    """
+    Yield a GEDCOM 5.5.1 document for a family member queryset, a chunk at a time.
+
+    INDI records are read through a server-side cursor. Parent-child families come
+    from rows ordered by (father, mother), so each FAM record is complete once its
+    group ends; childless couples are found with an anti-join on shared children.
+    """
+    yield GEDCOM_HEADER
+
+    rows = members.order_by('id').values(*INDI_FIELDS).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(rows, chunk_size):
+        links = _family_links([member['id'] for member in chunk])
+        yield ''.join(
+            line + '\n' for member in chunk for line in _indi_lines(member, links[member['id']])
+        )
+
+    children = members.filter(Q(father__isnull=False) | Q(mother__isnull=False)).order_by(
+        'father_id', 'mother_id', 'id'
+    ).values_list('father_id', 'mother_id', 'id').iterator(chunk_size=chunk_size)
+    families = (
+        (parents, [child_id for _, _, child_id in rows])
+        for parents, rows in groupby(children, key=lambda row: row[:2])
+    )
+    for chunk in _chunks(families, chunk_size):
+        lines = []
+        for (father_id, mother_id), child_ids in chunk:
+            lines.append(f"0 {family_xref(father_id, mother_id)} FAM")
+            if father_id:
+                lines.append(f"1 HUSB @I{father_id}@")
+            if mother_id:
+                lines.append(f"1 WIFE @I{mother_id}@")
+            lines.extend(f"1 CHIL @I{child_id}@" for child_id in child_ids)
+        yield ''.join(line + '\n' for line in lines)
+
+    couples = _childless_couples(members).filter(
+        from_familymember_id__lt=F('to_familymember_id')
+    ).order_by('from_familymember_id', 'to_familymember_id').values_list(
+        'from_familymember_id', 'to_familymember_id', 'from_familymember__gender', 'to_familymember__gender'
+    ).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(couples, chunk_size):
+        lines = []
+        for couple in chunk:
+            husband_id, wife_id = _husband_and_wife(*couple)
+            lines.extend([
+                f"0 {family_xref(husband_id, wife_id)} FAM",
+                f"1 HUSB @I{husband_id}@",
+                f"1 WIFE @I{wife_id}@",
+            ])
+        yield ''.join(line + '\n' for line in lines)
+
+    yield "0 TRLR\n"
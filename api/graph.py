@@ -0,0 +1,179 @@
+"""Compact in-memory representation of a user's genealogy graph."""
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import FamilyMember
+
+NO_PARENT = -1
+
+
+def _compressed_rows(row_count, pairs):
+    """Pack ``(row, value)`` pairs into CSR-style ``(offsets, values)`` arrays."""
+    counts = [0] * (row_count + 1)
+    for row, _ in pairs:
+        counts[row + 1] += 1
+    for row in range(row_count):
+        counts[row + 1] += counts[row]
+    offsets = array('l', counts)
+    values = array('l', [0] * len(pairs))
+    cursor = list(counts[:-1])
+    for row, value in pairs:
+        values[cursor[row]] = value
+        cursor[row] += 1
+    return offsets, values
+
+
+class FamilyGraph:
+    """
+    Array-backed graph of one user's family members.
+
+    Members are addressed by a dense index rather than by primary key. Parents are
+    stored as parallel arrays, children and spouses as compressed adjacency lists,
+    so traversals never touch model instances.
+    """
+
+    def __init__(self, member_ids, mothers, fathers, genders, spouse_pairs):
+        self.ids = array('q', member_ids)
+        self.index = {member_id: i for i, member_id in enumerate(self.ids)}
+        self.genders = genders
+        self.mothers = array('l', (self.index.get(mother_id, NO_PARENT) for mother_id in mothers))
+        self.fathers = array('l', (self.index.get(father_id, NO_PARENT) for father_id in fathers))
+
+        child_pairs = [
+            (parent, child)
+            for parents in (self.mothers, self.fathers)
+            for child, parent in enumerate(parents)
+            if parent != NO_PARENT
+        ]
+        child_pairs.sort()
+        self.child_offsets, self.child_values = _compressed_rows(len(self.ids), child_pairs)
+
+        spouse_pairs = sorted(
+            (self.index[first], self.index[second])
+            for first, second in spouse_pairs
+            if first in self.index and second in self.index
+        )
+        self.spouse_offsets, self.spouse_values = _compressed_rows(len(self.ids), spouse_pairs)
+
+    @classmethod
+    def load(cls, user_id):
+        """Build the graph for ``user_id`` from two flat queries."""
+        member_ids, mothers, fathers, genders = [], [], [], []
+        for member_id, mother_id, father_id, gender in FamilyMember.objects.filter(
+                user_id=user_id
+        ).order_by('id').values_list('id', 'mother_id', 'father_id', 'gender').iterator(chunk_size=5000):
+            member_ids.append(member_id)
+            mothers.append(mother_id)
+            fathers.append(father_id)
+            genders.append(gender or ' ')
+        spouse_pairs = FamilyMember.spouses.through.objects.filter(
+            from_familymember__user_id=user_id
+        ).values_list('from_familymember_id', 'to_familymember_id')
+        return cls(member_ids, mothers, fathers, ''.join(genders), list(spouse_pairs))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def parents(self, i):
+        return [parent for parent in (self.mothers[i], self.fathers[i]) if parent != NO_PARENT]
+
+    def children(self, i):
+        return self.child_values[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+    def spouses(self, i):
+        return self.spouse_values[self.spouse_offsets[i]:self.spouse_offsets[i + 1]]
+
+    def neighbours(self, i):
+        """Parents, then children, then spouses of member index ``i``."""
+        yield from self.parents(i)
+        yield from self.children(i)
+        yield from self.spouses(i)
+
+    def nbytes(self):
+        """Approximate memory held by the graph, used for cache accounting."""
+        arrays = (
+            self.ids, self.mothers, self.fathers,
+            self.child_offsets, self.child_values, self.spouse_offsets, self.spouse_values,
+        )
+        # A dict entry costs roughly 100 bytes including the boxed key and value
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.genders) + 100 * len(self.index)
+
+
+class FamilyGraphCache:
+    """
+    Process-local LRU cache of FamilyGraph objects, keyed by user id.
+
+    Entries are evicted least recently used first once their combined size passes
+    ``max_bytes``. Signals invalidate a user's entry when their members or spouse
+    links change; ``max_age`` bounds how long another process's writes can go unseen.
+    ``loader`` builds an entry for a user id and may be any per-user structure with
+    an ``nbytes()`` method.
+    """
+
+    def __init__(self, max_bytes, max_age, loader=None):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.loader = loader or FamilyGraph.load
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[1] < self.max_age:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+            generation = self._generations.get(user_id, 0)
+
+        graph = self.loader(user_id)
+        with self._lock:
+            # Drop the result if the user's graph changed while it was loading
+            if self._generations.get(user_id, 0) == generation:
+                size = graph.nbytes()
+                self._discard(user_id)
+                self._entries[user_id] = (graph, time.monotonic(), size)
+                self._size += size
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    self._discard(next(iter(self._entries)))
+        return graph
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._discard(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _discard(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+graph_cache = FamilyGraphCache(
+    max_bytes=getattr(settings, 'FAMILY_GRAPH_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+    max_age=getattr(settings, 'FAMILY_GRAPH_CACHE_MAX_AGE', 300),
+)
+
+
+def get_family_graph(user_id, member_ids=()):
+    """
+    The cached graph of ``user_id``, reloaded if it lacks any of ``member_ids``.
+
+    Another process may have added members since the entry was built, so a
+    missing id is only treated as unknown once a fresh graph lacks it too.
+    """
+    graph = graph_cache.get(user_id)
+    if any(member_id not in graph.index for member_id in member_ids):
+        graph_cache.invalidate(user_id)
+        graph = graph_cache.get(user_id)
+    return graph
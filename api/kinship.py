@@ -0,0 +1,90 @@
+"""Kinship (coancestry) coefficients over the mother/father graph."""
+import math
+from collections import deque
+
+from .graph import NO_PARENT
+
+
+def generation_ranks(graph):
+    """
+    Rank members so that every parent has a lower rank than its children.
+
+    Members caught in a parent cycle share the highest rank, and links between equal
+    ranks are ignored by the calculator, which breaks the cycle.
+    """
+    pending = [len(graph.parents(i)) for i in range(len(graph))]
+    ranks = [None] * len(graph)
+    queue = deque(i for i, count in enumerate(pending) if count == 0)
+    rank = 0
+    while queue:
+        i = queue.popleft()
+        ranks[i] = rank
+        rank += 1
+        for child in graph.children(i):
+            pending[child] -= 1
+            if pending[child] == 0:
+                queue.append(child)
+    return [rank if r is None else r for r in ranks]
+
+
+class KinshipCalculator:
+    """
+    Compute kinship coefficients for many pairs, sharing sub-results between them.
+
+    Uses the classic recursion: phi(a, a) = (1 + phi(mother, father)) / 2, and for
+    a not an ancestor of b, phi(a, b) = (phi(mother(a), b) + phi(father(a), b)) / 2,
+    with unknown parents contributing 0. Results are memoized per pair, so pairs
+    that share ancestors reuse each other's walks.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.ranks = generation_ranks(graph)
+        self.memo = {}
+
+    def _parents(self, i):
+        return [
+            parent for parent in (self.graph.mothers[i], self.graph.fathers[i])
+            if parent != NO_PARENT and self.ranks[parent] < self.ranks[i]
+        ]
+
+    def _key(self, a, b):
+        return (a, b) if a <= b else (b, a)
+
+    def _dependencies(self, a, b):
+        if a == b:
+            parents = self._parents(a)
+            return [tuple(parents)] if len(parents) == 2 else []
+        if self.ranks[a] < self.ranks[b]:
+            a, b = b, a
+        return [(parent, b) for parent in self._parents(a)]
+
+    def _combine(self, a, b):
+        if a == b:
+            parents = self._parents(a)
+            inbreeding = self.memo[self._key(*parents)] if len(parents) == 2 else 0.0
+            return (1 + inbreeding) / 2
+        return sum(self.memo[self._key(*pair)] for pair in self._dependencies(a, b)) / 2
+
+    def kinship(self, a, b):
+        """Kinship coefficient between member indexes ``a`` and ``b``."""
+        # An explicit stack keeps very deep pedigrees clear of the recursion limit
+        stack = [(a, b)]
+        while stack:
+            pair = stack[-1]
+            key = self._key(*pair)
+            if key in self.memo:
+                stack.pop()
+                continue
+            missing = [dependency for dependency in self._dependencies(*pair)
+                       if self._key(*dependency) not in self.memo]
+            if missing:
+                stack.extend(missing)
+                continue
+            self.memo[key] = self._combine(*pair)
+            stack.pop()
+        return self.memo[self._key(a, b)]
+
+    def relationship(self, a, b):
+        """Wright's coefficient of relationship, which corrects for inbreeding of a and b."""
+        return self.kinship(a, b) / math.sqrt(self.kinship(a, a) * self.kinship(b, b))
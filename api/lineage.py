@@ -0,0 +1,82 @@
+"""Lineage queries over the mother/father self-references of FamilyMember."""
+from django.db import connection
+from django.db.models import Q
+
+from .models import FamilyMember
+
+# Upper bound on how many generations a single lineage query may walk
+MAX_LINEAGE_DEPTH = 25
+
+ANCESTORS_SQL = """
+WITH RECURSIVE lineage(id, depth) AS (
+    SELECT id, 0 FROM {table} WHERE id = %s
+    UNION
+    SELECT parent.id, lineage.depth + 1
+    FROM lineage
+    JOIN {table} child ON child.id = lineage.id
+    JOIN {table} parent ON parent.id IN (child.mother_id, child.father_id)
+    WHERE lineage.depth < %s
+)
+SELECT id, MIN(depth) FROM lineage WHERE depth > 0 GROUP BY id
+"""
+
+DESCENDANTS_SQL = """
+WITH RECURSIVE lineage(id, depth) AS (
+    SELECT id, 0 FROM {table} WHERE id = %s
+    UNION
+    SELECT child.id, lineage.depth + 1
+    FROM lineage
+    JOIN {table} child ON (child.mother_id = lineage.id OR child.father_id = lineage.id)
+    WHERE lineage.depth < %s
+)
+SELECT id, MIN(depth) FROM lineage WHERE depth > 0 GROUP BY id
+"""
+
+
+def supports_recursive_cte():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _run_lineage_query(sql, member_id, max_depth):
+    sql = sql.format(table=connection.ops.quote_name(FamilyMember._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [member_id, max_depth])
+        return dict(cursor.fetchall())
+
+
+def _walk_generations(member_id, max_depth, next_generation):
+    """Fallback for backends without recursive CTEs: one query per generation."""
+    depths = {}
+    frontier = {member_id}
+    for depth in range(1, max_depth + 1):
+        frontier = set(next_generation(frontier)) - depths.keys() - {member_id}
+        if not frontier:
+            break
+        for related_id in frontier:
+            depths[related_id] = depth
+    return depths
+
+
+def get_ancestor_depths(member_id, max_depth=MAX_LINEAGE_DEPTH):
+    """Return a mapping of ancestor id -> generations above ``member_id``."""
+    if supports_recursive_cte():
+        return _run_lineage_query(ANCESTORS_SQL, member_id, max_depth)
+
+    def parents_of(ids):
+        for mother_id, father_id in FamilyMember.objects.filter(id__in=ids).values_list('mother_id', 'father_id'):
+            yield from (parent_id for parent_id in (mother_id, father_id) if parent_id is not None)
+
+    return _walk_generations(member_id, max_depth, parents_of)
+
+
+def get_descendant_depths(member_id, max_depth=MAX_LINEAGE_DEPTH):
+    """Return a mapping of descendant id -> generations below ``member_id``."""
+    if supports_recursive_cte():
+        return _run_lineage_query(DESCENDANTS_SQL, member_id, max_depth)
+
+    def children_of(ids):
+        return FamilyMember.objects.filter(
+            Q(mother_id__in=ids) | Q(father_id__in=ids)
+        ).values_list('id', flat=True)
+
+    return _walk_generations(member_id, max_depth, children_of)
@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.models import FamilyMember
+from api.views import clan_members
+
+BENCHMARK_USERNAME = 'clan-lookup-benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic family members and compare query plans for a case-insensitive clan "
+        "lookup with __iexact and with the Lower(last_name) functional index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=1_000_000)
+        parser.add_argument('--clans', type=int, default=20_000, help="Number of distinct last names")
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--runs', type=int, default=5, help="Timed runs of each query")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded members for another run")
+
+    def handle(self, *args, **options):
+        user, created = get_user_model().objects.get_or_create(username=BENCHMARK_USERNAME)
+        if created or not FamilyMember.objects.filter(user=user).exists():
+            self._seed(user, options)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(FamilyMember._meta.db_table)}")
+
+        clan_name = 'CLAN7'
+        queries = [
+            ("last_name__iexact", FamilyMember.objects.filter(user=user, last_name__iexact=clan_name)),
+            ("Lower(last_name)", clan_members(user, clan_name)),
+        ]
+        explain_options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+        for label, queryset in queries:
+            timings = []
+            for _ in range(options['runs']):
+                start = time.perf_counter()
+                list(queryset.values_list('id', flat=True))
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}: best of {options['runs']} "
+                                                         f"{min(timings) * 1000:.1f} ms"))
+            self.stdout.write(queryset.values_list('id', flat=True).explain(**explain_options))
+
+        if not options['keep']:
+            user.delete()
+
+    def _seed(self, user, options):
+        self.stdout.write(f"Seeding {options['members']} members across {options['clans']} clans...")
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            for offset in range(0, options['members'], batch_size):
+                FamilyMember.objects.bulk_create([
+                    FamilyMember(
+                        user=user,
+                        first_name=f"Member{i}",
+                        # Mixed case, as entered by different volunteers
+                        last_name=f"Clan{i % options['clans']}" if i % 2 else f"CLAN{i % options['clans']}",
+                    )
+                    for i in range(offset, min(offset + batch_size, options['members']))
+                ], batch_size=batch_size)
@@ -0,0 +1,95 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Chiefdom, FamilyMember, Village
+from api.readers import member_payloads
+from api.renderers import ColumnarJSONRenderer
+from api.serializers import FamilyMemberSerializer
+
+BENCHMARK_USERNAME = 'member-read-benchmark'
+# What the mobile tree view asks for with ?fields=
+MOBILE_FIELDS = ['id', 'first_name', 'last_name', 'mother', 'father', 'spouses']
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic families and compare rows per second of the member list built with "
+        "FamilyMemberSerializer and with the values()-based read path, including rendering to JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=20_000)
+        parser.add_argument('--children', type=int, default=4, help="Children per couple")
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--runs', type=int, default=3, help="Timed runs of each path")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded members for another run")
+
+    def handle(self, *args, **options):
+        user, created = get_user_model().objects.get_or_create(username=BENCHMARK_USERNAME)
+        if created or not FamilyMember.objects.filter(user=user).exists():
+            self._seed(user, options)
+
+        members = FamilyMember.objects.filter(user=user).order_by('id')
+        json, columnar = JSONRenderer(), ColumnarJSONRenderer()
+        paths = [
+            ("FamilyMemberSerializer", lambda: json.render(FamilyMemberSerializer(
+                members.select_related(
+                    'mother', 'father', 'chiefdom_of_origin', 'village_of_origin', 'current_location'
+                ).prefetch_related('spouses'),
+                many=True,
+            ).data)),
+            ("member_payloads", lambda: json.render(member_payloads(members))),
+            ("member_payloads, mobile fields", lambda: json.render(member_payloads(members, fields=MOBILE_FIELDS))),
+            ("member_payloads, mobile fields, columnar",
+             lambda: columnar.render(member_payloads(members, fields=MOBILE_FIELDS))),
+        ]
+        rows = members.count()
+        for label, build in paths:
+            timings = []
+            for _ in range(options['runs']):
+                queries = []
+                with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                    start = time.perf_counter()
+                    size = len(build())
+                    timings.append(time.perf_counter() - start)
+            best = min(timings)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{label}: {rows} rows in {best * 1000:.0f} ms, {rows / best:,.0f} rows/s, "
+                f"{len(queries)} queries, {size / 1024:,.0f} KiB"
+            ))
+
+        if not options['keep']:
+            user.delete()
+
+    def _seed(self, user, options):
+        self.stdout.write(f"Seeding {options['members']} members...")
+        chiefdom, _ = Chiefdom.objects.get_or_create(name="Benchmark Chiefdom")
+        village, _ = Village.objects.get_or_create(name="Benchmark Village", chiefdom=chiefdom)
+        family_size = options['children'] + 2
+        with transaction.atomic():
+            for offset in range(0, options['members'], options['batch_size']):
+                end = min(offset + options['batch_size'], options['members'])
+                couples = []
+                for start in range(offset, end, family_size):
+                    father, mother = FamilyMember.objects.bulk_create([
+                        FamilyMember(user=user, first_name=f"Father{start}", last_name=f"Clan{start % 997}",
+                                     gender='M', chiefdom_of_origin=chiefdom, village_of_origin=village),
+                        FamilyMember(user=user, first_name=f"Mother{start}", last_name=f"Clan{start % 997}",
+                                     gender='F'),
+                    ])
+                    couples.append((father, mother, min(options['children'], end - start - 2)))
+                FamilyMember.spouses.through.objects.bulk_create([
+                    FamilyMember.spouses.through(from_familymember_id=a.id, to_familymember_id=b.id)
+                    for father, mother, _ in couples
+                    for a, b in ((father, mother), (mother, father))
+                ])
+                FamilyMember.objects.bulk_create([
+                    FamilyMember(user=user, first_name=f"Child{father.id}x{i}", last_name=father.last_name,
+                                 father=father, mother=mother)
+                    for father, mother, children in couples
+                    for i in range(children)
+                ], batch_size=options['batch_size'])
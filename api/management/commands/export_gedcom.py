@@ -0,0 +1,30 @@
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.gedcom import GEDCOM_BATCH_SIZE, iter_gedcom
+from api.models import FamilyMember
+
+
+class Command(BaseCommand):
+    help = "Export a user's family members as a GEDCOM 5.5.1 file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Username whose members are exported")
+        parser.add_argument('--output', help="Path of the .ged file to write; defaults to stdout")
+        parser.add_argument('--batch-size', type=int, default=GEDCOM_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        chunks = iter_gedcom(FamilyMember.objects.filter(user=user), chunk_size=options['batch_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
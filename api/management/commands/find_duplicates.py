@@ -0,0 +1,38 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.duplicates import DUPLICATE_THRESHOLD, MAX_BLOCK_SIZE, find_candidates, iter_records, save_candidates
+from api.models import FamilyMember
+
+
+class Command(BaseCommand):
+    help = "Find likely duplicate family members and store them as candidates for review."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only check this username's members")
+        parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD)
+        parser.add_argument('--max-block-size', type=int, default=MAX_BLOCK_SIZE)
+
+    def handle(self, *args, **options):
+        members = FamilyMember.objects.all()
+        if options['user']:
+            User = get_user_model()
+            try:
+                members = members.filter(user=User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        start = time.monotonic()
+        stats = {}
+        total = save_candidates(find_candidates(
+            iter_records(members), options['threshold'], options['max_block_size'], stats
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {stats['pairs']} pairs and found {total} candidates in {time.monotonic() - start:.1f}s."
+        ))
+        if stats['skipped_blocks']:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {stats['skipped_blocks']} blocks larger than {options['max_block_size']} members."
+            ))
@@ -0,0 +1,82 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from api.bulk import BULK_BATCH_SIZE, MAX_BULK_EVENTS, BulkEventWriter
+
+REQUIRED_COLUMNS = ['family_member', 'event_type', 'date']
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise CommandError(f"Missing CSV columns: {', '.join(missing)}.")
+    return reader
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import events from a CSV file with the columns family_member, event_type, date and description, "
+        "or from NDJSON with one event object per line. Nothing is saved if any row is invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the .csv or .ndjson file")
+        parser.add_argument('--user', required=True, help="Username that owns the events' family members")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=MAX_BULK_EVENTS,
+                            help="Rows validated and written at a time")
+        parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE, help="Rows per INSERT")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+        if not 1 <= options['chunk_size'] <= MAX_BULK_EVENTS:
+            raise CommandError(f"--chunk-size must be between 1 and {MAX_BULK_EVENTS}.")
+        file_format = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'ndjson')
+
+        writer = BulkEventWriter(user, batch_size=options['batch_size'])
+        start, total = time.monotonic(), 0
+        with open(options['path'], newline='', encoding='utf-8') as stream, transaction.atomic():
+            rows = read_csv(stream) if file_format == 'csv' else read_ndjson(stream)
+            try:
+                while chunk := list(islice(rows, options['chunk_size'])):
+                    try:
+                        writer.run(chunk)
+                    except ValidationError as exc:
+                        raise CommandError(self._describe(exc, total))
+                    total += len(chunk)
+            except (ValueError, csv.Error) as exc:
+                raise CommandError(f"Could not read row {total + 1} or later: {exc}")
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {total} events in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} events/s)."
+        ))
+
+    def _describe(self, exc, offset, limit=20):
+        """The first ``limit`` row errors, numbered from 1 across the whole file."""
+        row_errors = exc.detail.get('events', [])
+        lines = [
+            f"row {offset + index + 1}: {json.dumps(errors)}"
+            for index, errors in enumerate(row_errors)
+            if errors and not isinstance(errors, str)
+        ]
+        if not lines:
+            lines = [str(error) for error in row_errors]
+        return "Invalid events, nothing was imported:\n" + "\n".join(lines[:limit])
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.gedcom import GEDCOM_BATCH_SIZE, GedcomImporter
+
+
+class Command(BaseCommand):
+    help = "Import family members from a GEDCOM file for a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the .ged file")
+        parser.add_argument('--user', required=True, help="Username that will own the imported members")
+        parser.add_argument('--batch-size', type=int, default=GEDCOM_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        def progress(stage, count):
+            self.stdout.write(f"{stage}: {count}")
+
+        importer = GedcomImporter(user, batch_size=options['batch_size'], progress=progress)
+        with open(options['path'], 'rb') as stream:
+            summary = importer.run(stream)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['members']} members and {summary['families']} families."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.ancestry import rebuild_ancestry
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FamilyMember ancestry closure table from the mother/father links."
+
+    def handle(self, *args, **options):
+        total = rebuild_ancestry()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ancestry closure table with {total} rows."))
@@ -0,0 +1,153 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Chiefdom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Clan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('surname', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='familymember',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='familymember',
+            name='parent',
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='date_of_death',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='father',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children_from_father', to='api.familymember'),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='first_name',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='gender',
+            field=models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')], max_length=1, null=True),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='history',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='last_name',
+            field=models.CharField(db_index=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='mother',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children_from_mother', to='api.familymember'),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, upload_to='family_photos/'),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='spouses',
+            field=models.ManyToManyField(blank=True, to='api.familymember'),
+        ),
+        migrations.AlterField(
+            model_name='familymember',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='family_members', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='chiefdom_of_origin',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='family_members', to='api.chiefdom'),
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('BIRTH', 'Birth'), ('MARRIAGE', 'Marriage'), ('DEATH', 'Death')], max_length=20)),
+                ('date', models.DateField()),
+                ('description', models.TextField(blank=True)),
+                ('family_member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='api.familymember')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FamilyTree',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('members', models.ManyToManyField(blank=True, related_name='family_trees', to='api.familymember')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='family_trees', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='current_location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='current_residents', to='api.location'),
+        ),
+        migrations.CreateModel(
+            name='Village',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('chiefdom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='villages', to='api.chiefdom')),
+            ],
+            options={
+                'unique_together': {('name', 'chiefdom')},
+            },
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='village_of_origin',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='family_members', to='api.village'),
+        ),
+        migrations.CreateModel(
+            name='FamilyMemberAncestry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='api.familymember')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='api.familymember')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ancestor', 'depth'], name='api_familym_ancesto_9c331d_idx'), models.Index(fields=['descendant', 'depth'], name='api_familym_descend_016d74_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+    ]
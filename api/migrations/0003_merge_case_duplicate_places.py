@@ -0,0 +1,54 @@
+# Data only: PostgreSQL cannot add the constraints in 0004_case_insensitive_names in the
+# same transaction as these updates ("pending trigger events"), so they run first, on their own.
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def _duplicates(queryset, *group_fields):
+    """Map each duplicate id to the oldest row sharing its case-folded name (and group)."""
+    keep, duplicates = {}, {}
+    for row in queryset.annotate(lowered=Lower('name')).order_by('id').values('id', 'lowered', *group_fields):
+        key = (row['lowered'], *(row[field] for field in group_fields))
+        if key in keep:
+            duplicates[row['id']] = keep[key]
+        else:
+            keep[key] = row['id']
+    return duplicates
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """Fold places whose names differ only by case into the oldest row before adding the constraints."""
+    FamilyMember = apps.get_model('api', 'FamilyMember')
+    Chiefdom = apps.get_model('api', 'Chiefdom')
+    Village = apps.get_model('api', 'Village')
+    Location = apps.get_model('api', 'Location')
+
+    for duplicate_id, keep_id in _duplicates(Chiefdom.objects.all()).items():
+        FamilyMember.objects.filter(chiefdom_of_origin_id=duplicate_id).update(chiefdom_of_origin_id=keep_id)
+        for village in Village.objects.filter(chiefdom_id=duplicate_id):
+            existing = Village.objects.filter(chiefdom_id=keep_id, name=village.name).first()
+            if existing is None:
+                village.chiefdom_id = keep_id
+                village.save(update_fields=['chiefdom'])
+            else:
+                FamilyMember.objects.filter(village_of_origin_id=village.id).update(village_of_origin_id=existing.id)
+                village.delete()
+        Chiefdom.objects.filter(id=duplicate_id).delete()
+    for duplicate_id, keep_id in _duplicates(Village.objects.all(), 'chiefdom_id').items():
+        FamilyMember.objects.filter(village_of_origin_id=duplicate_id).update(village_of_origin_id=keep_id)
+        Village.objects.filter(id=duplicate_id).delete()
+    for duplicate_id, keep_id in _duplicates(Location.objects.all()).items():
+        FamilyMember.objects.filter(current_location_id=duplicate_id).update(current_location_id=keep_id)
+        Location.objects.filter(id=duplicate_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_familymemberancestry'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+    ]
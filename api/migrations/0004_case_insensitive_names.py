@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_merge_case_duplicate_places'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='familymember',
+            index=models.Index(models.F('user'), django.db.models.functions.text.Lower('last_name'), name='api_member_user_last_name_ci'),
+        ),
+        migrations.AddConstraint(
+            model_name='chiefdom',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='api_chiefdom_name_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='location',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='api_location_name_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='village',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('chiefdom'), name='api_village_name_ci_unique'),
+        ),
+    ]
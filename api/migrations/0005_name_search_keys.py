@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:18
+
+import re
+import unicodedata
+
+from django.db import DatabaseError, migrations, models, transaction
+
+# Frozen copy of api.names.phonetic_key as it was when this migration was written;
+# later changes to the rules come with their own migration to rebuild the keys.
+PHONETIC_RULES = [
+    (re.compile(r'([bdmnv])h'), r'\1'),
+    (re.compile(r'hw'), 'w'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'l'), 'r'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def phonetic_key(name):
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    key = ' '.join(re.findall(r"[a-z]+", stripped.lower().replace("'", '')))
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+def backfill_name_keys(apps, schema_editor):
+    FamilyMember = apps.get_model('api', 'FamilyMember')
+    batch = []
+    for member in FamilyMember.objects.only('id', 'first_name', 'last_name').iterator(chunk_size=5000):
+        member.first_name_key = phonetic_key(member.first_name)
+        member.last_name_key = phonetic_key(member.last_name)
+        batch.append(member)
+        if len(batch) >= 5000:
+            FamilyMember.objects.bulk_update(batch, ['first_name_key', 'last_name_key'])
+            batch = []
+    FamilyMember.objects.bulk_update(batch, ['first_name_key', 'last_name_key'])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    On PostgreSQL, enable pg_trgm and index lowercased names for trigram search.
+
+    Creating the extension needs elevated privileges; without it, search falls back
+    to the in-process index, so a failure here is not fatal.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic():
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return
+    for column in ('first_name', 'last_name'):
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS api_member_{column}_trgm ON api_familymember "
+            f"USING gin (LOWER({column}) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in ('first_name', 'last_name'):
+        schema_editor.execute(f"DROP INDEX IF EXISTS api_member_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_case_insensitive_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familymember',
+            name='first_name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='familymember',
+            name='last_name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='familymember',
+            index=models.Index(fields=['user', 'first_name_key'], name='api_member_first_name_key'),
+        ),
+        migrations.AddIndex(
+            model_name='familymember',
+            index=models.Index(fields=['user', 'last_name_key'], name='api_member_last_name_key'),
+        ),
+        migrations.RunPython(backfill_name_keys, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:21
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of api.names.phonetic_key, whose rules now also fold a glide 'y' between vowels
+PHONETIC_RULES = [
+    (re.compile(r'([aeiou])y([ie])'), r'\1\2'),
+    (re.compile(r'([bdmnv])h'), r'\1'),
+    (re.compile(r'hw'), 'w'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'l'), 'r'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def phonetic_key(name):
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    key = ' '.join(re.findall(r"[a-z]+", stripped.lower().replace("'", '')))
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+def rebuild_keys(apps, schema_editor):
+    FamilyMember = apps.get_model('api', 'FamilyMember')
+    batch = []
+    for member in FamilyMember.objects.only('id', 'first_name', 'last_name').iterator(chunk_size=5000):
+        member.first_name_key = phonetic_key(member.first_name)
+        member.last_name_key = phonetic_key(member.last_name)
+        batch.append(member)
+        if len(batch) >= 5000:
+            FamilyMember.objects.bulk_update(batch, ['first_name_key', 'last_name_key'])
+            batch = []
+    FamilyMember.objects.bulk_update(batch, ['first_name_key', 'last_name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_name_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('evidence', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('DISMISSED', 'Dismissed')], default='PENDING', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('first', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.familymember')),
+                ('second', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.familymember')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-score'], name='api_duplica_status_07b194_idx')],
+                'unique_together': {('first', 'second')},
+            },
+        ),
+        migrations.RunPython(rebuild_keys, migrations.RunPython.noop),
+    ]
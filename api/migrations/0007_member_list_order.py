@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_duplicatecandidate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='familymember',
+            index=models.Index(models.F('user'), django.db.models.functions.text.Lower(django.db.models.functions.comparison.Coalesce('last_name', models.Value(''))), models.F('id'), name='api_member_list_order'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+def rebuild_ancestry(apps, schema_editor):
+    """
+    Fill the closure table for members saved before it was maintained by signals.
+
+    A frozen copy of api.ancestry.rebuild_ancestry: one INSERT ... SELECT per
+    generation, so it does not load the members into memory.
+    """
+    quote_name = schema_editor.connection.ops.quote_name
+    ancestry_table = quote_name(apps.get_model('api', 'FamilyMemberAncestry')._meta.db_table)
+    member_table = quote_name(apps.get_model('api', 'FamilyMember')._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ancestry_table}")
+        cursor.execute(f"""
+            INSERT INTO {ancestry_table} (ancestor_id, descendant_id, depth)
+            SELECT mother_id, id, 1 FROM {member_table}
+            WHERE mother_id IS NOT NULL AND mother_id <> id
+            UNION
+            SELECT father_id, id, 1 FROM {member_table}
+            WHERE father_id IS NOT NULL AND father_id <> id
+        """)
+        inserted, depth = cursor.rowcount, 1
+        while inserted > 0:
+            cursor.execute(f"""
+                INSERT INTO {ancestry_table} (ancestor_id, descendant_id, depth)
+                SELECT DISTINCT link.ancestor_id, child.id, %s
+                FROM {ancestry_table} link
+                JOIN {member_table} child
+                    ON (child.mother_id = link.descendant_id OR child.father_id = link.descendant_id)
+                WHERE link.depth = %s
+                    AND child.id <> link.ancestor_id
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {ancestry_table} known
+                        WHERE known.ancestor_id = link.ancestor_id AND known.descendant_id = child.id
+                    )
+            """, [depth + 1, depth])
+            inserted, depth = cursor.rowcount, depth + 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_event_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_ancestry, migrations.RunPython.noop),
+    ]
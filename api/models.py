@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Lower
 
 
 class CustomUser(AbstractUser):
@@ -13,6 +15,10 @@ class CustomUser(AbstractUser):
         return self.username
 
 
+# Sort key of member lists; pages seek on the (user, key, id) index below
+MEMBER_LIST_ORDER = Lower(Coalesce('last_name', Value('')))
+
+
 class GenderChoices(models.TextChoices):
     MALE = 'M', 'Male'
     FEMALE = 'F', 'Female'
@@ -81,6 +87,18 @@ class FamilyMember(models.Model):
         on_delete=models.SET_NULL,
         related_name='current_residents'
     )
+    # Phonetic keys of the names for fuzzy search (see api.names); kept in sync on save
+    first_name_key = models.CharField(max_length=50, blank=True, default='', editable=False)
+    last_name_key = models.CharField(max_length=50, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Clan lookups match last names case-insensitively within one user's tree
+            models.Index(F('user'), Lower('last_name'), name='api_member_user_last_name_ci'),
+            models.Index(fields=['user', 'first_name_key'], name='api_member_first_name_key'),
+            models.Index(fields=['user', 'last_name_key'], name='api_member_last_name_key'),
+            models.Index(F('user'), MEMBER_LIST_ORDER, F('id'), name='api_member_list_order'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -106,6 +124,11 @@ class Chiefdom(models.Model):
     """Model representing a Chiefdom."""
     name = models.CharField(max_length=100, unique=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='api_chiefdom_name_ci_unique'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -121,6 +144,9 @@ class Village(models.Model):
 
     class Meta:
         unique_together = ('name', 'chiefdom')
+        constraints = [
+            models.UniqueConstraint(Lower('name'), 'chiefdom', name='api_village_name_ci_unique'),
+        ]
 
     def __str__(self):
         return f"{self.name}, {self.chiefdom.name}"
@@ -130,6 +156,11 @@ class Location(models.Model):
     """Model representing a Location."""
     name = models.CharField(max_length=100, unique=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='api_location_name_ci_unique'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -155,5 +186,64 @@ class Event(models.Model):
     date = models.DateField()
     description = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Timelines scan events by date within a set of members or of one type
+            models.Index(fields=['family_member', 'date'], name='api_event_member_date'),
+            models.Index(fields=['event_type', 'date'], name='api_event_type_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} of {self.family_member}"
+
+
+class FamilyMemberAncestry(models.Model):
+    """Closure table row linking a family member to one of its ancestors."""
+    ancestor = models.ForeignKey(
+        FamilyMember,
+        on_delete=models.CASCADE,
+        related_name='descendant_links'
+    )
+    descendant = models.ForeignKey(
+        FamilyMember,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links'
+    )
+    # Number of generations between the two, using the shortest path
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['ancestor', 'depth']),
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor} -> {self.descendant} ({self.depth})"
+
+
+class DuplicateCandidate(models.Model):
+    """A pair of family members that may be the same person, awaiting review."""
+    STATUSES = [
+        ('PENDING', 'Pending'),
+        ('CONFIRMED', 'Confirmed'),
+        ('DISMISSED', 'Dismissed'),
+    ]
+    # Stored with first_id < second_id so each pair has one row
+    first = models.ForeignKey(FamilyMember, on_delete=models.CASCADE, related_name='+')
+    second = models.ForeignKey(FamilyMember, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    # Per-signal similarity that went into the score, for reviewers
+    evidence = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUSES, default='PENDING')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('first', 'second')
+        indexes = [
+            models.Index(fields=['status', '-score']),
+        ]
+
     def __str__(self):
-        return f"{self.get_event_type_display()} of {self.family_member}"
\ No newline at end of file
+        return f"{self.first} ~ {self.second} ({self.score:.2f})"
@@ -0,0 +1,65 @@
+"""Name normalization, phonetic keys and trigram similarity for fuzzy name matching."""
+import re
+import unicodedata
+
+# pg_trgm's default similarity threshold for the % operator
+SIMILARITY_THRESHOLD = 0.3
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+# Spelling variants that are common in Shona names recorded by different hands:
+# breathy consonants written with or without 'h', 'hw' for 'w', 'v'/'w' for the
+# same sound, a glide 'y' between vowels (Tendayi/Tendai), and 'l' in older or
+# Ndebele-influenced spellings of Shona 'r'.
+PHONETIC_RULES = [
+    (re.compile(r'([aeiou])y([ie])'), r'\1\2'),
+    (re.compile(r'([bdmnv])h'), r'\1'),
+    (re.compile(r'hw'), 'w'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'l'), 'r'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def fold_name(name):
+    """Lowercase ``name``, strip accents and apostrophes, and collapse whitespace and hyphens."""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.findall(r"[a-z]+", stripped.lower().replace("'", '')))
+
+
+def phonetic_key(name):
+    """
+    A key shared by common spelling variants of a name, e.g. Zvihwati and Zvivhati.
+
+    Returns '' for blank names. Keys are never longer than the folded name.
+    """
+    key = fold_name(name)
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+def set_name_keys(member):
+    """Fill in a member's phonetic key columns; needed wherever ``save()`` is bypassed."""
+    member.first_name_key = phonetic_key(member.first_name)
+    member.last_name_key = phonetic_key(member.last_name)
+    return member
+
+
+def trigrams(text):
+    """The trigram set of ``text``, computed the way pg_trgm does."""
+    grams = set()
+    for word in WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(first, second):
+    """pg_trgm ``similarity()``: shared trigrams over all trigrams of either string."""
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
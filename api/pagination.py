@@ -0,0 +1,126 @@
+"""Keyset (seek) pagination for list endpoints."""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only pagination on an indexed ordering.
+
+    Views set ``keyset_ordering`` to the columns to order by, which must end with
+    a unique one and hold no NULLs. A column is a field name, optionally with a
+    leading '-', or an ``(alias, expression)`` pair so an expression index can
+    be used. Each page resumes after the last row of the previous one with a
+    ``WHERE (a, b) > (x, y)`` style filter, so deep pages cost the same as the
+    first. ``count`` is only included when ``?count=true`` is passed.
+    """
+    page_size = 50
+    max_page_size = 500
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        return [column if isinstance(column, tuple) else (column, None) for column in ordering]
+
+    def order(self, queryset, view):
+        """``queryset`` in page order, with any ordering expressions annotated."""
+        columns = self.get_ordering(view)
+        expressions = {name: expression for name, expression in columns if expression is not None}
+        return queryset.annotate(**expressions).order_by(*(name for name, _ in columns))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        names = [name for name, _ in self.get_ordering(view)]
+        queryset = self.order(queryset, view)
+        self.count = queryset.count() if request.query_params.get('count') == 'true' else None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(self.after(names, self.decode_cursor(cursor, len(names))))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise ParseError("Invalid cursor.")
+        page = list(queryset[:self.page_size + 1])
+        self.next_cursor = None
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor([
+                last[name.lstrip('-')] if isinstance(last, dict) else getattr(last, name.lstrip('-'))
+                for name in names
+            ])
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ParseError(f"{self.page_size_query_param} must be an integer.")
+        if not 1 <= page_size <= self.max_page_size:
+            raise ParseError(f"{self.page_size_query_param} must be between 1 and {self.max_page_size}.")
+        return page_size
+
+    @staticmethod
+    def after(names, values):
+        """
+        Rows after ``values`` in the order of ``names``.
+
+        Besides the OR of per-column comparisons, the first column gets a plain
+        range bound, which is what lets the database seek in its index.
+        """
+        first = names[0].lstrip('-')
+        bound = Q(**{f"{first}__{'lte' if names[0].startswith('-') else 'gte'}": values[0]})
+        rows_after = Q()
+        for i, name in enumerate(names):
+            column = name.lstrip('-')
+            ties = {prior.lstrip('-'): value for prior, value in zip(names[:i], values)}
+            rows_after |= Q(**ties, **{f"{column}__{'lt' if name.startswith('-') else 'gt'}": values[i]})
+        return bound & rows_after
+
+    @staticmethod
+    def encode_cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, length):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError, TypeError):
+            raise ParseError("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != length:
+            raise ParseError("Invalid cursor.")
+        return values
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        body = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            body = {"count": self.count, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
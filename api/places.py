@@ -0,0 +1,203 @@
+"""Cached resolution of chiefdom, village and location names to rows."""
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import Chiefdom, Location, Village
+
+
+def normalize_name(name):
+    return (name or '').strip().lower()
+
+
+class PlaceResolver:
+    """
+    Map normalized place names to ids for one table, creating missing rows.
+
+    Keys are looked up in a process-local LRU cache first; the whole table is loaded
+    in one query on first use, and entries expire after ``max_age`` seconds so
+    writes from other processes are picked up. Matching is case-insensitive, as
+    with ``get_or_create(name__iexact=...)``.
+
+    Results only enter the cache once the current transaction commits, so ids of
+    rows that are rolled back are never served. Missing rows are created with
+    ``ignore_conflicts`` and read back, so concurrent creates of the same name
+    settle on one row instead of failing.
+    """
+    model = None
+
+    def __init__(self, max_entries, max_age):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._warmed = False
+        self._lock = threading.Lock()
+
+    def key(self, place):
+        return normalize_name(place.name)
+
+    def lookup(self, keys):
+        """Query existing rows for ``keys``; yields ``(key, id)`` lowest id first."""
+        queryset = self.model.objects.annotate(lowered=Lower('name')).filter(lowered__in=keys)
+        return queryset.order_by('id').values_list('lowered', 'id')
+
+    def build(self, key, name):
+        return self.model(name=name)
+
+    def resolve(self, names):
+        """
+        Resolve ``{key: name}`` to ``{key: id}``.
+
+        ``name`` keeps the spelling a new row is created with. Costs no queries when
+        every key is cached, otherwise one lookup plus an insert and a re-read for
+        keys that do not exist yet.
+        """
+        if not names:
+            return {}
+        if not self._warmed:
+            self.warm()
+        resolved = self._cached(names)
+        missing = [key for key in names if key not in resolved]
+        if missing:
+            found = self._first_ids(self.lookup(missing))
+            new_keys = [key for key in missing if key not in found]
+            if new_keys:
+                self.model.objects.bulk_create([self.build(key, names[key]) for key in new_keys],
+                                               ignore_conflicts=True)
+                found.update(self._first_ids(self.lookup(new_keys)))
+            resolved.update(found)
+            transaction.on_commit(partial(self._store, found))
+        return resolved
+
+    def warm(self):
+        """Load the whole table into the cache, up to ``max_entries`` rows."""
+        rows = self.model.objects.order_by('id')[:self.max_entries]
+        transaction.on_commit(partial(self._store, self._first_ids((self.key(row), row.id) for row in rows)))
+        self._warmed = True
+
+    def forget(self, place_id):
+        """Drop every key that resolves to ``place_id``."""
+        with self._lock:
+            for key in [key for key, (cached_id, _) in self._entries.items() if cached_id == place_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._warmed = False
+
+    def _first_ids(self, pairs):
+        ids = {}
+        for key, place_id in pairs:
+            ids.setdefault(key, place_id)
+        return ids
+
+    def _cached(self, keys):
+        now = time.monotonic()
+        hits = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < self.max_age:
+                    self._entries.move_to_end(key)
+                    hits[key] = entry[0]
+        return hits
+
+    def _store(self, ids):
+        now = time.monotonic()
+        with self._lock:
+            for key, place_id in ids.items():
+                self._entries[key] = (place_id, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class NameResolver(PlaceResolver):
+    def __init__(self, model, max_entries, max_age):
+        super().__init__(max_entries, max_age)
+        self.model = model
+
+
+class VillageResolver(PlaceResolver):
+    """Resolves ``(normalized name, chiefdom id)`` keys, as village names repeat across chiefdoms."""
+    model = Village
+
+    def key(self, village):
+        return normalize_name(village.name), village.chiefdom_id
+
+    def lookup(self, keys):
+        queryset = Village.objects.annotate(lowered=Lower('name')).filter(
+            lowered__in={name for name, _ in keys},
+            chiefdom_id__in={chiefdom_id for _, chiefdom_id in keys},
+        )
+        keys = set(keys)
+        return [
+            ((lowered, chiefdom_id), village_id)
+            for lowered, chiefdom_id, village_id in queryset.order_by('id').values_list('lowered', 'chiefdom_id', 'id')
+            if (lowered, chiefdom_id) in keys
+        ]
+
+    def build(self, key, name):
+        return Village(name=name, chiefdom_id=key[1])
+
+
+PLACE_CACHE_MAX_ENTRIES = getattr(settings, 'PLACE_CACHE_MAX_ENTRIES', 10000)
+PLACE_CACHE_MAX_AGE = getattr(settings, 'PLACE_CACHE_MAX_AGE', 3600)
+
+chiefdom_resolver = NameResolver(Chiefdom, PLACE_CACHE_MAX_ENTRIES, PLACE_CACHE_MAX_AGE)
+village_resolver = VillageResolver(PLACE_CACHE_MAX_ENTRIES, PLACE_CACHE_MAX_AGE)
+location_resolver = NameResolver(Location, PLACE_CACHE_MAX_ENTRIES, PLACE_CACHE_MAX_AGE)
+
+
+def _wanted(names):
+    wanted = {}
+    for name in names:
+        if normalize_name(name):
+            wanted.setdefault(normalize_name(name), name.strip())
+    return wanted
+
+
+def resolve_chiefdoms(names):
+    """Map the normalized form of each chiefdom name to an id, creating missing rows."""
+    return chiefdom_resolver.resolve(_wanted(names))
+
+
+def resolve_locations(names):
+    return location_resolver.resolve(_wanted(names))
+
+
+def resolve_villages(villages):
+    """
+    Map ``(normalized name, chiefdom id)`` pairs to Village ids, creating missing rows.
+
+    ``villages`` is an iterable of ``(name, chiefdom_id)``.
+    """
+    wanted = {}
+    for name, chiefdom_id in villages:
+        if normalize_name(name):
+            wanted.setdefault((normalize_name(name), chiefdom_id), name.strip())
+    return village_resolver.resolve(wanted)
+
+
+def resolve_chiefdom(name):
+    """Id of the chiefdom called ``name``, or None for a blank name."""
+    return resolve_chiefdoms([name]).get(normalize_name(name))
+
+
+def resolve_location(name):
+    return resolve_locations([name]).get(normalize_name(name))
+
+
+def resolve_village(name, chiefdom_id):
+    return resolve_villages([(name, chiefdom_id)]).get((normalize_name(name), chiefdom_id))
+
+
+def clear_place_caches():
+    for resolver in (chiefdom_resolver, village_resolver, location_resolver):
+        resolver.clear()
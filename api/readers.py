@@ -0,0 +1,123 @@
+"""
+Read-only family member payloads built from ``values()`` rows.
+
+Produces the same JSON as :class:`~api.serializers.FamilyMemberSerializer`
+without instantiating models or resolving related objects per row: places are
+joined into the row and spouse and child ids are aggregated in SQL, so a page
+of members costs one query on PostgreSQL and four elsewhere. Only the columns
+and id lists behind the requested fields are selected.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import OuterRef
+
+from .models import FamilyMember
+
+# Payload key -> (model the ids belong to, column holding the member's id, column holding the related id)
+ID_LISTS = {
+    'spouses': (FamilyMember.spouses.through, 'from_familymember_id', 'to_familymember_id'),
+    'children_from_mother': (FamilyMember, 'mother_id', 'id'),
+    'children_from_father': (FamilyMember, 'father_id', 'id'),
+}
+
+
+def _photo_url(row, request):
+    if not row['photo']:
+        return None
+    url = FamilyMember._meta.get_field('photo').storage.url(row['photo'])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _village(row, request):
+    if not row['village_of_origin_id']:
+        return None
+    return {
+        'id': row['village_of_origin_id'],
+        'name': row['village_of_origin__name'],
+        'chiefdom': row['village_of_origin__chiefdom__name'],
+    }
+
+
+def _column(name):
+    return [name], lambda row, request: row[name]
+
+
+# Payload key -> (values() columns it needs, builder taking the row and the request), in serializer order
+MEMBER_FIELDS = {
+    'id': _column('id'),
+    'first_name': _column('first_name'),
+    'last_name': _column('last_name'),
+    'photo': (['photo'], _photo_url),
+    'gender': _column('gender'),
+    'date_of_birth': (['date_of_birth'], lambda row, request: _isoformat(row['date_of_birth'])),
+    'date_of_death': (['date_of_death'], lambda row, request: _isoformat(row['date_of_death'])),
+    'history': _column('history'),
+    'user': (['user_id'], lambda row, request: row['user_id']),
+    'mother': (['mother_id'], lambda row, request: row['mother_id']),
+    'father': (['father_id'], lambda row, request: row['father_id']),
+    'spouses': ([], lambda row, request: row['spouses']),
+    'chiefdom_of_origin': (['chiefdom_of_origin__name'], lambda row, request: row['chiefdom_of_origin__name']),
+    'village_of_origin': (
+        ['village_of_origin_id', 'village_of_origin__name', 'village_of_origin__chiefdom__name'], _village
+    ),
+    'current_location': (['current_location__name'], lambda row, request: row['current_location__name']),
+    'children_from_mother': ([], lambda row, request: row['children_from_mother']),
+    'children_from_father': ([], lambda row, request: row['children_from_father']),
+}
+
+
+def _rows_with_id_arrays(queryset, columns, id_lists):
+    from django.contrib.postgres.expressions import ArraySubquery
+
+    arrays = {
+        key: ArraySubquery(
+            model.objects.filter(**{owner: OuterRef('pk')}).order_by(related).values(related)
+        )
+        for key, (model, owner, related) in ID_LISTS.items()
+        if key in id_lists
+    }
+    return list(queryset.values(*columns, **arrays))
+
+
+def _rows_with_id_lists(queryset, columns, id_lists):
+    # The member id is needed to attach the lists even when it was not asked for
+    rows = list(queryset.values(*columns, *([] if not id_lists or 'id' in columns else ['id'])))
+    member_ids = queryset.values('pk')
+    for key, (model, owner, related) in ID_LISTS.items():
+        if key not in id_lists:
+            continue
+        ids = defaultdict(list)
+        pairs = model.objects.filter(**{f'{owner}__in': member_ids}).order_by(related).values_list(owner, related)
+        for member_id, related_id in pairs:
+            ids[member_id].append(related_id)
+        for row in rows:
+            row[key] = ids.get(row['id'], [])
+    return rows
+
+
+def member_payloads(queryset, request=None, fields=None):
+    """
+    Serialize ``queryset`` like ``FamilyMemberSerializer(queryset, many=True).data``.
+
+    ``fields`` limits the payload, and the query, to those keys of
+    :data:`MEMBER_FIELDS`. Spouse and child ids are listed in ascending order.
+    ``request`` is used to make photo URLs absolute, as the serializer does.
+    """
+    fields = list(MEMBER_FIELDS) if fields is None else [field for field in MEMBER_FIELDS if field in fields]
+    columns = list(dict.fromkeys(column for field in fields for column in MEMBER_FIELDS[field][0]))
+    id_lists = [field for field in fields if field in ID_LISTS]
+
+    queryset = queryset.prefetch_related(None)
+    if not queryset.ordered:
+        queryset = queryset.order_by('id')
+    if connection.vendor == 'postgresql':
+        rows = _rows_with_id_arrays(queryset, columns, id_lists)
+    else:
+        rows = _rows_with_id_lists(queryset, columns, id_lists)
+    builders = [(field, MEMBER_FIELDS[field][1]) for field in fields]
+    return [{field: build(row, request) for field, build in builders} for row in rows]
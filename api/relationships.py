@@ -0,0 +1,162 @@
+"""Shortest relationship paths and kinship labels between two family members."""
+
+PARENT = 'parent'
+CHILD = 'child'
+SPOUSE = 'spouse'
+
+ORDINALS = ['first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth', 'ninth', 'tenth']
+
+
+def find_path(graph, source, target):
+    """
+    Return the shortest list of member indexes from ``source`` to ``target``, or None.
+
+    Runs a bidirectional breadth-first search over parent, child and spouse edges,
+    always growing the smaller of the two frontiers.
+    """
+    if source == target:
+        return [source]
+    forward, backward = {source: (None, 0)}, {target: (None, 0)}
+    forward_frontier, backward_frontier = [source], [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = _expand(graph, forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = _expand(graph, backward_frontier, backward, forward)
+        if meeting is not None:
+            return _walk_back(forward, meeting)[::-1] + _walk_back(backward, meeting)[1:]
+    return None
+
+
+def _expand(graph, frontier, visited, other_visited):
+    """Expand one whole layer; return the next frontier and the best meeting point."""
+    next_frontier = []
+    meeting, best = None, None
+    for node in frontier:
+        depth = visited[node][1] + 1
+        for neighbour in graph.neighbours(node):
+            if neighbour in visited:
+                continue
+            visited[neighbour] = (node, depth)
+            next_frontier.append(neighbour)
+            if neighbour in other_visited:
+                length = depth + other_visited[neighbour][1]
+                if best is None or length < best:
+                    meeting, best = neighbour, length
+    return next_frontier, meeting
+
+
+def _walk_back(visited, node):
+    path = []
+    while node is not None:
+        path.append(node)
+        node = visited[node][0]
+    return path
+
+
+def path_steps(graph, path):
+    """Classify each hop of ``path`` as a move to a parent, child or spouse."""
+    steps = []
+    for current, following in zip(path, path[1:]):
+        if following in graph.parents(current):
+            steps.append(PARENT)
+        elif current in graph.parents(following):
+            steps.append(CHILD)
+        else:
+            steps.append(SPOUSE)
+    return steps
+
+
+def _gendered(gender, male, female, neutral):
+    return {'M': male, 'F': female}.get(gender, neutral)
+
+
+def _greats(count):
+    """'great-' prefixes, abbreviated to '4x great-' beyond two."""
+    return 'great-' * count if count <= 2 else f'{count}x great-'
+
+
+def blood_label(up, down, gender, half=False):
+    """Name a blood relative ``up`` generations above and then ``down`` below."""
+    if up == 0 and down == 0:
+        return 'self'
+    if down == 0:
+        base = _gendered(gender, 'father', 'mother', 'parent')
+        return base if up == 1 else _greats(up - 2) + 'grand' + base
+    if up == 0:
+        base = _gendered(gender, 'son', 'daughter', 'child')
+        return base if down == 1 else _greats(down - 2) + 'grand' + base
+    if up == 1 and down == 1:
+        return ('half-' if half else '') + _gendered(gender, 'brother', 'sister', 'sibling')
+    if up == 1:
+        return _greats(down - 2) + _gendered(gender, 'nephew', 'niece', 'nephew/niece')
+    if down == 1:
+        return _greats(up - 2) + _gendered(gender, 'uncle', 'aunt', 'uncle/aunt')
+
+    degree, removed = min(up, down) - 1, abs(up - down)
+    label = (ORDINALS[degree - 1] if degree <= len(ORDINALS) else f'{degree}th') + ' cousin'
+    if removed == 1:
+        label += ' once removed'
+    elif removed == 2:
+        label += ' twice removed'
+    elif removed > 2:
+        label += f' {removed} times removed'
+    return label
+
+
+def _segments(steps):
+    """
+    Split steps into blood segments (up moves followed by down moves) and spouse hops.
+
+    A down move followed by an up move passes through a child to its other parent,
+    so it starts a new segment.
+    """
+    segments = []
+    up = down = start = 0
+    for i, step in enumerate(steps):
+        if step == SPOUSE or (step == PARENT and down):
+            if up or down:
+                segments.append((up, down, start, i))
+            up = down = 0
+            start = i
+            if step == SPOUSE:
+                segments.append((SPOUSE, None, i, i + 1))
+                start = i + 1
+                continue
+        if step == PARENT:
+            up += 1
+        elif step == CHILD:
+            down += 1
+    if up or down:
+        segments.append((up, down, start, len(steps)))
+    return segments
+
+
+def relationship_label(graph, path):
+    """Describe how the last member of ``path`` is related to the first one."""
+    if len(path) == 1:
+        return 'self'
+
+    labels = []
+    for up, down, start, end in _segments(path_steps(graph, path)):
+        gender = graph.genders[path[end]]
+        if up == SPOUSE:
+            labels.append((SPOUSE, _gendered(gender, 'husband', 'wife', 'spouse')))
+            continue
+        half = False
+        if up == 1 and down == 1:
+            # Only call siblings half-siblings when both sets of parents are known
+            first_parents, last_parents = set(graph.parents(path[start])), set(graph.parents(path[end]))
+            half = len(first_parents) == len(last_parents) == 2 and first_parents != last_parents
+        labels.append(((up, down), blood_label(up, down, gender, half)))
+
+    kinds = [kind for kind, _ in labels]
+    gender = graph.genders[path[-1]]
+    if kinds == [SPOUSE, (1, 0)]:
+        return _gendered(gender, 'father', 'mother', 'parent') + '-in-law'
+    if kinds in ([SPOUSE, (1, 1)], [(1, 1), SPOUSE]):
+        return _gendered(gender, 'brother', 'sister', 'sibling') + '-in-law'
+    if kinds == [(0, 1), SPOUSE]:
+        return _gendered(gender, 'son', 'daughter', 'child') + '-in-law'
+    return "'s ".join(label for _, label in labels)
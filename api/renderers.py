@@ -0,0 +1,26 @@
+from rest_framework.renderers import JSONRenderer
+
+
+def to_columns(rows):
+    """Turn a list of dicts into ``{"count": n, "columns": {field: [value per row]}}``."""
+    fields = list(rows[0]) if rows else []
+    return {"count": len(rows), "columns": {field: [row[field] for row in rows] for field in fields}}
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON with each field of a list sent once, as parallel arrays.
+
+    Selected with ``?format=columnar``. A paginated body has its ``results``
+    converted; anything that is not a list of objects, such as a detail or an
+    error, is rendered as plain JSON.
+    """
+    media_type = 'application/vnd.timelessties.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = {**data, 'results': to_columns(data['results'])}
+        elif isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            data = to_columns(data)
+        return super().render(data, accepted_media_type, renderer_context)
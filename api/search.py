@@ -0,0 +1,159 @@
+"""Ranked fuzzy search over family member names."""
+import functools
+import heapq
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest, Lower
+
+from .graph import FamilyGraphCache
+from .models import FamilyMember
+from .names import SIMILARITY_THRESHOLD, WORD_RE, phonetic_key, trigrams
+
+MAX_SEARCH_TOKENS = 5
+RESULT_FIELDS = ['id', 'first_name', 'last_name', 'gender', 'date_of_birth', 'date_of_death']
+
+
+def search_tokens(query):
+    return WORD_RE.findall((query or '').lower())[:MAX_SEARCH_TOKENS]
+
+
+class NameIndex:
+    """
+    In-process trigram and phonetic index over one user's member names.
+
+    Used when pg_trgm is not available. Each name of each member is an entry,
+    numbered ``row * 2 + field``; posting lists map trigrams and phonetic keys to
+    entries, so a search only touches entries that share something with the query.
+    """
+
+    def __init__(self, rows):
+        self.ids = array('q')
+        self.gram_counts = array('l')
+        gram_postings, key_postings = defaultdict(list), defaultdict(list)
+        for member_id, *names in rows:
+            row = len(self.ids)
+            self.ids.append(member_id)
+            for field, name in enumerate(names):
+                entry = row * 2 + field
+                grams = trigrams(name)
+                self.gram_counts.append(len(grams))
+                for gram in grams:
+                    gram_postings[gram].append(entry)
+                key = phonetic_key(name)
+                if key:
+                    key_postings[key].append(entry)
+        self.grams = {gram: array('l', entries) for gram, entries in gram_postings.items()}
+        self.keys = {key: array('l', entries) for key, entries in key_postings.items()}
+
+    @classmethod
+    def load(cls, user_id):
+        return cls(
+            FamilyMember.objects.filter(user_id=user_id).order_by('id').values_list(
+                'id', 'first_name', 'last_name'
+            ).iterator(chunk_size=5000)
+        )
+
+    def token_scores(self, token):
+        """Best score per row for one token: 1.0 on a phonetic key match, else trigram similarity."""
+        token_grams = trigrams(token)
+        shared = defaultdict(int)
+        for gram in token_grams:
+            for entry in self.grams.get(gram, ()):
+                shared[entry] += 1
+        scores = {}
+        for entry, count in shared.items():
+            score = count / (len(token_grams) + self.gram_counts[entry] - count)
+            if score >= SIMILARITY_THRESHOLD and score > scores.get(entry // 2, 0.0):
+                scores[entry // 2] = score
+        for entry in self.keys.get(phonetic_key(token), ()):
+            scores[entry // 2] = 1.0
+        return scores
+
+    def search(self, tokens, limit):
+        """``(member_id, score)`` pairs for members matching every token, best first."""
+        combined = None
+        for token in tokens:
+            scores = self.token_scores(token)
+            if combined is not None:
+                scores = {row: combined[row] + score for row, score in scores.items() if row in combined}
+            combined = scores
+        ranked = heapq.nsmallest(limit, combined.items(), key=lambda item: (-item[1], self.ids[item[0]]))
+        return [(self.ids[row], score / len(tokens)) for row, score in ranked]
+
+    def nbytes(self):
+        """Approximate memory held by the index, used for cache accounting."""
+        postings = sum(len(entries) for entries in self.grams.values()) + sum(
+            len(entries) for entries in self.keys.values()
+        )
+        # Each posting list also costs roughly 150 bytes for its key and array header
+        return (self.ids.itemsize * len(self.ids) + self.gram_counts.itemsize * len(self.gram_counts)
+                + 8 * postings + 150 * (len(self.grams) + len(self.keys)))
+
+
+name_index_cache = FamilyGraphCache(
+    max_bytes=getattr(settings, 'NAME_INDEX_CACHE_MAX_BYTES', 128 * 1024 * 1024),
+    max_age=getattr(settings, 'NAME_INDEX_CACHE_MAX_AGE', 300),
+    loader=NameIndex.load,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def has_pg_trgm(alias='default'):
+    """Whether the database behind ``alias`` is PostgreSQL with pg_trgm installed."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def search_members(user, query, limit):
+    """
+    Rank ``user``'s members whose names match every word of ``query``.
+
+    A word matches a name when their phonetic keys are equal (scoring 1.0) or their
+    trigram similarity reaches pg_trgm's default threshold; a member's score is the
+    mean of its best score per word. Runs in the database with pg_trgm, otherwise
+    against a cached in-process index.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+    queryset = FamilyMember.objects.filter(user=user)
+    if has_pg_trgm(queryset.db):
+        return list(_search_postgres(queryset, tokens).values(*RESULT_FIELDS, 'score')[:limit])
+
+    ranked = name_index_cache.get(user.id).search(tokens, limit)
+    rows = {row['id']: row for row in queryset.filter(id__in=[member_id for member_id, _ in ranked])
+            .values(*RESULT_FIELDS)}
+    return [{**rows[member_id], 'score': score} for member_id, score in ranked if member_id in rows]
+
+
+def _search_postgres(queryset, tokens):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    table = connections[queryset.db].ops.quote_name(FamilyMember._meta.db_table)
+    scores = []
+    for token in tokens:
+        key = phonetic_key(token)
+        key_match = Q(first_name_key=key) | Q(last_name_key=key) if key else Q(pk__in=[])
+        # The % operator lets PostgreSQL use the trigram GIN indexes on the lowercased names
+        trigram_match = Q(RawSQL(
+            f"LOWER({table}.first_name) %% %s OR LOWER({table}.last_name) %% %s",
+            [token, token],
+            output_field=BooleanField(),
+        ))
+        queryset = queryset.filter(key_match | trigram_match)
+        scores.append(Greatest(
+            Case(When(key_match, then=Value(1.0)), default=Value(0.0), output_field=FloatField()),
+            TrigramSimilarity(Lower('first_name'), token),
+            TrigramSimilarity(Lower('last_name'), token),
+        ))
+    score = sum(scores[1:], scores[0]) / Value(float(len(tokens)))
+    return queryset.annotate(score=score).order_by('-score', 'id')
@@ -5,8 +5,9 @@ from .models import (
     Chiefdom,
     Village,
     Location,
-    FamilyTree, Event
+    FamilyTree, Event, GenderChoices, DuplicateCandidate
 )
+from .places import resolve_chiefdom, resolve_location, resolve_village
 
 User = get_user_model()
 
@@ -33,25 +34,10 @@ class VillageSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'chiefdom']
 
     def create(self, validated_data):
-        chiefdom_name = validated_data.pop('chiefdom').strip()
-        chiefdom, created = Chiefdom.objects.get_or_create(name__iexact=chiefdom_name)
-        validated_data['chiefdom'] = chiefdom
-        village_name = validated_data['name'].strip()
-
-        # Perform case-insensitive search for Village
-        village = Village.objects.filter(
-            name__iexact=village_name,
-            chiefdom=chiefdom
-        ).first()
-
-        if village:
-            return village
-        else:
-            # Create Village with exact name (preserving case)
-            return Village.objects.create(
-                name=village_name,
-                chiefdom=chiefdom
-            )
+        chiefdom_id = resolve_chiefdom(validated_data.pop('chiefdom'))
+        # Case-insensitive match on the name, creating the Village with its exact name otherwise
+        village_id = resolve_village(validated_data['name'], chiefdom_id)
+        return Village.objects.select_related('chiefdom').get(id=village_id)
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -107,47 +93,30 @@ class FamilyMemberSerializer(serializers.ModelSerializer):
 
         # Handle chiefdom_of_origin
         if chiefdom_name:
-            chiefdom_name = chiefdom_name.strip()
-            chiefdom, created = Chiefdom.objects.get_or_create(name__iexact=chiefdom_name)
-            validated_data['chiefdom_of_origin'] = chiefdom
+            chiefdom_id = resolve_chiefdom(chiefdom_name)
+            validated_data['chiefdom_of_origin_id'] = chiefdom_id
         else:
-            chiefdom = None
+            chiefdom_id = None
 
         # Handle village_of_origin
         if village_data:
-            village_name = village_data.get('name', '').strip()
             village_chiefdom_name = village_data.get('chiefdom', '').strip()
 
             # Determine the chiefdom to associate with the village
             if village_chiefdom_name:
-                village_chiefdom, created = Chiefdom.objects.get_or_create(name__iexact=village_chiefdom_name)
+                village_chiefdom_id = resolve_chiefdom(village_chiefdom_name)
             else:
-                village_chiefdom = chiefdom  # Use chiefdom_of_origin if village chiefdom not provided
+                village_chiefdom_id = chiefdom_id  # Use chiefdom_of_origin if village chiefdom not provided
 
-            if not village_chiefdom:
+            if not village_chiefdom_id:
                 raise serializers.ValidationError("Chiefdom is required to set village_of_origin.")
 
-            # Perform case-insensitive search for Village
-            village = Village.objects.filter(
-                name__iexact=village_name,
-                chiefdom=village_chiefdom
-            ).first()
-
-            if village:
-                validated_data['village_of_origin'] = village
-            else:
-                # Create Village with exact name (preserving case)
-                village = Village.objects.create(
-                    name=village_name,
-                    chiefdom=village_chiefdom
-                )
-                validated_data['village_of_origin'] = village
+            # Case-insensitive match on the name, creating the Village with its exact name otherwise
+            validated_data['village_of_origin_id'] = resolve_village(village_data.get('name', ''), village_chiefdom_id)
 
         # Handle current_location
         if location_name:
-            location_name = location_name.strip()
-            location, created = Location.objects.get_or_create(name__iexact=location_name)
-            validated_data['current_location'] = location
+            validated_data['current_location_id'] = resolve_location(location_name)
 
         # Create the FamilyMember instance
         family_member = super().create(validated_data)
@@ -163,47 +132,30 @@ class FamilyMemberSerializer(serializers.ModelSerializer):
 
         # Handle chiefdom_of_origin
         if chiefdom_name is not None:
-            chiefdom_name = chiefdom_name.strip()
-            chiefdom, created = Chiefdom.objects.get_or_create(name__iexact=chiefdom_name)
-            validated_data['chiefdom_of_origin'] = chiefdom
+            chiefdom_id = resolve_chiefdom(chiefdom_name)
+            validated_data['chiefdom_of_origin_id'] = chiefdom_id
         else:
-            chiefdom = instance.chiefdom_of_origin
+            chiefdom_id = instance.chiefdom_of_origin_id
 
         # Handle village_of_origin
         if village_data is not None:
-            village_name = village_data.get('name', '').strip()
             village_chiefdom_name = village_data.get('chiefdom', '').strip()
 
             # Determine the chiefdom to associate with the village
             if village_chiefdom_name:
-                village_chiefdom, created = Chiefdom.objects.get_or_create(name__iexact=village_chiefdom_name)
+                village_chiefdom_id = resolve_chiefdom(village_chiefdom_name)
             else:
-                village_chiefdom = chiefdom  # Use chiefdom_of_origin if village chiefdom not provided
+                village_chiefdom_id = chiefdom_id  # Use chiefdom_of_origin if village chiefdom not provided
 
-            if not village_chiefdom:
+            if not village_chiefdom_id:
                 raise serializers.ValidationError("Chiefdom is required to set village_of_origin.")
 
-            # Perform case-insensitive search for Village
-            village = Village.objects.filter(
-                name__iexact=village_name,
-                chiefdom=village_chiefdom
-            ).first()
-
-            if village:
-                validated_data['village_of_origin'] = village
-            else:
-                # Create Village with exact name (preserving case)
-                village = Village.objects.create(
-                    name=village_name,
-                    chiefdom=village_chiefdom
-                )
-                validated_data['village_of_origin'] = village
+            # Case-insensitive match on the name, creating the Village with its exact name otherwise
+            validated_data['village_of_origin_id'] = resolve_village(village_data.get('name', ''), village_chiefdom_id)
 
         # Handle current_location
         if location_name is not None:
-            location_name = location_name.strip()
-            location, created = Location.objects.get_or_create(name__iexact=location_name)
-            validated_data['current_location'] = location
+            validated_data['current_location_id'] = resolve_location(location_name)
 
         # Update the FamilyMember instance
         family_member = super().update(instance, validated_data)
@@ -227,17 +179,124 @@ class FamilyMemberSerializer(serializers.ModelSerializer):
 
 
 class FamilyTreeSerializer(serializers.ModelSerializer):
-    """Serializer for FamilyTree."""
+    """
+    Serializer for FamilyTree.
+
+    Members are listed through ``/family-trees/{id}/members/``; the counts are
+    annotated by the view.
+    """
 
-    members = FamilyMemberSerializer(many=True, read_only=True)
+    member_count = serializers.IntegerField(read_only=True, default=0)
+    living_count = serializers.IntegerField(read_only=True, default=0)
+    generation_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = FamilyTree
-        fields = ["id", "name", "description", "owner", "members"]
+        fields = ["id", "name", "description", "owner", "member_count", "living_count", "generation_count"]
         read_only_fields = ["owner"]
 
 
+class TreeMembersSerializer(serializers.Serializer):
+    """Validates the member ids added to or removed from a tree."""
+    member_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=1000)
+
+
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = ['id', 'family_member', 'event_type', 'date', 'description']
+
+    def validate_family_member(self, member):
+        request = self.context.get('request')
+        if request is not None and member.user_id != request.user.id:
+            raise serializers.ValidationError("Unknown family member.")
+        return member
+
+
+class BulkEventSerializer(serializers.Serializer):
+    """
+    One row of a bulk event write.
+
+    ``family_member`` is a plain id; ownership is checked for the whole batch at
+    once rather than with a query per row.
+    """
+    family_member = serializers.IntegerField()
+    event_type = serializers.ChoiceField(choices=Event.EVENT_TYPES)
+    date = serializers.DateField()
+    description = serializers.CharField(allow_blank=True, required=False, default='')
+
+
+class KinshipRequestSerializer(serializers.Serializer):
+    """Validates a batch of family member id pairs for kinship calculation."""
+    pairs = serializers.ListField(
+        child=serializers.ListField(child=serializers.IntegerField(), min_length=2, max_length=2),
+        min_length=1,
+        max_length=5000
+    )
+
+
+class MemberReferenceField(serializers.Field):
+    """An existing family member id (integer) or a temp id (string) declared in the same batch."""
+
+    default_error_messages = {
+        'invalid': 'Expected a family member id or a temp id string.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)) or data == '':
+            self.fail('invalid')
+        return data
+
+    def to_representation(self, value):
+        return value
+
+
+class BulkVillageSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    chiefdom = serializers.CharField(required=False, allow_blank=True)
+
+
+class BulkFamilyMemberSerializer(serializers.Serializer):
+    """
+    One row of a bulk family member write.
+
+    Rows with an ``id`` update that member with the fields given; other rows create
+    a member and may declare a ``temp_id`` for other rows to reference as a parent
+    or spouse.
+    """
+    id = serializers.IntegerField(required=False)
+    temp_id = serializers.CharField(required=False, max_length=100)
+    first_name = serializers.CharField(allow_null=True, required=False, max_length=50)
+    last_name = serializers.CharField(allow_null=True, required=False, max_length=50)
+    gender = serializers.ChoiceField(choices=GenderChoices.choices, allow_null=True, required=False)
+    date_of_birth = serializers.DateField(allow_null=True, required=False)
+    date_of_death = serializers.DateField(allow_null=True, required=False)
+    history = serializers.CharField(allow_blank=True, required=False)
+    mother = MemberReferenceField(allow_null=True, required=False)
+    father = MemberReferenceField(allow_null=True, required=False)
+    spouses = serializers.ListField(child=MemberReferenceField(), required=False)
+    chiefdom_of_origin = serializers.CharField(allow_null=True, allow_blank=True, required=False)
+    village_of_origin = BulkVillageSerializer(allow_null=True, required=False)
+    current_location = serializers.CharField(allow_null=True, allow_blank=True, required=False)
+
+    def validate(self, data):
+        if 'id' in data and 'temp_id' in data:
+            raise serializers.ValidationError("Use either id to update a member or temp_id to create one, not both.")
+        return data
+
+
+class DuplicateMemberSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FamilyMember
+        fields = ['id', 'first_name', 'last_name', 'gender', 'date_of_birth', 'mother', 'father']
+
+
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    """A possible duplicate pair; reviewers only change its status."""
+    first = DuplicateMemberSerializer(read_only=True)
+    second = DuplicateMemberSerializer(read_only=True)
+
+    class Meta:
+        model = DuplicateCandidate
+        fields = ['id', 'first', 'second', 'score', 'evidence', 'status', 'created_at']
+        read_only_fields = ['score', 'evidence', 'created_at']
@@ -0,0 +1,115 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .ancestry import update_ancestry
+from .caching import PLACES, bump_revision, invalidate_member_data
+from .duplicates import find_duplicates_of, save_candidates
+from .graph import graph_cache
+from .models import Chiefdom, Event, FamilyMember, FamilyTree, Location, Village
+from .names import set_name_keys
+from .places import chiefdom_resolver, location_resolver, village_resolver
+
+
+@receiver(pre_save, sender=FamilyMember)
+def update_name_keys(sender, instance, **kwargs):
+    set_name_keys(instance)
+
+
+@receiver(post_init, sender=FamilyMember)
+def remember_parents(sender, instance, **kwargs):
+    instance._saved_parents = (instance.mother_id, instance.father_id)
+
+
+@receiver(post_save, sender=FamilyMember)
+def update_ancestry_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keep the ancestry closure table in sync when a member's parents change."""
+    if raw:
+        return  # Fixture loading; run rebuild_ancestry afterwards
+    parents = (instance.mother_id, instance.father_id)
+    if created or parents != instance._saved_parents:
+        update_ancestry([instance.id])
+    instance._saved_parents = parents
+
+
+@receiver(post_save, sender=FamilyMember)
+def check_new_member_for_duplicates(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: save_candidates(find_duplicates_of(instance)))
+
+
+@receiver(pre_delete, sender=FamilyMember)
+def remember_children(sender, instance, **kwargs):
+    instance._child_ids = list(
+        FamilyMember.objects.filter(Q(mother=instance) | Q(father=instance)).values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=FamilyMember)
+def update_ancestry_on_delete(sender, instance, **kwargs):
+    # Children lost this parent through SET_NULL, which does not send post_save
+    update_ancestry(getattr(instance, '_child_ids', []))
+
+
+@receiver(post_save, sender=FamilyMember)
+@receiver(post_delete, sender=FamilyMember)
+def invalidate_member_caches(sender, instance, **kwargs):
+    invalidate_member_data(instance.user_id)
+
+
+@receiver(m2m_changed, sender=FamilyMember.spouses.through)
+def invalidate_graph_cache_on_spouses_change(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        transaction.on_commit(partial(graph_cache.invalidate, instance.user_id))
+        bump_revision(instance.user_id)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def bump_revision_on_event_change(sender, instance, **kwargs):
+    # Read the owner directly: during a cascading delete the member may already be gone
+    for user_id in FamilyMember.objects.filter(id=instance.family_member_id).values_list('user_id', flat=True):
+        bump_revision(user_id)
+
+
+@receiver(post_save, sender=FamilyTree)
+@receiver(post_delete, sender=FamilyTree)
+def bump_revision_on_tree_change(sender, instance, **kwargs):
+    bump_revision(instance.owner_id)
+
+
+@receiver(m2m_changed, sender=FamilyTree.members.through)
+def bump_revision_on_tree_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Changed from the member's side: instance is a FamilyMember and pk_set holds tree ids
+        owner_ids = set(FamilyTree.objects.filter(pk__in=pk_set or ()).values_list('owner_id', flat=True))
+        for owner_id in owner_ids | {instance.user_id}:
+            bump_revision(owner_id)
+    else:
+        bump_revision(instance.owner_id)
+
+
+@receiver(post_save, sender=Chiefdom)
+@receiver(post_delete, sender=Chiefdom)
+def forget_cached_chiefdom(sender, instance, **kwargs):
+    chiefdom_resolver.forget(instance.id)
+    bump_revision(PLACES)
+
+
+@receiver(post_save, sender=Village)
+@receiver(post_delete, sender=Village)
+def forget_cached_village(sender, instance, **kwargs):
+    village_resolver.forget(instance.id)
+    bump_revision(PLACES)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def forget_cached_location(sender, instance, **kwargs):
+    location_resolver.forget(instance.id)
+    bump_revision(PLACES)
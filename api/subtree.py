@@ -0,0 +1,114 @@
+"""Lazy, depth-limited expansion of a family member's descendants."""
+import base64
+import binascii
+import json
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import FamilyMember
+
+MAX_SUBTREE_DEPTH = 10
+DEFAULT_SIBLING_PAGE_SIZE = 50
+MAX_SIBLING_PAGE_SIZE = 500
+
+NODE_FIELDS = ('id', 'first_name', 'last_name', 'gender', 'date_of_birth', 'date_of_death', 'mother', 'father')
+PARENT_COLUMNS = ('mother', 'father')
+
+
+def encode_cursor(parent_id, after_id):
+    return base64.urlsafe_b64encode(json.dumps([parent_id, after_id]).encode()).decode()
+
+
+def decode_cursor(cursor, parent_id):
+    """Return the last seen child id from a cursor issued for ``parent_id``."""
+    try:
+        cursor_parent_id, after_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if cursor_parent_id != parent_id or not isinstance(after_id, int):
+        raise ValueError("Invalid cursor.")
+    return after_id
+
+
+def _child_counts(queryset, member_ids):
+    counts = Counter()
+    for column in PARENT_COLUMNS:
+        counts.update(dict(
+            queryset.filter(**{f'{column}__in': member_ids}).order_by().values(column).annotate(
+                child_count=Count('id')
+            ).values_list(column, 'child_count')
+        ))
+    return counts
+
+
+def _spouse_ids(member_ids):
+    spouses = defaultdict(list)
+    for member_id, spouse_id in FamilyMember.spouses.through.objects.filter(
+            from_familymember_id__in=member_ids
+    ).values_list('from_familymember_id', 'to_familymember_id').order_by('to_familymember_id'):
+        spouses[member_id].append(spouse_id)
+    return spouses
+
+
+def _sibling_pages(queryset, parent_ids, page_size, after=None):
+    """
+    Fetch at most ``page_size + 1`` children per parent, ordered by id.
+
+    A child whose mother and father are both in ``parent_ids`` is listed under
+    each, as the same dict.
+    """
+    pages = defaultdict(dict)
+    nodes = {}
+    for column in PARENT_COLUMNS:
+        children = queryset.filter(**{f'{column}__in': parent_ids})
+        if after is not None:
+            children = children.filter(id__gt=after)
+        children = children.annotate(
+            sibling_rank=Window(RowNumber(), partition_by=F(column), order_by=F('id').asc())
+        ).filter(sibling_rank__lte=page_size + 1).values(*NODE_FIELDS)
+        for child in children:
+            pages[child[column]][child['id']] = nodes.setdefault(child['id'], child)
+    return {
+        parent_id: [children[child_id] for child_id in sorted(children)[:page_size + 1]]
+        for parent_id, children in pages.items()
+    }
+
+
+def expand_subtree(queryset, root, depth, page_size=DEFAULT_SIBLING_PAGE_SIZE, after=None):
+    """
+    Return ``root`` with its descendants expanded ``depth`` generations deep.
+
+    Every node carries ``child_count`` and ``has_children``; expanded nodes also get a
+    page of ``children`` and a ``children_cursor`` when more siblings remain. The
+    number of queries grows with ``depth`` only, never with the width of the tree.
+    ``after`` skips the root's children up to and including that id.
+    """
+    root_node = {field: getattr(root, f'{field}_id' if field in PARENT_COLUMNS else field) for field in NODE_FIELDS}
+    level = [root_node]
+    for remaining in range(depth, -1, -1):
+        member_ids = [node['id'] for node in level]
+        counts = _child_counts(queryset, member_ids)
+        spouses = _spouse_ids(member_ids)
+        for node in level:
+            node['spouses'] = spouses[node['id']]
+            node['child_count'] = counts[node['id']]
+            node['has_children'] = node['child_count'] > 0
+        if remaining == 0:
+            break
+
+        parent_ids = [node['id'] for node in level if node['has_children']]
+        pages = _sibling_pages(queryset, parent_ids, page_size, after) if parent_ids else {}
+        next_level = {}
+        for node in level:
+            children = pages.get(node['id'], [])
+            node['children'] = children[:page_size]
+            node['children_cursor'] = (
+                encode_cursor(node['id'], children[page_size - 1]['id']) if len(children) > page_size else None
+            )
+            for child in node['children']:
+                next_level.setdefault(child['id'], child)
+        level = list(next_level.values())
+        after = None  # Only the root's sibling set is resumed from the cursor
+    return root_node
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..ancestry import common_ancestors, is_ancestor, rebuild_ancestry
+from ..models import FamilyMember, FamilyMemberAncestry
+
+User = get_user_model()
+
+
+class FamilyMemberAncestryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.grandfather = self.create_member("Tendai")
+        self.grandmother = self.create_member("Rudo", gender="F")
+        self.father = self.create_member("Farai", mother=self.grandmother, father=self.grandfather)
+        self.aunt = self.create_member("Chipo", gender="F", mother=self.grandmother, father=self.grandfather)
+        self.son = self.create_member("Kuda", father=self.father)
+        self.niece = self.create_member("Nyasha", gender="F", mother=self.aunt)
+
+    def create_member(self, first_name, gender="M", **parents):
+        return FamilyMember.objects.create(
+            first_name=first_name, last_name="Moyo", gender=gender, user=self.user, **parents
+        )
+
+    def closure(self):
+        return set(FamilyMemberAncestry.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def test_rows_created_on_save(self):
+        self.assertEqual(
+            set(FamilyMemberAncestry.objects.filter(descendant=self.son).values_list('ancestor_id', 'depth')),
+            {(self.father.id, 1), (self.grandfather.id, 2), (self.grandmother.id, 2)}
+        )
+        self.assertTrue(is_ancestor(self.grandmother.id, self.niece.id))
+        self.assertFalse(is_ancestor(self.father.id, self.niece.id))
+
+    def test_parent_change_updates_descendants(self):
+        great_grandfather = self.create_member("Sekuru")
+        self.grandfather.father = great_grandfather
+        self.grandfather.save()
+        self.assertEqual(
+            FamilyMemberAncestry.objects.get(ancestor=great_grandfather, descendant=self.son).depth, 3
+        )
+
+        self.father.father = None
+        self.father.save()
+        self.assertFalse(is_ancestor(self.grandfather.id, self.son.id))
+        self.assertTrue(is_ancestor(self.grandmother.id, self.son.id))
+
+    def test_delete_removes_lineage_through_member(self):
+        self.father.delete()
+        self.assertFalse(FamilyMemberAncestry.objects.filter(descendant=self.son).exists())
+
+    def test_common_ancestors(self):
+        self.assertEqual(
+            common_ancestors(self.son.id, self.niece.id),
+            {self.grandfather.id: (2, 2), self.grandmother.id: (2, 2)}
+        )
+
+    def test_shortest_depth_kept_for_pedigree_collapse(self):
+        # Cousins marry; their child reaches the grandparents through both parents
+        child = self.create_member("Tawanda", mother=self.niece, father=self.son)
+        self.assertEqual(FamilyMemberAncestry.objects.get(ancestor=self.grandfather, descendant=child).depth, 3)
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        self.create_member("Tawanda", mother=self.niece, father=self.son)
+        expected = self.closure()
+        FamilyMemberAncestry.objects.all().delete()
+        self.assertEqual(rebuild_ancestry(), len(expected))
+        self.assertEqual(self.closure(), expected)
+
+    def test_rebuild_command(self):
+        expected = self.closure()
+        FamilyMemberAncestry.objects.all().delete()
+        call_command('rebuild_ancestry', stdout=StringIO())
+        self.assertEqual(self.closure(), expected)
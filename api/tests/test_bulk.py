@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..ancestry import is_ancestor
+from ..models import Chiefdom, DuplicateCandidate, FamilyMember, Location, Village
+
+User = get_user_model()
+
+
+class FamilyMemberBulkAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('familymember-bulk')
+        self.chiefdom = Chiefdom.objects.create(name="Chivero")
+        self.grandfather = FamilyMember.objects.create(first_name="John", last_name="Zvihwati", user=self.user)
+
+    def test_create_household_with_forward_references(self):
+        payload = {"members": [
+            {"temp_id": "child", "first_name": "Kuda", "last_name": "Zvihwati",
+             "mother": "mother", "father": "father"},
+            {"temp_id": "father", "first_name": "Tendai", "last_name": "Zvihwati", "gender": "M",
+             "father": self.grandfather.id, "spouses": ["mother"],
+             "chiefdom_of_origin": "chivero", "village_of_origin": {"name": "Gumboreshumba"},
+             "current_location": "Harare"},
+            {"temp_id": "mother", "first_name": "Rudo", "last_name": "Moyo", "gender": "F",
+             "current_location": "harare ", "village_of_origin": {"name": "gumboreshumba", "chiefdom": "CHIVERO"}},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['temp_id'] for result in results], ['child', 'father', 'mother'])
+        self.assertTrue(all(result['created'] for result in results))
+        child = FamilyMember.objects.get(id=results[0]['id'])
+        father = FamilyMember.objects.get(id=results[1]['id'])
+        mother = FamilyMember.objects.get(id=results[2]['id'])
+        self.assertEqual((child.mother_id, child.father_id), (mother.id, father.id))
+        self.assertEqual(list(father.spouses.all()), [mother])
+        self.assertEqual(list(mother.spouses.all()), [father])
+
+        # Place names are matched case-insensitively and created once
+        self.assertEqual(Chiefdom.objects.count(), 1)
+        self.assertEqual(father.chiefdom_of_origin, self.chiefdom)
+        self.assertEqual(Village.objects.count(), 1)
+        self.assertEqual(father.village_of_origin_id, mother.village_of_origin_id)
+        self.assertEqual(Location.objects.get().name, "Harare")
+        self.assertEqual(father.current_location_id, mother.current_location_id)
+
+        self.assertTrue(is_ancestor(self.grandfather.id, child.id))
+
+    def test_created_members_are_checked_for_duplicates(self):
+        payload = {"members": [{"first_name": self.grandfather.first_name, "last_name": self.grandfather.last_name}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(
+            list(DuplicateCandidate.objects.values_list('first_id', 'second_id')),
+            [(self.grandfather.id, response.data['results'][0]['id'])],
+        )
+
+    def test_update_existing_members(self):
+        father = FamilyMember.objects.create(first_name="Tendai", user=self.user)
+        payload = {"members": [
+            {"id": father.id, "last_name": "Zvihwati", "father": self.grandfather.id},
+            {"temp_id": "child", "first_name": "Kuda", "father": father.id},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['results'][0]['created'])
+        father.refresh_from_db()
+        self.assertEqual((father.first_name, father.last_name), ("Tendai", "Zvihwati"))
+        self.assertEqual(father.father, self.grandfather)
+        self.assertTrue(is_ancestor(self.grandfather.id, response.data['results'][1]['id']))
+
+    def test_errors_are_reported_per_row_and_nothing_is_saved(self):
+        other_member = FamilyMember.objects.create(
+            first_name="Other", user=User.objects.create_user(username='other', password='pass')
+        )
+        payload = {"members": [
+            {"temp_id": "ok", "first_name": "Kuda"},
+            {"temp_id": "bad-gender", "gender": "X"},
+            {"temp_id": "bad-refs", "mother": "missing", "father": other_member.id},
+            {"temp_id": "ok", "first_name": "Duplicate"},
+            {"id": other_member.id, "first_name": "Stolen"},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['members']
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(errors[0], {})
+        self.assertIn('gender', errors[1])
+        self.assertEqual(set(errors[2]), {'mother', 'father'})
+        self.assertIn('temp_id', errors[3])
+        self.assertIn('id', errors[4])
+        self.assertEqual(FamilyMember.objects.filter(user=self.user).count(), 1)
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        def payload(size):
+            return {"members": [
+                {"temp_id": f"m{i}", "first_name": f"Member {i}", "chiefdom_of_origin": f"Chiefdom {i}",
+                 "current_location": f"Location {i}", "father": self.grandfather.id, "spouses": [f"m{i ^ 1}"]}
+                for i in range(size)
+            ]}
+
+        self.assertEqual(self.client.post(self.url, payload(6), format='json').status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(18):
+            response = self.client.post(self.url, payload(50), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(FamilyMember.objects.filter(user=self.user).count(), 57)
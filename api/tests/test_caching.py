@@ -0,0 +1,199 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils.http import parse_http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import TieredCache, get_last_modified, get_revision, response_cache
+from ..models import Chiefdom, Event, FamilyMember, FamilyTree, Location
+
+User = get_user_model()
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.member = FamilyMember.objects.create(first_name="John", last_name="Zvihwati", user=self.user)
+        self.list_url = reverse('familymember-list')
+
+    def test_hits_until_a_write_bumps_the_revision(self):
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):  # The revisions, read together
+            response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(response.json()['results']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FamilyMember.objects.create(first_name="Jane", last_name="Zvihwati", user=self.user)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_entries_are_per_user(self):
+        self.client.get(self.list_url)
+        other = User.objects.create_user(username='other', password='pass')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_tree_headers_are_replayed(self):
+        url = reverse('familytree-detail', args=['zvihwati'])
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['X-Total-Count'], '1')
+
+    def test_events_and_trees_bump_the_revision(self):
+        revision = get_revision(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(family_member=self.member, event_type='BIRTH', date='1950-01-01')
+        self.assertGreater(get_revision(self.user.id), revision)
+
+        revision = get_revision(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            tree = FamilyTree.objects.create(name="Zvihwati", owner=self.user)
+            tree.members.add(self.member)
+        self.assertEqual(get_revision(self.user.id), revision + 2)
+
+    def test_renaming_a_place_bumps_the_places_revision(self):
+        chiefdom = Chiefdom.objects.create(name="Chivero")
+        self.member.chiefdom_of_origin = chiefdom
+        self.member.save()
+        self.client.get(self.list_url)
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'HIT')
+
+        chiefdom.name = "Chivhu"
+        with self.captureOnCommitCallbacks(execute=True):
+            chiefdom.save()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['chiefdom_of_origin'], "Chivhu")
+
+    def test_stats(self):
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        self.assertEqual(self.client.get(reverse('cache-stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+        stats = self.client.get(reverse('cache-stats')).data['views']['FamilyMemberViewSet.list']
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache(
+            LocMemCache('tiered-local', {}), LocMemCache('tiered-shared', {}), local_timeout=30, poll_interval=0.01
+        )
+        self.cache.clear()
+
+    def test_expired_entries_are_served_stale_while_one_caller_rebuilds(self):
+        self.assertEqual(self.cache.get_or_build('key', lambda: 'v1', timeout=0), ('v1', 'MISS'))
+        self.cache.shared.add('key:lock', 'another-worker')
+        self.assertEqual(self.cache.get_or_build('key', lambda: 'v2', timeout=60), ('v1', 'STALE'))
+
+        self.cache.shared.delete('key:lock')
+        self.assertEqual(self.cache.get_or_build('key', lambda: 'v2', timeout=60), ('v2', 'MISS'))
+        self.assertEqual(self.cache.get_or_build('key', lambda: 'v3', timeout=60), ('v2', 'HIT'))
+
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_build('key', build, timeout=60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(state for _, state in results), ['HIT'] * 7 + ['MISS'])
+
+    def test_slow_builds_do_not_hold_up_other_keys(self):
+        started = threading.Event()
+
+        def slow_build():
+            started.set()
+            time.sleep(0.5)
+            return 'slow'
+
+        thread = threading.Thread(target=self.cache.get_or_build, args=('slow', slow_build), kwargs={'timeout': 60})
+        thread.start()
+        started.wait()
+        start = time.monotonic()
+        for i in range(64):
+            self.cache.get_or_build(f'key{i}', lambda: 'value', timeout=60)
+        self.assertLess(time.monotonic() - start, 0.4)
+        thread.join()
+
+    def test_waits_for_a_build_in_another_process(self):
+        self.cache.shared.add('key:lock', 'another-worker')
+        threading.Timer(0.05, lambda: self.cache.shared.set('key', ('theirs', time.time() + 60))).start()
+        self.assertEqual(self.cache.get_or_build('key', lambda: 'ours', timeout=60), ('theirs', 'HIT'))
+
+    def test_none_is_not_cached(self):
+        self.assertEqual(self.cache.get_or_build('key', lambda: None, timeout=60), (None, 'MISS'))
+        self.assertEqual(self.cache.get_or_build('key', lambda: 'value', timeout=60), ('value', 'MISS'))
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        FamilyMember.objects.create(first_name="John", last_name="Zvihwati", user=self.user)
+        self.list_url = reverse('familymember-list')
+
+    def test_matching_etag_gets_304_from_the_revisions_alone(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get(self.list_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            FamilyMember.objects.create(first_name="Jane", last_name="Zvihwati", user=self.user)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_place_changes_change_the_etag(self):
+        etag = self.client.get(self.list_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Location.objects.create(name="Harare")
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified_is_not_before_the_last_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            FamilyMember.objects.create(first_name="Jane", last_name="Zvihwati", user=self.user)
+        last_modified = parse_http_date(self.client.get(self.list_url)['Last-Modified'])
+        self.assertGreaterEqual(last_modified, get_last_modified(self.user.id))
+
+    def test_clan_tree_honours_if_modified_since(self):
+        url = reverse('familytree-detail', args=['zvihwati'])
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(self.list_url)['ETag'], etag)
@@ -0,0 +1,129 @@
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..duplicates import (
+    Record, find_candidates, find_duplicates_among, find_duplicates_of, iter_records, score_pair,
+)
+from ..models import Chiefdom, DuplicateCandidate, FamilyMember
+
+User = get_user_model()
+
+
+def record(member_id, first_name, last_name, **fields):
+    from ..names import phonetic_key
+    values = dict.fromkeys(Record._fields)
+    values.update(id=member_id, user_id=1, first_name=first_name, last_name=last_name,
+                  first_name_key=phonetic_key(first_name), last_name_key=phonetic_key(last_name), **fields)
+    return Record(**values)
+
+
+class ScorePairTest(TestCase):
+    def test_variant_spellings_with_matching_details(self):
+        a = record(1, "Tendai", "Zvihwati", date_of_birth=datetime.date(1950, 1, 1), mother_id=10)
+        b = record(2, "Tendayi", "Zvivhati", date_of_birth=datetime.date(1950, 1, 1), mother_id=10)
+        score, evidence = score_pair(a, b)
+        self.assertGreater(score, 0.8)
+        self.assertEqual(evidence['date_of_birth'], 1.0)
+        self.assertNotIn('father', evidence)
+
+    def test_conflicting_details_lower_the_score(self):
+        a = record(1, "Tendai", "Moyo", date_of_birth=datetime.date(1950, 1, 1), mother_id=10)
+        b = record(2, "Tendai", "Moyo", date_of_birth=datetime.date(1958, 1, 1), mother_id=11)
+        self.assertLess(score_pair(a, b)[0], 0.6)
+
+    def test_impossible_pairs(self):
+        self.assertIsNone(score_pair(record(1, "Rudo", "Moyo", gender='F'), record(2, "Rudo", "Moyo", gender='M')))
+        self.assertIsNone(score_pair(record(1, "Rudo", "Moyo"), record(2, "Rudo", "Moyo", mother_id=1)))
+
+
+class FindCandidatesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        chiefdom = Chiefdom.objects.create(name="Chivero")
+        self.tendai = FamilyMember.objects.create(
+            first_name="Tendai", last_name="Zvihwati", date_of_birth="1950-01-01", user=self.user
+        )
+        self.duplicate = FamilyMember.objects.create(
+            first_name="Tendai", last_name="Zvivhati", date_of_birth="1950-01-01", user=self.user
+        )
+        FamilyMember.objects.create(
+            first_name="Rudo", last_name="Zvihwati", date_of_birth="1952-01-01", user=self.user,
+            chiefdom_of_origin=chiefdom
+        )
+        FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", date_of_birth="1950-01-01", user=self.user)
+
+    def test_only_blocked_pairs_are_scored(self):
+        stats = {}
+        candidates = list(find_candidates(iter_records(FamilyMember.objects.all()), stats=stats))
+        self.assertEqual([(a.id, b.id) for a, b, *_ in candidates], [(self.tendai.id, self.duplicate.id)])
+        # Tendai Moyo has another surname, so it is never compared with the Zvihwatis
+        self.assertEqual(stats['pairs'], 3)
+
+    def test_oversized_blocks_are_skipped(self):
+        stats = {}
+        list(find_candidates(iter_records(FamilyMember.objects.all()), max_block_size=1, stats=stats))
+        self.assertEqual(stats['pairs'], 0)
+        self.assertGreater(stats['skipped_blocks'], 0)
+
+    def test_incremental_check_runs_after_create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            member = FamilyMember.objects.create(first_name="Tendayi", last_name="Zvihwati", user=self.user)
+        self.assertEqual(len(find_duplicates_of(member)), 2)
+        self.assertEqual(
+            set(DuplicateCandidate.objects.values_list('first_id', 'second_id')),
+            {(self.tendai.id, member.id), (self.duplicate.id, member.id)},
+        )
+
+    def test_batch_check_only_scores_pairs_with_new_members(self):
+        member = FamilyMember.objects.create(first_name="Tendayi", last_name="Zvihwati", user=self.user)
+        candidates = find_duplicates_among([member.id])
+        self.assertEqual(
+            {(a.id, b.id) for a, b, *_ in candidates}, {(self.tendai.id, member.id), (self.duplicate.id, member.id)}
+        )
+
+    def test_command_keeps_reviewed_candidates(self):
+        call_command('find_duplicates', stdout=io.StringIO())
+        candidate = DuplicateCandidate.objects.get()
+        candidate.status = 'DISMISSED'
+        candidate.save()
+        out = io.StringIO()
+        call_command('find_duplicates', user='testuser', stdout=out)
+        self.assertIn("found 1 candidates", out.getvalue())
+        self.assertEqual(DuplicateCandidate.objects.get().status, 'DISMISSED')
+
+
+class DuplicateCandidateAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        first = FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", user=self.user)
+        second = FamilyMember.objects.create(first_name="Tendai", last_name="Mooyo", user=self.user)
+        self.candidate = DuplicateCandidate.objects.create(first=first, second=second, score=0.9)
+        other = User.objects.create_user(username='other', password='pass')
+        DuplicateCandidate.objects.create(
+            first=FamilyMember.objects.create(first_name="A", user=other),
+            second=FamilyMember.objects.create(first_name="A", user=other),
+            score=1.0,
+        )
+
+    def test_review(self):
+        url = reverse('duplicatecandidate-list')
+        response = self.client.get(url)
+        results = response.data['results']
+        self.assertEqual([candidate['id'] for candidate in results], [self.candidate.id])
+        self.assertEqual(results[0]['second']['last_name'], "Mooyo")
+
+        detail = reverse('duplicatecandidate-detail', args=[self.candidate.id])
+        response = self.client.patch(detail, {'status': 'CONFIRMED', 'score': 0.1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.candidate.refresh_from_db()
+        self.assertEqual((self.candidate.status, self.candidate.score), ('CONFIRMED', 0.9))
+        self.assertEqual(self.client.get(url).data['results'], [])
+        self.assertEqual(len(self.client.get(url, {'status': 'ALL'}).data['results']), 1)
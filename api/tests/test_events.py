@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import get_revision
+from ..models import Event, FamilyMember
+
+User = get_user_model()
+
+
+class EventAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.member = FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", user=self.user)
+        other = User.objects.create_user(username='other', password='pass')
+        self.stranger = FamilyMember.objects.create(first_name="Jane", last_name="Doe", user=other)
+
+    def test_create_checks_ownership(self):
+        url = reverse('event-list')
+        data = {'family_member': self.member.id, 'event_type': 'BIRTH', 'date': '1950-01-01'}
+        self.assertEqual(self.client.post(url, data).status_code, status.HTTP_201_CREATED)
+        data['family_member'] = self.stranger.id
+        self.assertEqual(self.client.post(url, data).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create(self):
+        revision = get_revision(self.user.id)
+        events = [
+            {'family_member': self.member.id, 'event_type': event_type, 'date': f'{1800 + i}-01-01'}
+            for i, event_type in enumerate(['BIRTH', 'MARRIAGE', 'DEATH'] * 60)
+        ]
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            # Ownership check, then one INSERT in a savepoint
+            response = self.client.post(reverse('event-bulk'), {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], list(range(180)))
+        self.assertEqual(Event.objects.get(id=results[2]['id']).event_type, 'DEATH')
+        self.assertGreater(get_revision(self.user.id), revision)
+
+    def test_bulk_errors_are_per_row_and_nothing_is_saved(self):
+        events = [
+            {'family_member': self.member.id, 'event_type': 'BIRTH', 'date': '1950-01-01'},
+            {'family_member': self.stranger.id, 'event_type': 'BIRTH', 'date': '1950-01-01'},
+            {'family_member': self.member.id, 'event_type': 'BAPTISM', 'date': 'soon'},
+        ]
+        response = self.client.post(reverse('event-bulk'), {'events': events}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['events']
+        self.assertEqual(errors[0], {})
+        self.assertIn('family_member', errors[1])
+        self.assertEqual(set(errors[2]), {'event_type', 'date'})
+        self.assertFalse(Event.objects.exists())
+
+
+class ImportEventsCommandTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.member = FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", user=self.user)
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_csv_and_ndjson(self):
+        path = self.write('.csv', "family_member,event_type,date,description\n" + "".join(
+            f"{self.member.id},MARRIAGE,19{60 + i}-01-01,Interview {i}\n" for i in range(7)
+        ))
+        out = io.StringIO()
+        call_command('import_events', path, user='testuser', chunk_size=3, stdout=out)
+        self.assertIn("Imported 7 events in ", out.getvalue())
+        self.assertEqual(Event.objects.filter(event_type='MARRIAGE').count(), 7)
+
+        path = self.write('.ndjson', json.dumps(
+            {'family_member': self.member.id, 'event_type': 'DEATH', 'date': '2001-01-01'}
+        ) + "\n")
+        out = io.StringIO()
+        call_command('import_events', path, user='testuser', stdout=out)
+        self.assertIn("Imported 1 events in ", out.getvalue())
+        self.assertEqual(Event.objects.filter(event_type='DEATH').count(), 1)
+
+    def test_an_invalid_row_rolls_back_the_whole_file(self):
+        rows = [f"{self.member.id},BIRTH,1950-01-01,"] * 4 + [f"{self.member.id},BIRTH,not-a-date,"]
+        path = self.write('.csv', "family_member,event_type,date,description\n" + "\n".join(rows))
+        out = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "row 5"):
+            call_command('import_events', path, user='testuser', chunk_size=2, stdout=out)
+        self.assertEqual(out.getvalue(), "")
+        self.assertFalse(Event.objects.exists())
@@ -0,0 +1,58 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import FamilyMember
+
+User = get_user_model()
+
+
+class NdjsonExportAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+        # Create the child before its parents so that id order is not topological
+        self.child = FamilyMember.objects.create(first_name="Alice", last_name="Zvihwati", user=self.user)
+        self.father = FamilyMember.objects.create(first_name="John", last_name="Zvihwati", user=self.user)
+        self.mother = FamilyMember.objects.create(first_name="Jane", last_name="Moyo", gender="F", user=self.user)
+        self.father.spouses.add(self.mother)
+        self.child.father = self.father
+        self.child.mother = self.mother
+        self.child.save()
+        self.grandchild = FamilyMember.objects.create(
+            first_name="Kuda", last_name="Zvihwati", user=self.user, mother=self.child
+        )
+
+        other_user = User.objects.create_user(username='other', password='testpass')
+        FamilyMember.objects.create(first_name="Other", last_name="Zvihwati", user=other_user)
+
+    def get_lines(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_user_export_is_topological(self):
+        lines = self.get_lines(reverse('familymember-export'))
+        self.assertEqual(
+            [(line['first_name'], line['generation']) for line in lines],
+            [("John", 0), ("Jane", 0), ("Alice", 1), ("Kuda", 2)]
+        )
+        alice = lines[2]
+        self.assertEqual((alice['mother'], alice['father']), (self.mother.id, self.father.id))
+        self.assertEqual(lines[0]['spouses'], [self.mother.id])
+
+    def test_clan_export(self):
+        lines = self.get_lines(reverse('clan-export', kwargs={'clan_name': 'zvihwati'}))
+        self.assertEqual([line['first_name'] for line in lines], ["John", "Alice", "Kuda"])
+        # The mother is outside the clan, so Alice starts a generation after John only
+        self.assertEqual([line['generation'] for line in lines], [0, 1, 2])
+
+    def test_unknown_clan(self):
+        response = self.client.get(reverse('clan-export', kwargs={'clan_name': 'unknown'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
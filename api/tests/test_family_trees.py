@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import response_cache
+from ..models import FamilyMember, FamilyTree
+
+User = get_user_model()
+
+
+class FamilyTreeViewSetTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.grandfather = FamilyMember.objects.create(
+            first_name="Tendai", last_name="Moyo", date_of_death="1990-01-01", user=self.user
+        )
+        self.father = FamilyMember.objects.create(first_name="Farai", last_name="Moyo", father=self.grandfather,
+                                                  user=self.user)
+        self.child = FamilyMember.objects.create(first_name="Kuda", last_name="Moyo", father=self.father,
+                                                 user=self.user)
+        self.tree = FamilyTree.objects.create(name="Moyo", owner=self.user)
+        self.tree.members.add(self.grandfather, self.father, self.child)
+
+    def test_counts_are_computed_in_sql(self):
+        FamilyTree.objects.create(name="Empty", owner=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('familytree-list'))
+        moyo, empty = response.data['results']
+        self.assertNotIn('members', moyo)
+        self.assertEqual((moyo['member_count'], moyo['living_count'], moyo['generation_count']), (3, 2, 3))
+        self.assertEqual((empty['member_count'], empty['living_count'], empty['generation_count']), (0, 0, 0))
+
+        self.tree.members.remove(self.grandfather)
+        # 'familytree-detail' names the clan tree URL, so build the router's detail URL by hand
+        response = self.client.get(f"{reverse('familytree-list')}{self.tree.id}/")
+        # Only the tree's own members count towards its generations
+        self.assertEqual((response.data['member_count'], response.data['generation_count']), (2, 2))
+
+    def test_members_are_paginated(self):
+        url = reverse('familytree-members', args=[self.tree.id])
+        response = self.client.get(url, {'page_size': 2, 'fields': 'id,first_name'})
+        self.assertEqual([member['first_name'] for member in response.data['results']], ["Tendai", "Farai"])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([member['first_name'] for member in response.data['results']], ["Kuda"])
+        self.assertIsNone(response.data['next'])
+
+    def test_bulk_add_and_remove(self):
+        url = reverse('familytree-members', args=[self.tree.id])
+        cousin = FamilyMember.objects.create(first_name="Rudo", last_name="Moyo", user=self.user)
+
+        response = self.client.post(url, {'member_ids': [cousin.id, self.child.id]}, format='json')
+        self.assertEqual(response.data, {"added": 1})
+        response = self.client.delete(url, {'member_ids': [cousin.id, self.father.id]}, format='json')
+        self.assertEqual(response.data, {"removed": 2})
+        self.assertEqual(set(self.tree.members.values_list('id', flat=True)), {self.grandfather.id, self.child.id})
+
+    def test_only_own_members_can_be_added(self):
+        other = User.objects.create_user(username='other', password='pass')
+        stranger = FamilyMember.objects.create(first_name="Jane", last_name="Doe", user=other)
+        url = reverse('familytree-members', args=[self.tree.id])
+        response = self.client.post(url, {'member_ids': [stranger.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.tree.members.filter(id=stranger.id).exists())
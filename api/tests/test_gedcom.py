@@ -0,0 +1,186 @@
+import io
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from ..ancestry import is_ancestor
+from ..gedcom import GedcomImporter, iter_gedcom, parse_date
+from ..models import DuplicateCandidate, FamilyMember
+
+User = get_user_model()
+
+SAMPLE_GEDCOM = """0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Zvihwati/
+1 SEX M
+1 BIRT
+2 DATE 1 JAN 1950
+0 @I2@ INDI
+1 NAME Jane /Moyo/
+1 SEX F
+1 BIRT
+2 DATE ABT 1955
+1 NOTE Grew up in Chivero.
+2 CONT Moved to Harare in 1970.
+0 @I3@ INDI
+1 NAME Alice /Zvihwati/
+1 SEX F
+1 DEAT
+2 DATE 3 MAR 2020
+0 @I4@ INDI
+1 NAME Kuda /Zvihwati/
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+0 @F2@ FAM
+1 WIFE @I3@
+1 CHIL @I4@
+0 TRLR
+"""
+
+
+class GedcomImporterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+
+    def test_import(self):
+        progress = []
+        summary = GedcomImporter(self.user, batch_size=2, progress=lambda *args: progress.append(args)).run(
+            io.BytesIO(SAMPLE_GEDCOM.encode())
+        )
+        self.assertEqual(summary, {"members": 4, "families": 2})
+        self.assertEqual(progress[:2], [('members', 2), ('members', 4)])
+
+        john = FamilyMember.objects.get(first_name="John")
+        jane = FamilyMember.objects.get(first_name="Jane")
+        alice = FamilyMember.objects.get(first_name="Alice")
+        kuda = FamilyMember.objects.get(first_name="Kuda")
+        self.assertEqual((john.last_name, john.gender, str(john.date_of_birth)), ("Zvihwati", "M", "1950-01-01"))
+        self.assertIsNone(jane.date_of_birth)
+        self.assertEqual(jane.history, "Grew up in Chivero.\nMoved to Harare in 1970.")
+        self.assertEqual((alice.mother_id, alice.father_id), (jane.id, john.id))
+        self.assertEqual(kuda.mother_id, alice.id)
+        self.assertEqual(list(john.spouses.all()), [jane])
+        self.assertEqual(list(jane.spouses.all()), [john])
+        self.assertTrue(is_ancestor(john.id, kuda.id))
+
+    def test_imported_members_are_checked_for_duplicates(self):
+        existing = FamilyMember.objects.create(
+            first_name="John", last_name="Zvihwati", date_of_birth="1950-01-01", user=self.user
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            GedcomImporter(self.user).run(io.BytesIO(SAMPLE_GEDCOM.encode()))
+        john = FamilyMember.objects.exclude(id=existing.id).get(first_name="John")
+        self.assertEqual(list(DuplicateCandidate.objects.values_list('first_id', 'second_id')), [(existing.id, john.id)])
+
+    def test_query_count_does_not_grow_per_person(self):
+        with self.assertNumQueries(11):
+            GedcomImporter(self.user, batch_size=100).run(io.BytesIO(SAMPLE_GEDCOM.encode()))
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ged', delete=False) as handle:
+            handle.write(SAMPLE_GEDCOM)
+        self.addCleanup(os.remove, handle.name)
+        out = io.StringIO()
+        call_command('import_gedcom', handle.name, user='testuser', stdout=out)
+        self.assertIn("Imported 4 members and 2 families.", out.getvalue())
+        self.assertEqual(FamilyMember.objects.filter(user=self.user).count(), 4)
+
+    def test_parse_date(self):
+        self.assertEqual(str(parse_date("12 jan 1950")), "1950-01-12")
+        self.assertIsNone(parse_date("JAN 1950"))
+        self.assertIsNone(parse_date("31 FEB 1950"))
+
+
+class GedcomImportAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def test_upload(self):
+        upload = SimpleUploadedFile('family.ged', SAMPLE_GEDCOM.encode())
+        response = self.client.post(reverse('familymember-import-gedcom'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"members": 4, "families": 2})
+        self.assertEqual(FamilyMember.objects.filter(user=self.user).count(), 4)
+
+    def test_missing_file(self):
+        response = self.client.post(reverse('familymember-import-gedcom'), {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GedcomExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        GedcomImporter(self.user).run(io.BytesIO(SAMPLE_GEDCOM.encode()))
+        self.john = FamilyMember.objects.get(first_name="John")
+        self.jane = FamilyMember.objects.get(first_name="Jane")
+        self.alice = FamilyMember.objects.get(first_name="Alice")
+        self.kuda = FamilyMember.objects.get(first_name="Kuda")
+
+    def export(self, chunk_size=2):
+        return ''.join(iter_gedcom(FamilyMember.objects.filter(user=self.user), chunk_size=chunk_size))
+
+    def test_records(self):
+        # A childless couple gets its own family record
+        widow = FamilyMember.objects.create(first_name="Rudo", last_name="Moyo", gender="F", user=self.user)
+        self.kuda.spouses.add(widow)
+
+        gedcom = self.export()
+        self.assertTrue(gedcom.startswith("0 HEAD\n"))
+        self.assertTrue(gedcom.endswith("0 TRLR\n"))
+        self.assertIn(
+            f"0 @I{self.john.id}@ INDI\n1 NAME John /Zvihwati/\n2 GIVN John\n2 SURN Zvihwati\n1 SEX M\n"
+            f"1 BIRT\n2 DATE 1 JAN 1950\n1 FAMS @F{self.john.id}_{self.jane.id}@\n",
+            gedcom
+        )
+        self.assertIn("1 NOTE Grew up in Chivero.\n2 CONT Moved to Harare in 1970.\n", gedcom)
+        self.assertIn(f"1 FAMC @F{self.john.id}_{self.jane.id}@\n", gedcom)
+        self.assertIn(
+            f"0 @F{self.john.id}_{self.jane.id}@ FAM\n1 HUSB @I{self.john.id}@\n1 WIFE @I{self.jane.id}@\n"
+            f"1 CHIL @I{self.alice.id}@\n",
+            gedcom
+        )
+        self.assertIn(f"0 @F0_{self.alice.id}@ FAM\n1 WIFE @I{self.alice.id}@\n1 CHIL @I{self.kuda.id}@\n", gedcom)
+        self.assertIn(f"0 @F{self.kuda.id}_{widow.id}@ FAM\n", gedcom)
+        self.assertEqual(gedcom.count(" FAM\n"), 3)
+
+    def test_round_trip(self):
+        other_user = User.objects.create_user(username="other", password="pass")
+        summary = GedcomImporter(other_user).run(io.BytesIO(self.export().encode()))
+        self.assertEqual(summary, {"members": 4, "families": 2})
+        alice = FamilyMember.objects.get(user=other_user, first_name="Alice")
+        self.assertEqual((alice.mother.first_name, alice.father.first_name), ("Jane", "John"))
+        self.assertEqual(str(alice.date_of_death), "2020-03-03")
+
+    def test_long_notes_keep_their_spaces(self):
+        # Spaces right at the 200 character line width, and a line ending in one
+        history = ("a" * 199 + " " + "b" * 199 + "  " + "c" * 98) + "\nend "
+        self.kuda.history = history
+        self.kuda.save()
+        gedcom = self.export()
+        self.assertFalse([line for line in gedcom.splitlines() if line.startswith("2 CONC") and line.endswith(" ")])
+
+        other_user = User.objects.create_user(username="other", password="pass")
+        GedcomImporter(other_user).run(io.BytesIO(gedcom.encode()))
+        self.assertEqual(FamilyMember.objects.get(user=other_user, first_name="Kuda").history, history)
+
+    def test_command_and_endpoint(self):
+        out = io.StringIO()
+        call_command('export_gedcom', user='testuser', stdout=out)
+        self.assertEqual(out.getvalue(), self.export(chunk_size=1000))
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('familymember-export-gedcom'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content).decode(), out.getvalue())
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..graph import FamilyGraphCache, graph_cache
+from ..models import FamilyMember
+
+User = get_user_model()
+
+
+class FamilyGraphCacheTest(TestCase):
+    def setUp(self):
+        graph_cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.father = FamilyMember.objects.create(first_name="Farai", last_name="Moyo", gender="M", user=self.user)
+        self.child = FamilyMember.objects.create(
+            first_name="Kuda", last_name="Moyo", user=self.user, father=self.father
+        )
+
+    def test_warm_lookup_skips_the_database(self):
+        graph = graph_cache.get(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertIs(graph_cache.get(self.user.id), graph)
+        self.assertEqual(graph.parents(graph.index[self.child.id]), [graph.index[self.father.id]])
+        self.assertEqual(list(graph.children(graph.index[self.father.id])), [graph.index[self.child.id]])
+
+    def test_invalidated_by_member_changes(self):
+        graph = graph_cache.get(self.user.id)
+        self.child.father = None
+        with self.captureOnCommitCallbacks(execute=True):
+            self.child.save()
+        graph = graph_cache.get(self.user.id)
+        self.assertEqual(graph.parents(graph.index[self.child.id]), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.child.delete()
+        self.assertNotIn(self.child.id, graph_cache.get(self.user.id).index)
+
+    def test_invalidated_by_spouse_changes(self):
+        wife = FamilyMember.objects.create(first_name="Rudo", last_name="Moyo", gender="F", user=self.user)
+        graph_cache.get(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.father.spouses.add(wife)
+        graph = graph_cache.get(self.user.id)
+        self.assertEqual(list(graph.spouses(graph.index[self.father.id])), [graph.index[wife.id]])
+
+    def test_least_recently_used_graph_is_evicted(self):
+        other_user = User.objects.create_user(username="other", password="pass")
+        FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", user=other_user)
+        cache = FamilyGraphCache(max_bytes=1, max_age=300)
+        cache.get(self.user.id)
+        cache.get(other_user.id)
+        with self.assertNumQueries(0):
+            cache.get(other_user.id)
+        with self.assertNumQueries(2):
+            cache.get(self.user.id)
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..graph import FamilyGraph, graph_cache
+from ..kinship import KinshipCalculator
+from ..models import FamilyMember
+
+User = get_user_model()
+
+
+class KinshipCalculatorTest(SimpleTestCase):
+    def setUp(self):
+        # 1 + 2 -> 3, 4 (siblings); 5 + 3 -> 6; 4 + 7 -> 8 (6 and 8 are first cousins);
+        # 2 + 9 -> 10 (half-sibling of 3); 6 + 8 -> 11 (child of first cousins)
+        parents = {3: (2, 1), 4: (2, 1), 6: (5, 3), 8: (4, 7), 10: (2, 9), 11: (8, 6)}
+        member_ids = list(range(1, 12))
+        mothers = [parents.get(member_id, (None, None))[0] for member_id in member_ids]
+        fathers = [parents.get(member_id, (None, None))[1] for member_id in member_ids]
+        self.graph = FamilyGraph(member_ids, mothers, fathers, ' ' * len(member_ids), [])
+        self.calculator = KinshipCalculator(self.graph)
+
+    def kinship(self, a, b):
+        return self.calculator.kinship(self.graph.index[a], self.graph.index[b])
+
+    def test_coefficients(self):
+        self.assertEqual(self.kinship(1, 1), 0.5)
+        self.assertEqual(self.kinship(1, 2), 0)
+        self.assertEqual(self.kinship(1, 3), 0.25)
+        self.assertEqual(self.kinship(3, 4), 0.25)
+        self.assertEqual(self.kinship(3, 10), 0.125)
+        self.assertEqual(self.kinship(6, 8), 0.0625)
+        self.assertEqual(self.kinship(1, 6), 0.125)
+
+    def test_inbreeding(self):
+        # Self-kinship of a child of first cousins is (1 + 1/16) / 2
+        self.assertEqual(self.kinship(11, 11), 0.53125)
+        index = self.graph.index
+        self.assertAlmostEqual(self.calculator.relationship(index[11], index[11]), 1.0)
+
+    def test_shared_sub_results_are_reused(self):
+        self.kinship(11, 1)
+        memo_size = len(self.calculator.memo)
+        self.kinship(11, 1)
+        self.kinship(1, 11)
+        self.assertEqual(len(self.calculator.memo), memo_size)
+
+
+class KinshipAPITest(APITestCase):
+    def setUp(self):
+        graph_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.father = FamilyMember.objects.create(first_name="Farai", last_name="Moyo", user=self.user)
+        self.mother = FamilyMember.objects.create(first_name="Rudo", last_name="Dube", user=self.user)
+        self.children = [
+            FamilyMember.objects.create(
+                first_name=f"Child{i}", last_name="Moyo", user=self.user, father=self.father, mother=self.mother
+            )
+            for i in range(2)
+        ]
+
+    def test_batch(self):
+        url = reverse('familymember-kinship')
+        pairs = [[self.children[0].id, self.children[1].id], [self.father.id, self.mother.id]]
+        response = self.client.post(url, {'pairs': pairs}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(result['pair'], result['kinship'], result['relationship']) for result in response.data['results']],
+            [(pairs[0], 0.25, 0.5), (pairs[1], 0.0, 0.0)]
+        )
+
+    def test_unknown_member(self):
+        other_user = User.objects.create_user(username='other', password='testpass')
+        outsider = FamilyMember.objects.create(first_name="Other", last_name="Moyo", user=other_user)
+        url = reverse('familymember-kinship')
+        response = self.client.post(url, {'pairs': [[self.father.id, outsider.id]]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_member_added_after_graph_was_cached(self):
+        url = reverse('familymember-kinship')
+        self.client.post(url, {'pairs': [[self.father.id, self.mother.id]]}, format='json')
+        # bulk_create sends no signals, like a write made by another process
+        grandchild, = FamilyMember.objects.bulk_create([
+            FamilyMember(first_name="Tatenda", last_name="Moyo", user=self.user, father=self.children[0])
+        ])
+        response = self.client.post(url, {'pairs': [[self.father.id, grandchild.id]]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['kinship'], 0.125)
@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from .models import FamilyMember
+from ..models import FamilyMember
 
 User = get_user_model()
 
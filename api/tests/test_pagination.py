@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import response_cache
+from ..models import Chiefdom, FamilyMember
+from .utils import CaptureViewQueries
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        for i, last_name in enumerate(["moyo", "Banda", None, "Moyo", "Chari", "banda", "Zhou"]):
+            FamilyMember.objects.create(first_name=f"Member{i}", last_name=last_name, user=self.user)
+
+    def walk(self, url, params):
+        pages, next_url = [], url
+        while next_url:
+            response = self.client.get(next_url, params if next_url == url else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data['results'])
+            next_url = response.data['next']
+        return pages
+
+    def test_members_are_paged_by_last_name_then_id(self):
+        pages = self.walk(reverse('familymember-list'), {'page_size': 2, 'fields': 'id,last_name'})
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        rows = [row for page in pages for row in page]
+        expected = sorted(
+            FamilyMember.objects.filter(user=self.user).values('id', 'last_name'),
+            key=lambda row: ((row['last_name'] or '').lower(), row['id']),
+        )
+        self.assertEqual(rows, expected)
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        url = reverse('familymember-list')
+        params = {'page_size': 1, 'fields': 'id'}
+        with CaptureViewQueries() as queries:
+            next_url = self.client.get(url, params).data['next']
+        self.assertEqual(len(queries), 2)
+        for _ in range(3):
+            with CaptureViewQueries() as queries:
+                next_url = self.client.get(next_url).data['next']
+            self.assertEqual(len(queries), 2)
+            self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    def test_count_is_opt_in(self):
+        url = reverse('chiefdom-list')
+        for name in ("Chivero", "Seke", "Mashayamombe"):
+            Chiefdom.objects.create(name=name)
+        self.assertNotIn('count', self.client.get(url).data)
+        response = self.client.get(url, {'count': 'true', 'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([chiefdom['name'] for chiefdom in response.data['results']], ["Chivero", "Mashayamombe"])
+
+    def test_bad_parameters(self):
+        url = reverse('chiefdom-list')
+        for params in ({'cursor': 'not-a-cursor'}, {'cursor': 'WyJhIiwgInoiXQ=='}, {'page_size': 0}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,64 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from ..models import Chiefdom, Location, Village
+from ..places import (clear_place_caches, resolve_chiefdom, resolve_chiefdoms, resolve_location,
+                      resolve_village)
+
+
+class PlaceResolverTest(TestCase):
+    def setUp(self):
+        clear_place_caches()
+        self.chiefdom = Chiefdom.objects.create(name="Chivero")
+        self.village = Village.objects.create(name="Gumboreshumba", chiefdom=self.chiefdom)
+
+    def tearDown(self):
+        clear_place_caches()
+
+    def test_matches_case_insensitively_and_creates_missing(self):
+        self.assertEqual(resolve_chiefdom("  CHIVERO "), self.chiefdom.id)
+        self.assertEqual(resolve_village("gumboreshumba", self.chiefdom.id), self.village.id)
+        location_id = resolve_location(" Harare")
+        self.assertEqual(Location.objects.get(id=location_id).name, "Harare")
+        self.assertEqual(resolve_location("harare"), location_id)
+        self.assertIsNone(resolve_chiefdom("  "))
+
+    def test_villages_are_scoped_to_their_chiefdom(self):
+        other = Chiefdom.objects.create(name="Mutasa")
+        village_id = resolve_village("Gumboreshumba", other.id)
+        self.assertNotEqual(village_id, self.village.id)
+        self.assertEqual(Village.objects.get(id=village_id).chiefdom, other)
+
+    def test_cached_lookups_skip_the_database(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_chiefdoms(["Chivero", "Mutasa"])
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_chiefdom("chivero"), self.chiefdom.id)
+            resolve_chiefdom("MUTASA")
+
+    def test_uncommitted_rows_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            resolve_chiefdom("Mutasa")
+        with self.assertNumQueries(1):
+            resolve_chiefdom("Mutasa")
+
+    def test_save_and_delete_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_chiefdom("Chivero")
+        self.chiefdom.name = "Chivhu"
+        self.chiefdom.save()
+        self.assertEqual(resolve_chiefdom("Chivhu"), self.chiefdom.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chiefdom_id = resolve_chiefdom("Chivero")
+        self.assertNotEqual(chiefdom_id, self.chiefdom.id)
+        Chiefdom.objects.get(id=chiefdom_id).delete()
+        with self.assertNumQueries(3):  # Lookup, insert and re-read
+            self.assertNotEqual(resolve_chiefdom("Chivero"), chiefdom_id)
+
+    def test_names_are_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Chiefdom.objects.create(name="CHIVERO")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Village.objects.create(name="gumboreshumba", chiefdom=self.chiefdom)
+        Village.objects.create(name="gumboreshumba", chiefdom=Chiefdom.objects.create(name="Mutasa"))
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import response_cache
+from ..models import Chiefdom, FamilyMember, Location, Village
+from ..readers import member_payloads
+from ..serializers import FamilyMemberSerializer
+
+User = get_user_model()
+
+
+def create_family(user):
+    chiefdom = Chiefdom.objects.create(name="Chivero")
+    village = Village.objects.create(name="Gumboreshumba", chiefdom=chiefdom)
+    location = Location.objects.create(name="Harare")
+    father = FamilyMember.objects.create(
+        first_name="Tendai", last_name="Moyo", gender="M", date_of_birth="1940-03-01", user=user,
+        chiefdom_of_origin=chiefdom, village_of_origin=village, current_location=location,
+    )
+    mother = FamilyMember.objects.create(first_name="Rudo", last_name="Moyo", gender="F", user=user)
+    father.spouses.add(mother)
+    for name in ("Tatenda", "Farai", "Kuda"):
+        FamilyMember.objects.create(first_name=name, last_name="Moyo", user=user, father=father, mother=mother)
+    return father
+
+
+class MemberPayloadsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        create_family(self.user)
+
+    def test_matches_the_serializer(self):
+        members = FamilyMember.objects.filter(user=self.user).order_by('id')
+        request = RequestFactory().get('/')
+        self.assertEqual(
+            member_payloads(members, request),
+            FamilyMemberSerializer(members, many=True, context={'request': request}).data,
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        members = FamilyMember.objects.filter(user=self.user)
+        with self.assertNumQueries(4):
+            member_payloads(members)
+        for i in range(20):
+            FamilyMember.objects.create(first_name=f"Extra{i}", last_name="Moyo", user=self.user)
+        with self.assertNumQueries(4):
+            self.assertEqual(len(member_payloads(members)), 25)
+
+
+class MemberReadAPITest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.father = create_family(self.user)
+
+    def test_list_and_detail(self):
+        results = self.client.get(reverse('familymember-list')).data['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0]['children_from_father'], sorted(results[0]['children_from_father']))
+
+        response = self.client.get(reverse('familymember-detail', args=[self.father.id]))
+        self.assertEqual(response.data['village_of_origin']['chiefdom'], "Chivero")
+        self.assertEqual(len(response.data['children_from_mother']), 0)
+        self.assertEqual(len(response.data['children_from_father']), 3)
+
+    def test_detail_of_another_users_member_is_404(self):
+        other = User.objects.create_user(username='other', password='pass')
+        member = FamilyMember.objects.create(first_name="Jane", last_name="Doe", user=other)
+        response = self.client.get(reverse('familymember-detail', args=[member.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fields_trim_the_query(self):
+        url = reverse('familymember-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,first_name,mother,father,spouses'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'first_name', 'mother', 'father', 'spouses'])
+        self.assertFalse(any('history' in query['sql'] for query in queries))
+        self.assertFalse(any('children' in query['sql'] for query in queries))
+
+        response = self.client.get(url, {'exclude': 'history,photo,village_of_origin'})
+        self.assertNotIn('history', response.data['results'][0])
+        self.assertIn('children_from_father', response.data['results'][0])
+
+    def test_bad_field_lists_are_rejected(self):
+        url = reverse('familymember-list')
+        for params in ({'fields': 'id,secret'}, {'fields': 'id', 'exclude': 'history'}, {'fields': ','}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_columnar_format(self):
+        response = self.client.get(reverse('familymember-list'), {'format': 'columnar', 'fields': 'id,first_name'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.timelessties.columnar+json')
+        body = response.json()['results']
+        self.assertEqual(body['count'], 5)
+        self.assertEqual(list(body['columns']), ['id', 'first_name'])
+        self.assertEqual(body['columns']['first_name'][:2], ["Tendai", "Rudo"])
@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..graph import FamilyGraph, graph_cache
+from ..models import FamilyMember
+from ..relationships import blood_label, find_path, relationship_label
+
+User = get_user_model()
+
+
+class BloodLabelTest(SimpleTestCase):
+    def test_labels(self):
+        self.assertEqual(blood_label(1, 0, 'F'), 'mother')
+        self.assertEqual(blood_label(3, 0, 'M'), 'great-grandfather')
+        self.assertEqual(blood_label(0, 2, None), 'grandchild')
+        self.assertEqual(blood_label(0, 7, 'F'), '5x great-granddaughter')
+        self.assertEqual(blood_label(1, 1, 'M', half=True), 'half-brother')
+        self.assertEqual(blood_label(2, 1, 'F'), 'aunt')
+        self.assertEqual(blood_label(1, 3, 'M'), 'great-nephew')
+        self.assertEqual(blood_label(2, 2, 'F'), 'first cousin')
+        self.assertEqual(blood_label(3, 4, 'F'), 'second cousin once removed')
+        self.assertEqual(blood_label(5, 2, 'F'), 'first cousin 3 times removed')
+
+
+class FindPathTest(SimpleTestCase):
+    def test_long_line_in_large_graph(self):
+        # Two lines of descent from one couple, 50,000 members each
+        size = 50_000
+        member_ids = list(range(1, 2 * size + 1))
+        fathers = [None, None] + [member_id - 2 if member_id > 4 else 1 for member_id in range(3, 2 * size + 1)]
+        mothers = [None, None] + [2 if member_id <= 4 else None for member_id in range(3, 2 * size + 1)]
+        graph = FamilyGraph(member_ids, mothers, fathers, 'M' * (2 * size), [(1, 2), (2, 1)])
+
+        path = find_path(graph, graph.index[2 * size - 1], graph.index[2 * size])
+        self.assertEqual(len(path), 2 * (size - 1) + 1)
+        self.assertEqual(relationship_label(graph, path), f'{size - 2}th cousin')
+
+
+class RelationshipAPITest(APITestCase):
+    def setUp(self):
+        graph_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+        def member(first_name, gender, **parents):
+            return FamilyMember.objects.create(
+                first_name=first_name, last_name="Moyo", gender=gender, user=self.user, **parents
+            )
+
+        self.grandfather = member("Tendai", "M")
+        self.grandmother = member("Rudo", "F")
+        self.grandfather.spouses.add(self.grandmother)
+        self.father = member("Farai", "M", father=self.grandfather, mother=self.grandmother)
+        self.aunt = member("Chipo", "F", father=self.grandfather, mother=self.grandmother)
+        self.me = member("Kuda", "M", father=self.father)
+        self.cousin = member("Nyasha", "F", mother=self.aunt)
+        self.cousins_son = member("Tawanda", "M", mother=self.cousin)
+        self.wife = member("Tsitsi", "F")
+        self.me.spouses.add(self.wife)
+        self.stranger = member("Stranger", "M")
+
+    def get_relationship(self, a, b):
+        url = reverse('familymember-relationship', kwargs={'pk': a.pk, 'other_pk': b.pk})
+        return self.client.get(url)
+
+    def test_first_cousin_once_removed(self):
+        response = self.get_relationship(self.me, self.cousins_son)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['label'], 'first cousin once removed')
+        self.assertEqual(response.data['distance'], 5)
+        self.assertEqual(
+            [step['step'] for step in response.data['path']],
+            [None, 'parent', 'parent', 'child', 'child', 'child']
+        )
+
+    def test_in_laws(self):
+        self.assertEqual(self.get_relationship(self.wife, self.father).data['label'], 'father-in-law')
+        self.assertEqual(self.get_relationship(self.father, self.wife).data['label'], 'daughter-in-law')
+        self.assertEqual(self.get_relationship(self.wife, self.aunt).data['label'], "husband's aunt")
+
+    def test_aunt_and_niece(self):
+        self.assertEqual(self.get_relationship(self.me, self.aunt).data['label'], 'aunt')
+        self.assertEqual(self.get_relationship(self.aunt, self.me).data['label'], 'nephew')
+
+    def test_unrelated(self):
+        response = self.get_relationship(self.me, self.stranger)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users_member(self):
+        other_user = User.objects.create_user(username='other', password='testpass')
+        outsider = FamilyMember.objects.create(first_name="Other", last_name="Moyo", user=other_user)
+        response = self.get_relationship(self.me, outsider)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_member_added_after_graph_was_cached(self):
+        self.get_relationship(self.me, self.aunt)
+        # bulk_create sends no signals, like a write made by another process
+        son, = FamilyMember.objects.bulk_create([
+            FamilyMember(first_name="Tatenda", last_name="Moyo", gender="M", user=self.user, father=self.me)
+        ])
+        response = self.get_relationship(son, self.aunt)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['label'], 'great-aunt')
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import FamilyMember
+from ..names import phonetic_key, similarity
+from ..search import NameIndex, name_index_cache
+
+User = get_user_model()
+
+
+class NamesTest(TestCase):
+    def test_phonetic_key_joins_spelling_variants(self):
+        self.assertEqual(phonetic_key("Zvihwati"), phonetic_key("Zvivhati"))
+        self.assertEqual(phonetic_key("Moyo"), phonetic_key("Mooyo"))
+        self.assertEqual(phonetic_key("Tendayi"), phonetic_key("Tendai"))
+        self.assertEqual(phonetic_key("Tendai"), phonetic_key(" TÉNDAI "))
+        self.assertNotEqual(phonetic_key("Moyo"), phonetic_key("Maya"))
+        self.assertEqual(phonetic_key(None), '')
+
+    def test_similarity_matches_pg_trgm(self):
+        # SELECT similarity('word', 'two words') is 0.363636 in PostgreSQL
+        self.assertAlmostEqual(similarity('word', 'two words'), 4 / 11)
+        self.assertEqual(similarity('abc', 'abc'), 1.0)
+        self.assertEqual(similarity('', 'abc'), 0.0)
+
+    def test_keys_are_kept_on_save(self):
+        member = FamilyMember.objects.create(
+            first_name="Rudo", last_name="Mooyo", user=User.objects.create_user(username="u", password="p")
+        )
+        self.assertEqual((member.first_name_key, member.last_name_key), ("rudo", "moyo"))
+
+
+class NameIndexTest(TestCase):
+    def setUp(self):
+        self.index = NameIndex([
+            (1, "Tendai", "Zvihwati"),
+            (2, "Rudo", "Moyo"),
+            (3, "Tendai", "Moyo"),
+            (4, None, "Zvivhati"),
+            (5, "Chipo", "Mutasa"),
+        ])
+
+    def test_phonetic_and_trigram_matches(self):
+        self.assertEqual([member_id for member_id, _ in self.index.search(["zvivhati"], 10)], [1, 4])
+        self.assertEqual([member_id for member_id, _ in self.index.search(["mooyo"], 10)], [2, 3])
+        # No phonetic match, but close enough in trigrams
+        self.assertEqual([member_id for member_id, _ in self.index.search(["mutassa"], 10)], [5])
+
+    def test_every_token_must_match(self):
+        results = self.index.search(["tendai", "moyo"], 10)
+        self.assertEqual(results, [(3, 1.0)])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search(["tendai"], 1)), 1)
+
+
+class FamilyMemberSearchAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        name_index_cache.clear()
+        self.url = reverse('familymember-search')
+        self.tendai = FamilyMember.objects.create(first_name="Tendai", last_name="Zvihwati", user=self.user)
+        self.rudo = FamilyMember.objects.create(first_name="Rudo", last_name="Zvivhati", user=self.user)
+        other = User.objects.create_user(username='other', password='pass')
+        FamilyMember.objects.create(first_name="Tendai", last_name="Zvihwati", user=other)
+
+    def test_search(self):
+        response = self.client.get(self.url, {'q': 'tendai zvivhati'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['id'] for result in results], [self.tendai.id])
+        self.assertEqual(results[0]['score'], 1.0)
+
+    def test_index_sees_new_members(self):
+        self.assertEqual(len(self.client.get(self.url, {'q': 'zvihwati'}).data['results']), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            FamilyMember.objects.create(first_name="Kuda", last_name="Zviwati", user=self.user)
+        self.assertEqual(len(self.client.get(self.url, {'q': 'zvihwati'}).data['results']), 3)
+
+    def test_query_is_required(self):
+        response = self.client.get(self.url, {'q': ' - '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import response_cache
+from ..models import FamilyMember
+from .utils import CaptureViewQueries
+
+User = get_user_model()
+
+
+class SubtreeAPITest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+        self.root = FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", gender="M", user=self.user)
+        self.wife = FamilyMember.objects.create(first_name="Rudo", last_name="Moyo", gender="F", user=self.user)
+        self.root.spouses.add(self.wife)
+        self.children = [
+            FamilyMember.objects.create(
+                first_name=f"Child{i}", last_name="Moyo", user=self.user, father=self.root, mother=self.wife
+            )
+            for i in range(5)
+        ]
+        self.grandchild = FamilyMember.objects.create(
+            first_name="Kuda", last_name="Moyo", user=self.user, father=self.children[0]
+        )
+
+    def test_subtree_depth_and_frontier_counts(self):
+        url = reverse('familymember-subtree', kwargs={'pk': self.root.pk})
+        response = self.client.get(url, {'depth': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['child_count'], 5)
+        self.assertEqual(response.data['spouses'], [self.wife.id])
+        self.assertIsNone(response.data['children_cursor'])
+        first_child = response.data['children'][0]
+        self.assertEqual(first_child['child_count'], 1)
+        self.assertTrue(first_child['has_children'])
+        self.assertNotIn('children', first_child)
+        self.assertFalse(response.data['children'][1]['has_children'])
+
+    def test_query_count_does_not_grow_with_width(self):
+        url = reverse('familymember-subtree', kwargs={'pk': self.root.pk})
+        with CaptureViewQueries() as queries:
+            self.client.get(url, {'depth': 1})
+        self.assertEqual(len(queries), 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                FamilyMember.objects.create(first_name=f"Extra{i}", last_name="Moyo", user=self.user, father=self.root)
+        with CaptureViewQueries() as queries:
+            self.client.get(url, {'depth': 1})
+        self.assertEqual(len(queries), 10)
+
+    def test_page_through_siblings_with_cursor(self):
+        url = reverse('familymember-subtree', kwargs={'pk': self.root.pk})
+        response = self.client.get(url, {'depth': 1, 'page_size': 2})
+        seen = [child['id'] for child in response.data['children']]
+        cursor = response.data['children_cursor']
+
+        children_url = reverse('familymember-children', kwargs={'pk': self.root.pk})
+        while cursor:
+            response = self.client.get(children_url, {'cursor': cursor, 'page_size': 2})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(child['id'] for child in response.data['results'])
+            cursor = response.data['next_cursor']
+        self.assertEqual(seen, [child.id for child in self.children])
+
+    def test_cursor_from_another_member_is_rejected(self):
+        url = reverse('familymember-subtree', kwargs={'pk': self.root.pk})
+        cursor = self.client.get(url, {'depth': 1, 'page_size': 2}).data['children_cursor']
+        children_url = reverse('familymember-children', kwargs={'pk': self.wife.pk})
+        response = self.client.get(children_url, {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_child_of_two_expanded_parents_is_annotated_under_both(self):
+        child = FamilyMember.objects.create(
+            first_name="Tatenda", last_name="Moyo", user=self.user, father=self.children[1], mother=self.children[2]
+        )
+        url = reverse('familymember-subtree', kwargs={'pk': self.root.pk})
+        children = self.client.get(url, {'depth': 2}).data['children']
+        under_father, under_mother = (
+            next(node for node in children if node['id'] == parent.id)['children'][0]
+            for parent in self.children[1:3]
+        )
+        self.assertEqual(under_father['id'], child.id)
+        self.assertEqual(under_father, under_mother)
+        self.assertEqual((under_mother['child_count'], under_mother['has_children']), (0, False))
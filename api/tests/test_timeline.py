@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..caching import response_cache
+from ..models import Event, FamilyMember, FamilyTree
+
+User = get_user_model()
+
+
+class TimelineAPITest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.tendai = FamilyMember.objects.create(
+            first_name="Tendai", last_name="Moyo", date_of_birth="1920-05-01", date_of_death="1990-01-01",
+            user=self.user,
+        )
+        self.rudo = FamilyMember.objects.create(
+            first_name="Rudo", last_name="Moyo", date_of_birth="1925-02-02", user=self.user
+        )
+        Event.objects.create(family_member=self.tendai, event_type='MARRIAGE', date='1945-06-01')
+        # Recorded birth events replace the member's own date of birth
+        Event.objects.create(family_member=self.rudo, event_type='BIRTH', date='1925-02-02', description="At home")
+        FamilyMember.objects.create(first_name="Jane", last_name="Doe", date_of_birth="1930-01-01", user=self.user)
+
+        self.tree = FamilyTree.objects.create(name="Moyo", owner=self.user)
+        self.tree.members.add(self.tendai, self.rudo)
+
+    def entries(self, response):
+        return [(entry['date'], entry['event_type'], entry['first_name']) for entry in response.data['results']]
+
+    def test_clan_timeline_merges_events_and_member_dates(self):
+        response = self.client.get(reverse('clan-timeline', args=['moyo']))
+        self.assertEqual(self.entries(response), [
+            ('1920-05-01', 'BIRTH', "Tendai"),
+            ('1925-02-02', 'BIRTH', "Rudo"),
+            ('1945-06-01', 'MARRIAGE', "Tendai"),
+            ('1990-01-01', 'DEATH', "Tendai"),
+        ])
+        self.assertEqual(response.data['results'][1]['description'], "At home")
+        self.assertIsNone(response.data['results'][0]['event'])
+
+    def test_tree_timeline_pages_and_filters(self):
+        url = reverse('familytree-timeline', args=[self.tree.id])
+        pages, next_url = [], url + '?page_size=1'
+        while next_url:
+            response = self.client.get(next_url)
+            pages.append(self.entries(response))
+            next_url = response.data['next']
+        self.assertEqual([entry[:2] for page in pages for entry in page], [
+            ('1920-05-01', 'BIRTH'), ('1925-02-02', 'BIRTH'), ('1945-06-01', 'MARRIAGE'), ('1990-01-01', 'DEATH'),
+        ])
+
+        response = self.client.get(url, {'from': '1921-01-01', 'to': '1989-12-31', 'event_type': 'BIRTH,MARRIAGE'})
+        self.assertEqual([entry[:2] for entry in self.entries(response)],
+                         [('1925-02-02', 'BIRTH'), ('1945-06-01', 'MARRIAGE')])
+
+    def test_bad_parameters(self):
+        url = reverse('clan-timeline', args=['moyo'])
+        for params in ({'from': '1990-13-01'}, {'event_type': 'BAPTISM'}, {'cursor': 'WyJ4IiwgMCwgMV0='}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,7 +1,11 @@
+from unittest import mock
+
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from ..caching import response_cache
 from ..models import FamilyMember, Chiefdom, Village, Location
+from .utils import CaptureViewQueries
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -10,7 +14,8 @@ User = get_user_model()
 class FamilyTreeAPITest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='testpass')
-        self.client.login(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        response_cache.clear()
 
         self.chiefdom = Chiefdom.objects.create(name="Chivero")
         self.village = Village.objects.create(name="Gumboreshumba", chiefdom=self.chiefdom)
@@ -63,3 +68,142 @@ class FamilyTreeAPITest(APITestCase):
         self.assertEqual(len(root['children']), 1)
         child = root['children'][0]
         self.assertEqual(child['first_name'], "Alice")
+
+    def test_family_tree_query_count_is_constant(self):
+        url = reverse('familytree-detail', kwargs={'clan_name': 'zvihwati'})
+        with CaptureViewQueries() as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), 7)
+
+        # Add two more generations; the tree must still be built from the same queries
+        parents = [self.child]
+        for generation in range(2):
+            next_parents = []
+            for parent in parents:
+                for i in range(3):
+                    next_parents.append(FamilyMember.objects.create(
+                        first_name=f"Child{generation}{i}",
+                        last_name="Zvihwati",
+                        user=self.user,
+                        mother=parent if parent.gender == "F" else None,
+                        father=parent if parent.gender != "F" else None,
+                        village_of_origin=self.village,
+                    ))
+            parents = next_parents
+
+        response_cache.clear()
+        with CaptureViewQueries() as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 7)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        alice = response.data['results'][0]['children'][0]
+        self.assertEqual(len(alice['children']), 3)
+        self.assertEqual(len(alice['children'][0]['children']), 3)
+
+    def test_family_tree_paginates_roots_by_id(self):
+        other_roots = [
+            FamilyMember.objects.create(first_name=f"Root{i}", last_name="Zvihwati", user=self.user)
+            for i in range(3)
+        ]
+        url = reverse('familytree-detail', kwargs={'clan_name': 'zvihwati'})
+
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response['X-Total-Count'], '4')
+        self.assertEqual([root['id'] for root in response.data['results']], [self.patriarch.id, other_roots[0].id])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([root['id'] for root in response.data['results']], [other_roots[1].id, other_roots[2].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_family_tree_includes_children_of_folded_spouse(self):
+        half_sibling = FamilyMember.objects.create(
+            first_name="Tariro", last_name="Zvihwati", user=self.user, mother=self.matriarch
+        )
+        url = reverse('familytree-detail', kwargs={'clan_name': 'zvihwati'})
+        response = self.client.get(url)
+        root = response.data['results'][0]
+        self.assertEqual([child['id'] for child in root['children']], [self.child.id, half_sibling.id])
+
+    def test_family_tree_keeps_every_wife_of_a_folded_husband(self):
+        # W1 - H - W2, all parentless: H folds into W1's couple, W2 stays a root of her own
+        first_wife = FamilyMember.objects.create(first_name="Rudo", last_name="Moyo", gender="F", user=self.user)
+        husband = FamilyMember.objects.create(first_name="Tendai", last_name="Moyo", gender="M", user=self.user)
+        second_wife = FamilyMember.objects.create(first_name="Chipo", last_name="Moyo", gender="F", user=self.user)
+        husband.spouses.add(first_wife, second_wife)
+        first_child = FamilyMember.objects.create(
+            first_name="Farai", last_name="Moyo", user=self.user, mother=first_wife, father=husband
+        )
+        second_child = FamilyMember.objects.create(
+            first_name="Nyasha", last_name="Moyo", user=self.user, mother=second_wife, father=husband
+        )
+
+        response = self.client.get(reverse('familytree-detail', kwargs={'clan_name': 'moyo'}))
+        self.assertEqual(response['X-Total-Count'], '2')
+        first_root, second_root = response.data['results']
+        self.assertEqual((first_root['id'], first_root['spouses']), (first_wife.id, [husband.id]))
+        self.assertEqual([child['id'] for child in first_root['children']], [first_child.id, second_child.id])
+        self.assertEqual((second_root['id'], second_root['spouses']), (second_wife.id, [husband.id]))
+        self.assertEqual([child['id'] for child in second_root['children']], [second_child.id])
+
+    def test_family_tree_unknown_clan(self):
+        url = reverse('familytree-detail', kwargs={'clan_name': 'unknown'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FamilyMemberLineageAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+        # Four generations: great-grandfather -> grandfather -> father -> son
+        self.generations = []
+        father = None
+        for first_name in ("Tendai", "Farai", "Tatenda", "Kuda"):
+            member = FamilyMember.objects.create(
+                first_name=first_name, last_name="Moyo", gender="M", user=self.user, father=father
+            )
+            self.generations.append(member)
+            father = member
+        self.grandmother = FamilyMember.objects.create(
+            first_name="Rudo", last_name="Moyo", gender="F", user=self.user
+        )
+        self.generations[2].mother = self.grandmother
+        self.generations[2].save()
+
+    def test_ancestors(self):
+        url = reverse('familymember-ancestors', kwargs={'pk': self.generations[3].pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(member['first_name'], member['depth']) for member in response.data],
+            [("Tatenda", 1), ("Farai", 2), ("Rudo", 2), ("Tendai", 3)]
+        )
+
+    def test_ancestors_depth_limit(self):
+        url = reverse('familymember-ancestors', kwargs={'pk': self.generations[3].pk})
+        response = self.client.get(url, {'depth': 1})
+        self.assertEqual([member['first_name'] for member in response.data], ["Tatenda"])
+
+    def test_descendants(self):
+        url = reverse('familymember-descendants', kwargs={'pk': self.generations[0].pk})
+        response = self.client.get(url, {'depth': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(member['first_name'], member['depth']) for member in response.data],
+            [("Farai", 1), ("Tatenda", 2)]
+        )
+
+    def test_descendants_without_recursive_cte(self):
+        url = reverse('familymember-descendants', kwargs={'pk': self.grandmother.pk})
+        with mock.patch('api.lineage.supports_recursive_cte', return_value=False):
+            response = self.client.get(url)
+        self.assertEqual(
+            [(member['first_name'], member['depth']) for member in response.data],
+            [("Tatenda", 1), ("Kuda", 2)]
+        )
+
+    def test_invalid_depth(self):
+        url = reverse('familymember-ancestors', kwargs={'pk': self.generations[3].pk})
+        response = self.client.get(url, {'depth': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class CaptureViewQueries(CaptureQueriesContext):
+    """
+    Capture the queries a view makes, leaving out the response cache's revision
+    and lock reads and writes when the coordination cache is database-backed.
+    """
+    def __init__(self):
+        super().__init__(connection)
+
+    @property
+    def captured_queries(self):
+        table = settings.CACHES.get('coordination', {}).get('LOCATION')
+        return [
+            query for query in super().captured_queries
+            if not (table and table in query['sql']) and 'SAVEPOINT' not in query['sql']
+        ]
+
@@ -0,0 +1,90 @@
+"""Date-ordered timelines of events, births and deaths for a set of family members."""
+import heapq
+
+from django.db.models import Exists, F, OuterRef, Q, Value
+
+from .models import Event
+
+MEMBER_EVENT_TYPES = {'BIRTH': 'date_of_birth', 'DEATH': 'date_of_death'}
+
+# Entries on the same date are ordered by source, then id
+SOURCES = ['event', 'BIRTH', 'DEATH']
+
+
+def _after(rank, after):
+    """Rows of the source at ``rank`` that come after the ``(date, rank, id)`` key ``after``."""
+    date, after_rank, after_id = after
+    if rank > after_rank:
+        return Q(timeline_date__gte=date)
+    if rank < after_rank:
+        return Q(timeline_date__gt=date)
+    return Q(timeline_date__gt=date) | Q(timeline_date=date, id__gt=after_id)
+
+
+def _event_rows(members, event_types):
+    rows = Event.objects.filter(family_member__in=members).annotate(timeline_date=F('date'))
+    if event_types is not None:
+        rows = rows.filter(event_type__in=event_types)
+    return rows.values(
+        'id', 'timeline_date', 'event_type', 'description', 'family_member_id',
+        first_name=F('family_member__first_name'), last_name=F('family_member__last_name'),
+    )
+
+
+def _member_rows(members, event_type):
+    column = MEMBER_EVENT_TYPES[event_type]
+    # A recorded event of the same type takes the place of the member's own date
+    recorded = Event.objects.filter(family_member=OuterRef('pk'), event_type=event_type)
+    return members.filter(**{f'{column}__isnull': False}).exclude(Exists(recorded)).annotate(
+        timeline_date=F(column),
+        event_type=Value(event_type),
+        description=Value(''),
+        family_member_id=F('id'),
+    ).values('id', 'timeline_date', 'event_type', 'description', 'family_member_id', 'first_name', 'last_name')
+
+
+def timeline(members, page_size, after=None, date_from=None, date_to=None, event_types=None):
+    """
+    One page of the timeline of ``members``, a FamilyMember queryset.
+
+    Merges Event rows with birth and death dates kept on the members themselves,
+    ordered by date. Returns ``(entries, next_key)``, where ``next_key`` is the
+    ``(date, source rank, id)`` to pass as ``after`` for the next page, or None.
+    Each source is read with its own seek query, so a page costs three queries
+    wherever it starts.
+    """
+    sources = []
+    for rank, source in enumerate(SOURCES):
+        if source == 'event':
+            rows = _event_rows(members, event_types)
+        elif event_types is None or source in event_types:
+            rows = _member_rows(members, source)
+        else:
+            continue
+        if date_from:
+            rows = rows.filter(timeline_date__gte=date_from)
+        if date_to:
+            rows = rows.filter(timeline_date__lte=date_to)
+        if after is not None:
+            rows = rows.filter(_after(rank, after))
+        rows = rows.order_by('timeline_date', 'id')[:page_size + 1]
+        sources.append([(row['timeline_date'], rank, row['id'], row) for row in rows])
+
+    merged = list(heapq.merge(*sources, key=lambda entry: entry[:3]))[:page_size + 1]
+    next_key = None
+    if len(merged) > page_size:
+        merged = merged[:page_size]
+        date, rank, entry_id, _ = merged[-1]
+        next_key = (date.isoformat(), rank, entry_id)
+    return [
+        {
+            'date': row['timeline_date'].isoformat(),
+            'event_type': row['event_type'],
+            'event': row['id'] if SOURCES[rank] == 'event' else None,
+            'family_member': row['family_member_id'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'description': row['description'],
+        }
+        for _, rank, _, row in merged
+    ], next_key
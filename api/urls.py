@@ -8,6 +8,10 @@ from .views import (
     VillageViewSet,
     LocationViewSet,
     FamilyTreeAPIView, EventViewSet,
+    ClanExportAPIView,
+    ClanTimelineAPIView,
+    DuplicateCandidateViewSet,
+    CacheStatsAPIView,
 )
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -22,10 +26,14 @@ router.register(r'chiefdoms', ChiefdomViewSet, basename='chiefdom')
 router.register(r'villages', VillageViewSet, basename='village')
 router.register(r'locations', LocationViewSet, basename='location')
 router.register(r'events', EventViewSet, basename='event')
+router.register(r'duplicate-candidates', DuplicateCandidateViewSet, basename='duplicatecandidate')
 
 urlpatterns = [
     path("", include(router.urls)),
     path('clans/<str:clan_name>/tree/', FamilyTreeAPIView.as_view(), name='familytree-detail'),
+    path('clans/<str:clan_name>/export/', ClanExportAPIView.as_view(), name='clan-export'),
+    path('clans/<str:clan_name>/timeline/', ClanTimelineAPIView.as_view(), name='clan-timeline'),
+    path('cache-stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
     # JWT token endpoints
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # To obtain tokens
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # To refresh tokens
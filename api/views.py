@@ -1,31 +1,64 @@
+import sys
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Lower
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from django.utils.text import slugify
 from rest_framework import permissions, viewsets, filters, status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import FamilyMember, FamilyTree, Chiefdom, Village, Location, Event
+from .bulk import BulkEventWriter, BulkMemberWriter
+from .caching import cache_per_user, cache_stats
+from .export import iter_ndjson
+from .gedcom import GedcomImporter, iter_gedcom
+from .graph import get_family_graph
+from .kinship import KinshipCalculator
+from .lineage import MAX_LINEAGE_DEPTH, get_ancestor_depths, get_descendant_depths
+from .models import (MEMBER_LIST_ORDER, FamilyMember, FamilyMemberAncestry, FamilyTree, Chiefdom, Village, Location,
+                     Event, DuplicateCandidate)
+from .pagination import KeysetPagination
+from .readers import MEMBER_FIELDS, member_payloads
+from .renderers import ColumnarJSONRenderer
+from .relationships import find_path, path_steps, relationship_label
+from .search import search_members, search_tokens
+from .subtree import (DEFAULT_SIBLING_PAGE_SIZE, MAX_SIBLING_PAGE_SIZE, MAX_SUBTREE_DEPTH, decode_cursor,
+                      expand_subtree)
 from .serializers import (FamilyMemberSerializer, FamilyTreeSerializer,
-                          UserSerializer, ChiefdomSerializer, VillageSerializer, LocationSerializer, EventSerializer)
+                          UserSerializer, ChiefdomSerializer, VillageSerializer, LocationSerializer, EventSerializer,
+                          KinshipRequestSerializer, DuplicateCandidateSerializer, TreeMembersSerializer)
+from .timeline import timeline
 
 User = get_user_model()
 
+# Member lists are paged by case-insensitive last name, on the api_member_list_order index
+MEMBER_KEYSET_ORDERING = (('last_name_order', MEMBER_LIST_ORDER), 'id')
+
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing user instances."""
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    keyset_ordering = ('id',)
 
 
 class FamilyMemberViewSet(viewsets.ModelViewSet):
     serializer_class = FamilyMemberSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    keyset_ordering = MEMBER_KEYSET_ORDERING
 
     def get_queryset(self):
         # During schema generation, request may not be authenticated
@@ -37,9 +70,226 @@ class FamilyMemberViewSet(viewsets.ModelViewSet):
             'mother', 'father', 'chiefdom_of_origin', 'village_of_origin', 'current_location'
         ).prefetch_related('spouses')
 
-    @method_decorator(cache_page(60 * 15))
+    @cache_per_user()
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        """
+        A page of the user's members by last name; ``?fields=`` or ``?exclude=``
+        trim both the payload and the query.
+        """
+        return member_page_response(self, self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        fields = get_fields_param(request, MEMBER_FIELDS)
+        payloads = member_payloads(
+            self.filter_queryset(self.get_queryset()).filter(pk=kwargs['pk']), request, fields
+        )
+        if not payloads:
+            raise Http404
+        return Response(payloads[0])
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all of the user's family members as NDJSON, parents before children."""
+        return ndjson_export_response(FamilyMember.objects.filter(user=request.user), 'family-members')
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create and update a batch of ``members`` in one transaction; see BulkMemberWriter."""
+        rows = request.data.get('members') if isinstance(request.data, dict) else None
+        results = BulkMemberWriter(request.user).run(rows)
+        return Response({"results": results})
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Members ranked by how well their names match ``?q=``, tolerating spelling variants."""
+        query = request.query_params.get('q', '')
+        if not search_tokens(query):
+            raise ParseError("The 'q' parameter must contain at least one name.")
+        limit = get_int_param(request, 'limit', 20, 1, 100)
+        return Response({"results": search_members(request.user, query, limit)})
+
+    @action(detail=False, methods=['post'], url_path='import-gedcom', parser_classes=[MultiPartParser])
+    def import_gedcom(self, request):
+        """Import an uploaded GEDCOM ``file`` into the user's family members."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({"file": ["A GEDCOM file is required."]})
+        summary = GedcomImporter(request.user).run(upload)
+        return Response(summary, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='export-gedcom')
+    def export_gedcom(self, request):
+        """Stream all of the user's family members as a GEDCOM 5.5.1 file."""
+        response = StreamingHttpResponse(
+            iter_gedcom(FamilyMember.objects.filter(user=request.user)), content_type='text/plain; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="family-members.ged"'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def ancestors(self, request, pk=None):
+        """Ancestors of a family member, up to ``?depth=N`` generations."""
+        return self._lineage_response(request, get_ancestor_depths)
+
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        """Descendants of a family member, up to ``?depth=N`` generations."""
+        return self._lineage_response(request, get_descendant_depths)
+
+    @action(detail=True, methods=['get'])
+    @cache_per_user()
+    def subtree(self, request, pk=None):
+        """A member's descendants expanded ``?depth=N`` generations, one page of siblings per node."""
+        member = self.get_object()
+        depth = get_int_param(request, 'depth', 2, 0, MAX_SUBTREE_DEPTH)
+        page_size = get_int_param(request, 'page_size', DEFAULT_SIBLING_PAGE_SIZE, 1, MAX_SIBLING_PAGE_SIZE)
+        return Response(expand_subtree(FamilyMember.objects.filter(user=request.user), member, depth, page_size))
+
+    @action(detail=True, methods=['get'])
+    def children(self, request, pk=None):
+        """Page through a member's children with the ``children_cursor`` of a subtree node."""
+        member = self.get_object()
+        depth = get_int_param(request, 'depth', 0, 0, MAX_SUBTREE_DEPTH - 1)
+        page_size = get_int_param(request, 'page_size', DEFAULT_SIBLING_PAGE_SIZE, 1, MAX_SIBLING_PAGE_SIZE)
+        after = None
+        if request.query_params.get('cursor'):
+            try:
+                after = decode_cursor(request.query_params['cursor'], member.id)
+            except ValueError as exc:
+                raise ParseError(str(exc))
+        node = expand_subtree(FamilyMember.objects.filter(user=request.user), member, depth + 1, page_size, after)
+        return Response({"results": node['children'], "next_cursor": node['children_cursor']})
+
+    @action(detail=False, methods=['post'])
+    def kinship(self, request):
+        """Kinship and relationship coefficients for a batch of ``pairs`` of member ids."""
+        serializer = KinshipRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = serializer.validated_data['pairs']
+
+        member_ids = {member_id for pair in pairs for member_id in pair}
+        graph = get_family_graph(request.user.id, member_ids)
+        unknown_ids = sorted(member_ids - graph.index.keys())
+        if unknown_ids:
+            raise ValidationError({"pairs": [f"Unknown family member ids: {unknown_ids}"]})
+
+        calculator = KinshipCalculator(graph)
+        results = []
+        for first_id, second_id in pairs:
+            first, second = graph.index[first_id], graph.index[second_id]
+            results.append({
+                "pair": [first_id, second_id],
+                "kinship": calculator.kinship(first, second),
+                "relationship": calculator.relationship(first, second),
+            })
+        return Response({"results": results})
+
+    @action(detail=True, methods=['get'], url_path=r'relationship/(?P<other_pk>\d+)')
+    def relationship(self, request, pk=None, other_pk=None):
+        """Shortest relationship path from this member to another, with a kinship label."""
+        member = self.get_object()
+        other = get_object_or_404(FamilyMember.objects.filter(user=request.user), pk=other_pk)
+
+        graph = get_family_graph(request.user.id, (member.id, other.id))
+        path = find_path(graph, graph.index[member.id], graph.index[other.id])
+        if path is None:
+            return Response({"detail": "No relationship found."}, status=status.HTTP_404_NOT_FOUND)
+
+        member_ids = [graph.ids[i] for i in path]
+        names = FamilyMember.objects.in_bulk(member_ids)
+        steps = [None] + path_steps(graph, path)
+        return Response({
+            "label": relationship_label(graph, path),
+            "distance": len(path) - 1,
+            "path": [
+                {
+                    "id": member_id,
+                    "first_name": names[member_id].first_name,
+                    "last_name": names[member_id].last_name,
+                    "step": step,
+                }
+                for member_id, step in zip(member_ids, steps)
+            ],
+        })
+
+    def _lineage_response(self, request, get_depths):
+        member = self.get_object()
+        max_depth = get_int_param(request, 'depth', MAX_LINEAGE_DEPTH, 1, MAX_LINEAGE_DEPTH)
+
+        depths = get_depths(member.id, max_depth)
+        relatives = self.get_queryset().filter(id__in=depths).select_related(
+            'village_of_origin__chiefdom'
+        ).prefetch_related('children_from_mother', 'children_from_father')
+
+        data = []
+        for member_data in self.get_serializer(relatives, many=True).data:
+            member_data['depth'] = depths[member_data['id']]
+            data.append(member_data)
+        data.sort(key=lambda member_data: (member_data['depth'], member_data['id']))
+        return Response(data)
+
+
+def get_int_param(request, name, default, minimum, maximum):
+    """Read a bounded integer query parameter, raising a 400 for bad values."""
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        raise ParseError(f"{name} must be an integer.")
+    if not minimum <= value <= maximum:
+        raise ParseError(f"{name} must be between {minimum} and {maximum}.")
+    return value
+
+
+def member_page_response(view, queryset):
+    """A page of ``queryset`` as member payloads, honouring ``?fields=`` and ``?exclude=``."""
+    fields = get_fields_param(view.request, MEMBER_FIELDS)
+    # Page through the sort keys alone, then load the page's rows
+    keys = view.paginate_queryset(queryset.values('id'))
+    page = view.paginator.order(queryset, view).filter(id__in=[key['id'] for key in keys])
+    return view.get_paginated_response(member_payloads(page, view.request, fields))
+
+
+def get_fields_param(request, available):
+    """
+    Read ``?fields=a,b`` or ``?exclude=a,b`` into the list of fields to return.
+
+    Returns None when neither is given; raises a 400 for unknown fields or when
+    nothing would be left.
+    """
+    fields, exclude = request.query_params.get('fields'), request.query_params.get('exclude')
+    if fields is None and exclude is None:
+        return None
+    if fields is not None and exclude is not None:
+        raise ParseError("Use either fields or exclude, not both.")
+    names = [name.strip() for name in (fields if fields is not None else exclude).split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ParseError(f"Unknown fields: {', '.join(unknown)}.")
+    selected = [name for name in available if (name in names) == (fields is not None)]
+    if not selected:
+        raise ParseError("No fields selected.")
+    return selected
+
+
+def with_tree_counts(trees):
+    """
+    Annotate trees with ``member_count``, ``living_count`` and ``generation_count``.
+
+    Generations are the widest ancestor-descendant span between two of the tree's
+    own members, read from the ancestry closure table.
+    """
+    deepest = FamilyMemberAncestry.objects.filter(
+        ancestor__family_trees=OuterRef('pk'), descendant__family_trees=OuterRef('pk')
+    ).order_by('-depth').values('depth')[:1]
+    return trees.annotate(
+        member_count=Count('members', distinct=True),
+        living_count=Count('members', filter=Q(members__date_of_death__isnull=True), distinct=True),
+    ).annotate(
+        generation_count=Case(
+            When(member_count=0, then=Value(0)),
+            default=Coalesce(Subquery(deepest), Value(0)) + 1,
+        )
+    )
 
 
 class FamilyTreeViewSet(viewsets.ModelViewSet):
@@ -52,19 +302,48 @@ class FamilyTreeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             # Return all FamilyTree instances for schema generation
-            return FamilyTree.objects.all().select_related(
-                'user',  # Adjust related fields as necessary
-                # Add other related fields if applicable
-            )
+            return FamilyTree.objects.all().select_related('owner')
         if self.request.user.is_authenticated:
             # Return FamilyTree instances related to the authenticated user
-            return FamilyTree.objects.filter(owner=self.request.user).select_related(
-                'user',  # Adjust related fields as necessary
-                # Add other related fields if applicable
-            )
+            return with_tree_counts(FamilyTree.objects.filter(owner=self.request.user).select_related('owner'))
         # Return an empty queryset for unauthenticated users (shouldn't occur due to IsAuthenticated)
         return FamilyTree.objects.none()
 
+    @property
+    def keyset_ordering(self):
+        return MEMBER_KEYSET_ORDERING if self.action == 'members' else ('id',)
+
+    @action(detail=True, methods=['get'])
+    @cache_per_user()
+    def timeline(self, request, pk=None):
+        """Events, births and deaths of the tree's members in date order; see :func:`timeline_response`."""
+        return timeline_response(request, FamilyMember.objects.filter(family_trees=self.get_object()))
+
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def members(self, request, pk=None):
+        """
+        GET pages through the tree's members like the member list. POST and DELETE
+        take ``{"member_ids": [...]}`` and add or remove those members in bulk.
+        """
+        tree = self.get_object()
+        if request.method == 'GET':
+            members = FamilyMember.objects.filter(family_trees=tree)
+            return member_page_response(self, members)
+
+        serializer = TreeMembersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        member_ids = set(serializer.validated_data['member_ids'])
+        owned = set(FamilyMember.objects.filter(user=request.user, id__in=member_ids).values_list('id', flat=True))
+        if owned != member_ids:
+            raise ValidationError({"member_ids": [f"Unknown family members: {sorted(member_ids - owned)}."]})
+
+        present = set(tree.members.filter(id__in=member_ids).values_list('id', flat=True))
+        if request.method == 'POST':
+            tree.members.add(*(member_ids - present))
+            return Response({"added": len(member_ids - present)})
+        tree.members.remove(*present)
+        return Response({"removed": len(present)})
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
@@ -74,6 +353,7 @@ class ChiefdomViewSet(viewsets.ModelViewSet):
     serializer_class = ChiefdomSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
+    keyset_ordering = ('name', 'id')
     search_fields = ['name']
 
 
@@ -82,6 +362,7 @@ class VillageViewSet(viewsets.ModelViewSet):
     serializer_class = VillageSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
+    keyset_ordering = ('name', 'id')
     search_fields = ['name', 'chiefdom__name']
 
 
@@ -90,6 +371,7 @@ class LocationViewSet(viewsets.ModelViewSet):
     serializer_class = LocationSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
+    keyset_ordering = ('name', 'id')
     search_fields = ['name']
 
 
@@ -99,57 +381,279 @@ class EventViewSet(viewsets.ModelViewSet):
     serializer_class = EventSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('date', 'id')
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             # Return all Event instances for schema generation
-            return Event.objects.all().select_related('family_member', 'related_fields_here')
+            return Event.objects.all().select_related('family_member')
         if self.request.user.is_authenticated:
             # Return Event instances related to the authenticated user
-            return Event.objects.filter(family_member__user=self.request.user).select_related(
-                'family_member', 'related_fields_here'
-            )
+            return Event.objects.filter(family_member__user=self.request.user).select_related('family_member')
         # Return an empty queryset for unauthenticated users (shouldn't occur due to IsAuthenticated)
         return Event.objects.none()
 
-    def perform_create(self, serializer):
-        serializer.save(family_member=self.request.user.familymember)  # Adjust as per your model relationships
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create a batch of ``events`` in one transaction; see BulkEventWriter."""
+        rows = request.data.get('events') if isinstance(request.data, dict) else None
+        return Response({"results": BulkEventWriter(request.user).run(rows)}, status=status.HTTP_201_CREATED)
+
+
+class DuplicateCandidateViewSet(viewsets.ModelViewSet):
+    """Review possible duplicate family members: list them and confirm or dismiss each pair."""
+
+    serializer_class = DuplicateCandidateSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'patch', 'head', 'options']
+    keyset_ordering = ('-score', 'id')
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return DuplicateCandidate.objects.none()
+        queryset = DuplicateCandidate.objects.filter(first__user=self.request.user).select_related('first', 'second')
+        status_filter = self.request.query_params.get('status', 'PENDING')
+        if status_filter != 'ALL':
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+
+class CacheStatsAPIView(APIView):
+    """Hit and miss counts of the per-user response cache, for staff."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response({"views": cache_stats()})
 
 
 class FamilyTreeAPIView(APIView):
     """API view to retrieve family tree by clan name (last_name)."""
     permission_classes = [permissions.IsAuthenticated]
 
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
+    @cache_per_user()
     def get(self, request, clan_name, format=None):
-        # Use select_related to fetch related objects in a single query
-        family_members = FamilyMember.objects.filter(
-            last_name__iexact=clan_name,
-            user=request.user
-        ).select_related('mother', 'father', 'chiefdom_of_origin', 'village_of_origin',
-                         'current_location').prefetch_related('spouses')
+        clan = clan_members(request.user, clan_name)
+        roots = clan_roots(clan)
 
-        if not family_members.exists():
+        # Count and page through the roots first; only the page's subtrees are loaded
+        total_roots = roots.count()
+        if not total_roots and not clan.exists():
             return Response({"detail": "Clan not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        roots = family_members.filter(mother__isnull=True, father__isnull=True)
-
-        def build_tree(member, visited=None):
-            if visited is None:
-                visited = set()
-            if member.id in visited:
-                return None  # or handle appropriately
-            visited.add(member.id)
-            serializer = FamilyMemberSerializer(member)
-            member_data = serializer.data
-            children = family_members.filter(Q(mother=member) | Q(father=member))
-            member_data['children'] = [build_tree(child, visited.copy()) for child in children if
-                                       child.id not in visited]
-            return member_data
-
-        tree = [build_tree(root) for root in roots]
-
-        paginator = PageNumberPagination()
-        paginator.page_size = 10  # Adjust as needed
-        paginated_tree = paginator.paginate_queryset(tree, request)
-        return paginator.get_paginated_response(paginated_tree)
+        page_size = get_int_param(request, 'page_size', 10, 1, 100)
+        after = get_int_param(request, 'after', 0, 0, sys.maxsize)
+        root_ids = list(roots.filter(id__gt=after).values_list('id', flat=True)[:page_size + 1])
+        has_next = len(root_ids) > page_size
+        root_ids = root_ids[:page_size]
+
+        tree = []
+        if root_ids:
+            # Parentless spouses folded into the page's root couples
+            partners = clan_partners(clan, root_ids)
+            partner_ids = [partner_id for ids in partners.values() for partner_id in ids]
+            subtree_ids = FamilyMemberAncestry.objects.filter(
+                ancestor_id__in=root_ids + partner_ids
+            ).values('descendant_id')
+            family_members = list(
+                clan.filter(
+                    Q(id__in=root_ids + partner_ids) | Q(id__in=subtree_ids)
+                ).select_related(
+                    'chiefdom_of_origin', 'village_of_origin__chiefdom', 'current_location'
+                ).prefetch_related(
+                    'spouses', 'children_from_mother', 'children_from_father'
+                ).order_by('id')
+            )
+            tree = build_family_tree(family_members, {root_id: partners[root_id] for root_id in root_ids})
+
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'after', root_ids[-1])
+        response = Response({"next": next_url, "results": tree})
+        response['X-Total-Count'] = total_roots
+        return response
+
+
+class ClanTimelineAPIView(APIView):
+    """Events, births and deaths of a clan in date order; see :func:`timeline_response`."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    @cache_per_user()
+    def get(self, request, clan_name, format=None):
+        return timeline_response(request, clan_members(request.user, clan_name))
+
+
+def timeline_response(request, members):
+    """
+    A page of the timeline of ``members``.
+
+    Takes ``?from=`` and ``?to=`` dates, ``?event_type=`` as a comma-separated
+    list, ``?page_size=`` and the ``?cursor=`` of the previous page's ``next`` link.
+    """
+    paginator = KeysetPagination()
+    page_size = paginator.get_page_size(request)
+    after = None
+    if request.query_params.get('cursor'):
+        after = paginator.decode_cursor(request.query_params['cursor'], 3)
+        if parse_date_param(after[0], 'cursor') is None or not all(isinstance(value, int) for value in after[1:]):
+            raise ParseError("Invalid cursor.")
+    event_types = None
+    if request.query_params.get('event_type'):
+        event_types = request.query_params['event_type'].split(',')
+        unknown = set(event_types) - {event_type for event_type, _ in Event.EVENT_TYPES}
+        if unknown:
+            raise ParseError(f"Unknown event types: {', '.join(sorted(unknown))}.")
+
+    entries, next_key = timeline(
+        members, page_size, after,
+        date_from=parse_date_param(request.query_params.get('from'), 'from'),
+        date_to=parse_date_param(request.query_params.get('to'), 'to'),
+        event_types=event_types,
+    )
+    next_url = None
+    if next_key:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', paginator.encode_cursor(next_key))
+    return Response({"next": next_url, "results": entries})
+
+
+def parse_date_param(value, name):
+    """Parse an ISO date query parameter, raising a 400 for bad values."""
+    if value is None:
+        return None
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ParseError(f"{name} must be a date in YYYY-MM-DD format.")
+    return date
+
+
+def clan_members(user, clan_name):
+    """
+    Members of ``user``'s tree whose last name matches ``clan_name`` ignoring case.
+
+    Compares ``Lower(last_name)`` rather than using ``__iexact`` so that PostgreSQL
+    can use the functional index on (user, lower(last_name)).
+    """
+    return FamilyMember.objects.alias(last_name_lower=Lower('last_name')).filter(
+        user=user, last_name_lower=Lower(Value(clan_name))
+    )
+
+
+def _has_lower_spouse(among):
+    """Whether a member has a spouse in ``among`` with a lower id."""
+    return Exists(
+        FamilyMember.spouses.through.objects.filter(
+            from_familymember_id=OuterRef('pk'),
+            to_familymember_id__lt=OuterRef('pk'),
+            to_familymember__in=among,
+        )
+    )
+
+
+def clan_couple_heads(clan):
+    """Parentless members of ``clan`` with no parentless spouse of a lower id."""
+    parentless = clan.filter(mother__isnull=True, father__isnull=True)
+    return parentless.exclude(_has_lower_spouse(parentless))
+
+
+def clan_roots(clan):
+    """
+    Return the roots of a clan queryset, ordered by id.
+
+    Roots are members without parents. A parentless member married to a couple
+    head, see :func:`clan_couple_heads`, is folded into that head's root couple;
+    any other parentless member, such as a second wife of a folded husband, is a
+    root of their own.
+    """
+    parentless = clan.filter(mother__isnull=True, father__isnull=True)
+    return parentless.exclude(_has_lower_spouse(clan_couple_heads(clan))).order_by('id')
+
+
+def clan_partners(clan, root_ids):
+    """Map each of ``root_ids`` to the ids of the parentless spouses folded into it."""
+    partners = {root_id: [] for root_id in root_ids}
+    for root_id, partner_id in FamilyMember.spouses.through.objects.filter(
+            to_familymember__in=clan_couple_heads(clan).filter(id__in=root_ids),
+            from_familymember__in=clan.filter(mother__isnull=True, father__isnull=True),
+            from_familymember_id__gt=F('to_familymember_id'),
+    ).order_by('from_familymember_id').values_list('to_familymember_id', 'from_familymember_id'):
+        partners[root_id].append(partner_id)
+    return partners
+
+
+class ClanExportAPIView(APIView):
+    """API view to stream a clan (last_name) as NDJSON, parents before children."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, clan_name, format=None):
+        family_members = clan_members(request.user, clan_name)
+        if not family_members.exists():
+            return Response({"detail": "Clan not found."}, status=status.HTTP_404_NOT_FOUND)
+        return ndjson_export_response(family_members, slugify(clan_name) or 'clan')
+
+
+def ndjson_export_response(family_members, filename):
+    response = StreamingHttpResponse(iter_ndjson(family_members), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    return response
+
+
+def build_family_tree(family_members, roots=None):
+    """
+    Assemble nested tree data for an already fetched list of family members.
+
+    Members are serialized in a single batch and linked through a parent -> children
+    index, so no queries are issued per node. ``roots`` maps root ids to the ids
+    of their folded spouses, as from :func:`clan_partners`; without it, roots
+    follow the rules of :func:`clan_roots`. Children of a folded spouse are
+    listed under the root of the couple.
+    """
+    serialized = {
+        data['id']: data
+        for data in FamilyMemberSerializer(family_members, many=True).data
+    }
+
+    children_index = defaultdict(list)
+    for member in family_members:
+        for parent_id in {member.mother_id, member.father_id} - {None}:
+            if parent_id in serialized:
+                children_index[parent_id].append(member.id)
+
+    parentless = {
+        member.id for member in family_members
+        if member.mother_id is None and member.father_id is None
+    }
+
+    def build_tree(member_id, visited, partner_ids=()):
+        visited = visited | {member_id, *partner_ids}
+        member_data = dict(serialized[member_id])
+        child_ids = sorted({
+            child_id
+            for parent_id in (member_id, *partner_ids)
+            for child_id in children_index[parent_id]
+        })
+        member_data['children'] = [
+            build_tree(child_id, visited)
+            for child_id in child_ids
+            if child_id not in visited
+        ]
+        return member_data
+
+    if roots is None:
+        parentless_spouses = {
+            member_id: {spouse_id for spouse_id in serialized[member_id]['spouses'] if spouse_id in parentless}
+            for member_id in parentless
+        }
+        heads = {
+            member_id for member_id, spouses in parentless_spouses.items()
+            if not any(spouse_id < member_id for spouse_id in spouses)
+        }
+        roots = {
+            member_id: sorted(spouse_id for spouse_id in spouses if spouse_id > member_id) if member_id in heads else []
+            for member_id, spouses in sorted(parentless_spouses.items())
+            if not any(spouse_id < member_id for spouse_id in spouses & heads)
+        }
+
+    return [build_tree(root_id, frozenset(), partner_ids) for root_id, partner_ids in roots.items()]
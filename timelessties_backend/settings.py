@@ -91,7 +91,9 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
-    "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",)
+    "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # Views pick their ordering with keyset_ordering; see api.pagination
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
 }
 
 SIMPLE_JWT = {
@@ -168,8 +170,51 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # L2 for api.caching's response bodies, shared by every worker on the host.
+    # Culling scans the whole directory, so keep MAX_ENTRIES in line with the
+    # number of users whose pages should stay warm.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('SHARED_CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SHARED_CACHE_MAX_ENTRIES', default=10000, cast=int),
+            'CULL_FREQUENCY': 4,  # Drop a quarter of the entries when full
+        },
+    },
+    # Revision counters and single-flight locks for api.caching. These need an
+    # atomic add(), so they live in the database: run `manage.py createcachetable`
+    # once after migrate. DatabaseCache runs a COUNT(*) over the table on every
+    # add() and set() to decide whether to cull. The table only holds two rows per
+    # user plus in-flight locks, so the count stays cheap and MAX_ENTRIES sits far
+    # above it; should it ever fill, expired locks are deleted first and
+    # CULL_FREQUENCY then drops 1% of the rows instead of the default third.
+    'coordination': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_cache_coordination',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000000,
+            'CULL_FREQUENCY': 100,
+        },
+    },
 }
 
+# Per-user response cache (see api.caching); entries are invalidated by revision, this bounds unused ones
+RESPONSE_CACHE_TIMEOUT = 60 * 15
+RESPONSE_CACHE_STALE_TIMEOUT = 60 * 5  # Served while one request rebuilds an expired entry
+RESPONSE_CACHE_LOCAL_TIMEOUT = 30  # Seconds an entry is kept in a worker's own memory
+
+# Per-process cache of compact genealogy graphs (see api.graph)
+FAMILY_GRAPH_CACHE_MAX_BYTES = 64 * 1024 * 1024
+FAMILY_GRAPH_CACHE_MAX_AGE = 300  # Seconds; bounds staleness from writes in other processes
+
+# Per-process cache of chiefdom, village and location ids by name (see api.places)
+PLACE_CACHE_MAX_ENTRIES = 10000  # Per table
+PLACE_CACHE_MAX_AGE = 3600
+
+# Per-process name search index, used when PostgreSQL's pg_trgm is unavailable (see api.search)
+NAME_INDEX_CACHE_MAX_BYTES = 128 * 1024 * 1024
+NAME_INDEX_CACHE_MAX_AGE = 300
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'